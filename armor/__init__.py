@@ -0,0 +1,67 @@
+"""
+Armor Gaming Mouse Driver Library
+MCU: Holtek HT68FB571
+
+Importable protocol, payload builders, transports and flashing pipeline.
+Nothing touches the USB stack or MSDriver.dll at import time: submodules
+load on first attribute access and the DLL loads when a transport opens.
+
+    from armor import compile_plan, get_transport, apply_config
+    python -m armor --help
+"""
+
+__version__ = "0.10.0"
+
+# Public name -> submodule that defines it (resolved lazily on first access)
+_EXPORTS = {
+    "protocol": (
+        "VID", "PID", "FEATURE_SIZE", "OUTPUT_SIZE", "MACRO_SIZE", "POLLING_CODES",
+        "SECTOR_CMDS", "PREP_SEQUENCES", "build_cmd", "checksum_ok", "polling_cmd",
+        "sensitivity_cmd", "sensor_cmd", "stop_macro_cmd", "color_payload",
+        "dpi_payload", "buttons_payload", "compile_macro", "macro_chunks",
+        "macro_slot_address", "macro_slot_cmd", "macro_button",
+    ),
+    "transport": (
+        "Frame", "Transport", "TransportError", "MSDriverTransport", "EmulatorTransport",
+        "get_transport", "open_transport", "wait_for_reconnect",
+    ),
+    "emulator": ("HoltekEmulator",),
+    "decompiler": ("MacroHit", "decode_macro", "decompile_macro", "scan_capture", "scan_blob",
+                   "scan_files", "build_library"),
+    "hid": ("MacroError", "key_code", "encode_action", "encode_macro", "encode_macros"),
+    "pacing": ("FixedPacer", "AdaptivePacer", "TimingModel", "PacingError"),
+    "flash": ("SECTOR_ORDER", "ShadowImage", "sector_writes", "plan_flash"),
+    "optimiser": ("MacroReport", "optimise_macro"),
+    "recorder": ("MacroRecorder", "read_events", "evdev_events", "record"),
+    "simulator": ("MacroSimulation", "simulate", "simulate_library"),
+    "slots": ("SlotAllocation", "allocate_macros"),
+    "pbin": ("PROFILE_SIZE", "ProfileError", "ProfileFile", "PROFILE_SCHEMA", "query",
+             "DiffRange", "diff", "diff_files"),
+    "container": ("ProfileContainer",),
+    "convert": ("Conversion", "BUTTON_CODES", "to_config", "to_profile", "to_sector_writes"),
+    "store": ("ProfileStore",),
+    "validate": ("Issue", "normalise", "validate", "validate_file", "sweep"),
+    "ini": ("DeviceIni", "IniError", "IniCache", "IniWatcher", "button_blocks"),
+    "playback": ("MacroPlayer", "PlaybackStats", "RecordingSink", "UInputSink", "serve"),
+    "text": ("LAYOUTS", "text_actions", "compile_text"),
+    "plan": ("FlashPlan", "PlanCache", "compile_plan", "execute"),
+    # journal.flash stays qualified: the name is taken by the armor.flash submodule
+    "journal": ("FlashJournal", "resume", "apply_config"),
+    "windows": ("apply_os_settings",),
+}
+_LOOKUP = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = sorted(_LOOKUP)
+
+
+def __getattr__(name):
+    module = _LOOKUP.get(name)
+    if module is None:
+        raise AttributeError(f"module 'armor' has no attribute '{name}'")
+    from importlib import import_module
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value  # Cache so the next access skips __getattr__
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,7 @@
+"""Allows `python -m armor ...`."""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
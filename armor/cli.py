@@ -0,0 +1,700 @@
+"""
+Armor Gaming Mouse Command Line
+
+Thin front end over the library. Each command imports only what it needs,
+so query-only commands (info, plan) never load the DLL, the emulator or
+the multiprocessing machinery.
+
+    python -m armor info
+    python -m armor plan profile.json
+    python -m armor macros profile.json
+    python -m armor simulate profile.json --strict
+    python -m armor decompile Data/*.pbin capture.txt --json
+    python -m armor host profile.json --evdev /dev/input/event3
+    python -m armor text "Hello, World!" --layout uk
+    python -m armor profiles Data/*.pbin --field name --field dpi_stages
+    python -m armor container Data/profile.bin add Data/Profile-max.pbin --name Max
+    python -m armor diff Data/Default.pbin Data/Profile-*.pbin --json
+    python -m armor convert Data/Profile-yellow.pbin -o yellow.json
+    python -m armor convert yellow.json -o Yellow.pbin --name Yellow
+    python -m armor store find --polling-rate 1000 --macro-slot 4
+    python -m armor validate profiles/ --fix normalised/ --json
+    python -m armor ini Data.ini --watch
+    python -m armor record --evdev /dev/input/event3 --json
+    python -m armor flash profile.json --transport emulator
+    python -m armor runtime --polling-rate 1000 --debounce-ms 8
+    python -m armor daemon serve
+    python -m armor fleet profile.json --devices 8 --transport emulator
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from . import __version__
+
+# Command name -> (module with its own main(argv), help text)
+DELEGATED = {
+    "daemon": ("armor.daemon", "Long-running session daemon (serve / call)"),
+    "fleet": ("armor.fleet", "Flash every attached mouse concurrently"),
+}
+
+
+def load_config(path):
+    """Reads a configuration dict (the keys compile_plan expects) from JSON."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _byte(text):
+    """argparse type for a value that goes into one byte of a command."""
+    try:
+        value = int(text, 0)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' is not a number") from None
+    if not 0 <= value <= 0xFF:
+        raise argparse.ArgumentTypeError(f"{value} is outside 0-255")
+    return value
+
+def _transport_name(args):
+    return (args.transport or os.environ.get("ARMOR_TRANSPORT") or "msdriver").lower()
+
+def _shadow(transport):
+    """The shadow image of the mouse behind a transport (opened or not)."""
+    from .flash import ShadowImage
+    return ShadowImage(device=transport.device_id)
+
+
+# =====================================================================
+# COMMANDS
+# =====================================================================
+def cmd_info(args):
+    from .protocol import PID, POLLING_CODES, VID
+    from .plan import DEFAULT_CACHE_DIR
+    plans = os.path.join(DEFAULT_CACHE_DIR, "plans")
+    cached = len([n for n in os.listdir(plans) if n.endswith(".json")]) if os.path.isdir(plans) else 0
+    print(f"armor {__version__}")
+    print(f"  device      {VID:04X}:{PID:04X} (Holtek HT68FB571)")
+    print(f"  transport   {_transport_name(args)} (msdriver, emulator)")
+    print(f"  polling     {', '.join(str(hz) for hz in POLLING_CODES)} Hz")
+    print(f"  plan cache  {cached} plan(s) in {plans}")
+    return 0
+
+def cmd_plan(args):
+    from .hid import MacroError
+    from .plan import PlanCache
+    from .protocol import macro_slot_limit
+    from .transport import TransportError, get_transport
+    try:
+        plan = PlanCache(slot_count=macro_slot_limit(_transport_name(args))).get(load_config(args.config))
+        transport = get_transport(args.transport)
+    except (MacroError, TransportError) as e:
+        print(f"❌ {e}"); return 1
+    steps = plan.select(_shadow(transport), full=args.full)
+    changed = [s.name for s in steps[1:-1]]
+    if args.json:
+        print(json.dumps({"plan": plan.key, "sectors": changed,
+                          "expected_ms": plan.expected_duration(steps) * 1000}, indent=2))
+        return 0
+    print(f"Plan {plan.key[:16]}")
+    for step in plan.steps:
+        mark = "*" if step.name in changed or (changed and step.name in ("UNLOCK", "COMMIT")) else " "
+        print(f"  {mark} {step.name:<14} {len(step.cmds)} cmd, {len(step.chunks)} chunk")
+    print(f"  {len(changed)} sector(s) to write, ~{plan.expected_duration(steps) * 1000:.1f} ms busy time")
+    return 0
+
+def cmd_macros(args):
+    from .hid import MacroError
+    from .optimiser import optimise_macro, report
+    from .protocol import macro_slot_limit
+    from .slots import assign_slots, assign_triggers, macro_actions, spec_actions
+    config = load_config(args.config)
+    library = config.get("macros") or {"macro": dict(config["macro"], slot=1)}
+    try:
+        slots = assign_slots(library, macro_slot_limit(_transport_name(args)))
+    except MacroError as e:
+        print(f"❌ {e}"); return 1
+    triggers = assign_triggers(library)
+    for name, spec in library.items():
+        if name in triggers:
+            print(f"  slot {slots[name]}  {name:<20} {len(spec_actions(spec)):>3} actions  host-played, "
+                  f"trigger {triggers[name]}")
+            continue
+        size = report(macro_actions(spec))  # What actually gets flashed
+        best = optimise_macro(spec_actions(spec))
+        print(f"  slot {slots[name]}  {name:<20} {len(size.actions):>3} actions  {size.bytes_used:>3}/128 bytes"
+              f"  ({size.bytes_free} free; optimised: {best.bytes_free} free, "
+              f"{best.dropped} dropped, {best.split} split)")
+    return 0
+
+def cmd_simulate(args):
+    from .simulator import simulate_library
+    config = load_config(args.config)
+    library = config.get("macros") or {"macro": config["macro"]}
+    debounce = config.get("key_response_ms") if args.debounce is None else args.debounce
+    results = simulate_library(library, debounce)
+    worst = 0
+    for name, sim in results.items():
+        flags = []
+        if sim.stuck:
+            flags.append(f"stuck: {', '.join(map(str, sim.stuck))}")
+        if sim.debounce:
+            flags.append(f"{sum(h.count for h in sim.debounce)} edge(s) inside {debounce}ms debounce")
+        worst = max(worst, len(flags))
+        print(f"  {name:<20} x{sim.repeat:<5} {sim.duration_ms / 1000:>8.2f}s  overlap {sim.overlap_ms}ms"
+              f"  max keys {sim.max_keys}  {'⚠️ ' + '; '.join(flags) if flags else '✅'}")
+    return 1 if worst and args.strict else 0
+
+def _host_library(config):
+    from .slots import assign_triggers
+    library = config.get("macros") or {}
+    return library, assign_triggers(library)
+
+def _sink(args):
+    from .playback import RecordingSink, UInputSink
+    return RecordingSink() if args.dry_run else UInputSink()
+
+def _print_stats(name, stats):
+    state = "stopped" if stats.stopped else "done"
+    print(f"  {name}: {stats.events} events in {stats.duration_ms / 1000:.3f}s ({state})  "
+          f"late mean {stats.mean_us:.0f}us  p99 {stats.p99_us:.0f}us  max {stats.max_us:.0f}us")
+
+def cmd_play(args):
+    from .hid import MacroError
+    from .playback import MacroPlayer
+    from .slots import spec_actions
+    library, _ = _host_library(load_config(args.config))
+    if args.macro not in library:
+        print(f"❌ No macro named '{args.macro}'"); return 1
+    spec = library[args.macro]
+    try:
+        with _sink(args) as sink:
+            stats = MacroPlayer(sink, spin=args.spin / 1000).play(spec_actions(spec), spec.get("repeat", 1))
+    except (MacroError, OSError) as e:
+        print(f"❌ {e}"); return 1
+    _print_stats(args.macro, stats)
+    return 0
+
+def cmd_host(args):
+    from .hid import MacroError
+    from .playback import MacroPlayer, serve
+    from .recorder import evdev_events, read_events
+    library, triggers = _host_library(load_config(args.config))
+    if not triggers:
+        print("❌ No \"host\": true macros in this config"); return 1
+    for name, key in triggers.items():
+        print(f"  {key:<4} -> {name}")
+    try:
+        events = evdev_events(args.evdev) if args.evdev else read_events(sys.stdin)
+        with _sink(args) as sink:
+            print("🎧 Listening for trigger keys (Ctrl+C to stop)")
+            serve(library, triggers, events, MacroPlayer(sink, spin=args.spin / 1000), _print_stats)
+    except KeyboardInterrupt:
+        pass
+    except (MacroError, OSError) as e:
+        print(f"❌ {e}"); return 1
+    return 0
+
+def cmd_decompile(args):
+    from .decompiler import build_library, decompile_macro, scan_files
+    hits = []
+    try:
+        if args.payload:
+            actions, repeat = decompile_macro(args.payload, known_keys=False)
+            print(json.dumps({"actions": actions, "repeat": repeat}))
+            return 0
+        for hit in scan_files(args.files):
+            hits.append(hit)
+            if not args.json:
+                where = f"slot {hit.slot}" if hit.slot else f"offset 0x{hit.offset:X}"
+                print(f"  {hit.source}: {where}  {len(hit.actions)} actions x{hit.repeat}")
+    except (ValueError, OSError) as e:  # MacroError, bad hex, unreadable file
+        print(f"❌ {e}"); return 1
+    library = build_library(hits)
+    if args.json:
+        print(json.dumps(library, indent=2))
+    else:
+        print(f"Found {len(hits)} macros, {len(library)} distinct")
+    return 0
+
+def cmd_text(args):
+    from .hid import MacroError
+    from .text import compile_text
+    try:
+        size = compile_text(args.text, args.layout, args.delay_ms)
+    except MacroError as e:
+        print(f"❌ {e}"); return 1
+    if args.json:
+        print(json.dumps({"actions": size.actions, "repeat": 1}))
+        return 0 if size.fits else 1
+    print(f"  {len(args.text)} chars -> {len(size.actions)} actions, {size.bytes_used}/128 bytes")
+    if size.fits:
+        print(f"✅ Fits one macro slot ({size.bytes_free} bytes free)")
+        return 0
+    fit = max(n for n in range(len(args.text) + 1) if compile_text(args.text[:n], args.layout, args.delay_ms).fits)
+    print(f"❌ {-size.bytes_free} bytes over; only the first {fit} chars fit "
+          f"({args.text[:fit]!r}). Split it, or mark the macro \"host\": true")
+    return 1
+
+def cmd_profiles(args):
+    from .pbin import PROFILE_SCHEMA, query
+    fields = args.field or ["name", "dpi_stages", "dpi_colors"]
+    unknown = [f for f in fields if f not in PROFILE_SCHEMA.fields]
+    if unknown:
+        print(f"❌ Unknown field(s): {', '.join(unknown)} (known: {', '.join(PROFILE_SCHEMA.fields)})"); return 1
+    try:
+        for path, index, values in query(args.files, *fields):
+            if args.json:
+                print(json.dumps({"file": path, "index": index, **values}))
+            else:
+                print(f"  {path}[{index}]  " + "  ".join(f"{k}={v}" for k, v in values.items()))
+    except (ValueError, OSError) as e:  # ProfileError, unreadable file
+        print(f"❌ {e}"); return 1
+    return 0
+
+def cmd_container(args):
+    from .container import ProfileContainer
+
+    def slot_of(box, ref):
+        slot = int(ref) if ref.isdigit() else box.find(ref)
+        if slot is None:
+            raise ValueError(f"No profile named '{ref}' in {args.file}")
+        return slot
+    try:
+        if args.action == "list":
+            with ProfileContainer(args.file) as box:
+                for slot in range(len(box)):
+                    print(f"  {slot:>4}  {'(empty)' if box.is_empty(slot) else box[slot].name or '(no name)'}")
+                print(f"{len(box)} slot(s)")
+            return 0
+        with ProfileContainer(args.file, writable=True) as box:
+            if args.action == "add":
+                with open(args.arg, "rb") as f:
+                    slot = box.append(f.read())
+                if args.name:
+                    box.rename(slot, args.name)
+                print(f"✅ Added {args.arg} as slot {slot}")
+            elif args.action == "replace":
+                with open(args.src, "rb") as f:
+                    box.write(slot_of(box, args.arg), f.read())
+                print(f"✅ Replaced {args.arg}")
+            elif args.action == "rename":
+                box.rename(slot_of(box, args.arg), args.name)
+            elif args.action == "extract":
+                with open(args.src, "wb") as f:
+                    f.write(box.read(slot_of(box, args.arg)))
+                print(f"✅ Wrote {args.src}")
+            elif args.action == "delete":
+                box.delete(slot_of(box, args.arg))
+            elif args.action == "compact":
+                moved = box.compact()
+                print(f"✅ {len(box)} profile(s), {sum(1 for o, n in moved.items() if o != n)} moved")
+    except (ValueError, OSError, IndexError) as e:  # ProfileError, bad slot, unreadable file
+        print(f"❌ {e}"); return 1
+    return 0
+
+def cmd_diff(args):
+    from .pbin import diff_files
+    try:
+        for other in args.others:
+            ranges = diff_files(args.base, other, gap=args.gap)
+            if args.json:
+                for r in ranges:
+                    print(json.dumps({"a": args.base, "b": other, **r._asdict()}))
+                continue
+            print(f"{args.base} -> {other}: {len(ranges)} range(s), "
+                  f"{sum(r.end - r.start for r in ranges)} byte(s)")
+            for r in ranges:
+                fields = ", ".join(r.fields[:4]) + (f" (+{len(r.fields) - 4} more)" if len(r.fields) > 4 else "")
+                fields = fields or "raw bytes"
+                print(f"  0x{r.start:05X}-0x{r.end - 1:05X}  {fields}")
+    except (ValueError, OSError) as e:
+        print(f"❌ {e}"); return 1
+    return 0
+
+def cmd_convert(args):
+    from .convert import to_config, to_profile, to_sector_writes
+    from .pbin import ProfileFile
+    try:
+        if args.src.lower().endswith(".json"):
+            if not args.out:
+                print("❌ Converting a configuration needs -o OUT.pbin"); return 1
+            with open(args.template, "rb") as f:
+                template = f.read()
+            data, warnings = to_profile(load_config(args.src), template, args.name)
+            with open(args.out, "wb") as f:
+                f.write(data)
+        else:
+            with ProfileFile(args.src) as pf:
+                if not 0 <= args.index < len(pf):
+                    raise IndexError(f"{args.src} holds {len(pf)} profile(s), there is no index {args.index}")
+                record = pf[args.index]
+                config, warnings = to_config(record, args.polling_rate, args.key_response_ms)
+                writes = to_sector_writes(record, args.polling_rate) if args.sectors else None
+            if writes:
+                for write in writes.values():
+                    print(f"  {write.name:<14} {' '.join(write.cmds)[:44]:<44} {' '.join(write.chunks)}")
+            elif args.out:
+                with open(args.out, "w", encoding="utf-8") as f:
+                    json.dump(config, f, indent=2)
+            else:
+                print(json.dumps(config, indent=2))
+    except (ValueError, OSError, IndexError) as e:  # ProfileError, bad index, unreadable file
+        print(f"❌ {e}"); return 1
+    for warning in warnings:
+        print(f"⚠️ {warning}")
+    if args.out:
+        print(f"✅ Wrote {args.out}")
+    return 0
+
+def cmd_store(args):
+    from .store import ProfileStore
+    try:
+        with ProfileStore(args.dir) as store:
+            if args.action == "add":
+                configs = [p for p in args.items if p.lower().endswith(".json")]
+                digests = store.add_files([p for p in args.items if p not in configs])
+                if configs:
+                    with open(args.template, "rb") as f:
+                        template = f.read()
+                    digests += [store.add_config(load_config(p), template, p) for p in configs]
+                print(f"✅ Added {len(digests)} profile(s), {len(set(digests))} distinct")
+            elif args.action == "find":
+                for digest in store.find(args.name, args.polling_rate, args.dpi, args.macro_slot,
+                                         args.mapping, args.button):
+                    info = store.describe(digest)
+                    if args.json:
+                        print(json.dumps(info))
+                    else:
+                        print(f"  {digest[:12]}  {info['name'] or '(no name)':<20} "
+                              f"{info['polling_rate'] or '?':>4}Hz  {info['dpi_stages']}")
+            elif args.action == "show":
+                print(json.dumps([store.describe(d) for d in args.items], indent=2))
+            elif args.action == "get":
+                if len(args.items) != 2:
+                    print("❌ Usage: store get DIGEST OUT.pbin"); return 1
+                with open(args.items[1], "wb") as f:
+                    f.write(store.get(args.items[0]))
+                print(f"✅ Wrote {args.items[1]}")
+            elif args.action == "remove":
+                for digest in args.items:
+                    print(f"✅ Removed {digest} ({store.remove(digest)} section(s) freed)")
+            elif args.action == "stats":
+                stats = store.stats()
+                print(json.dumps(stats) if args.json else "\n".join(f"  {k:<14} {v}" for k, v in stats.items()))
+    except (ValueError, OSError) as e:  # ProfileError, MacroError, unreadable file
+        print(f"❌ {e}"); return 1
+    return 0
+
+def cmd_validate(args):
+    from .validate import sweep
+    report = sweep(args.paths, args.workers, args.fix)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 1 if report["failed"] else 0
+    for result in report["results"]:
+        if result["error"]:
+            print(f"❌ {result['error']}")
+            continue
+        for profile in result["profiles"]:
+            shown = [i for i in profile["issues"] if args.verbose or not i["fixed"]]
+            if not shown:
+                continue
+            print(f"{'✅' if profile['ok'] else '❌'} {result['file']}[{profile['index']}] {profile['name']}")
+            for i in shown:
+                mark = "🔧" if i["fixed"] else ("❌" if i["severity"] == "error" else "⚠️")
+                print(f"    {mark} {i['field']}: {i['message']}")
+    print(f"{report['files']} file(s), {report['profiles']} profile(s): {report['errors']} error(s), "
+          f"{report['warnings']} warning(s), {report['fixed']} fixable")
+    if args.fix:
+        print(f"✅ Normalised copies written to {args.fix}")
+    return 1 if report["failed"] else 0
+
+def cmd_ini(args):
+    import time
+    from .ini import IniError, IniWatcher, load
+
+    def show(value):
+        if isinstance(value, bytes):
+            return value.hex().upper()
+        if isinstance(value, tuple) and hasattr(value, "mapping"):
+            return f"{value.mapping}{'' if value.enabled else ' (disabled)'}"
+        return value
+    try:
+        ini = load(args.path)
+    except (IniError, OSError) as e:
+        print(f"❌ {e}"); return 1
+    if args.json:
+        data = ini._asdict()
+        data["password"] = ini.password.hex().upper()
+        data["buttons"] = [[e._asdict() for e in block] for block in ini.buttons]
+        print(json.dumps(data, indent=2))
+    else:
+        print(f"  Device   {ini.vid:04X}:{ini.pid:04X}  sensor {ini.sensor}  firmware {ini.version}")
+        print(f"  Password {show(ini.password)}  DPI {ini.dpi}  LOD {ini.distance} "
+              f"({ini.distance_min}-{ini.distance_max}, table {list(ini.distance_values)})")
+        for p, block in enumerate(ini.buttons):
+            print(f"  Profile {p + 1}: " + " ".join(show(e) for e in block))
+    if not args.watch:
+        return 0
+
+    def report(changes):
+        for key, (old, new) in changes.items():
+            print(f"🔄 {key}: {show(old)} -> {show(new)}")
+    watcher = IniWatcher(args.path, interval=args.interval)
+    watcher.subscribe(report)
+    print(f"👀 Watching {args.path} (Ctrl+C to stop)")
+    last_error = None
+    try:
+        while True:
+            watcher.poll()
+            if watcher.error is not None and str(watcher.error) != last_error:
+                print(f"⚠️ {watcher.error} (keeping the last good version)")
+            last_error = str(watcher.error) if watcher.error else None
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        return 0
+
+def cmd_record(args):
+    from .hid import MacroError
+    from .optimiser import optimise_macro
+    from .recorder import MacroRecorder, evdev_events, read_events
+
+    def show(action):
+        if not args.json:
+            print(f"  {action}")
+    recorder = MacroRecorder(show)
+    try:
+        if args.evdev:
+            events = evdev_events(args.evdev)
+        elif args.file == "-":
+            events = read_events(sys.stdin)
+        else:
+            events = read_events(open(args.file, "r", encoding="utf-8"))
+        for event in events:
+            recorder.feed(*event)
+    except KeyboardInterrupt:
+        pass  # Ctrl+C ends a live evdev recording
+    except (MacroError, OSError) as e:
+        print(f"❌ {e}"); return 1
+    actions = recorder.finish()
+    if args.optimise:
+        actions = optimise_macro(actions).actions
+    if args.json:
+        print(json.dumps({"actions": actions, "repeat": args.repeat}))
+    else:
+        print(f"Recorded {len(actions)} actions ({2 + 2 * len(actions)}/128 bytes)")
+    return 0
+
+def cmd_flash(args):
+    from .hid import MacroError
+    from .journal import apply_config
+    from .pacing import AdaptivePacer, PacingError
+    from .transport import TransportError, open_transport
+
+    def on_step(step):
+        if not args.quiet:
+            print(f"  {step.name}")
+    try:
+        config = load_config(args.config)
+    except (OSError, ValueError) as e:  # Unreadable file, bad JSON
+        print(f"❌ {e}" if args.config in str(e) else f"❌ {args.config}: {e}"); return 1
+    try:
+        transport = open_transport(args.transport)
+    except TransportError as e:
+        print(f"❌ Open Failed: {e}"); return 1
+    try:
+        result = apply_config(config, transport, AdaptivePacer(transport, max_delay=args.max_delay),
+                              shadow=_shadow(transport), full=args.full, reboot_timeout=args.reboot_timeout,
+                              on_step=on_step)
+    except (PacingError, TransportError) as e:
+        print(f"❌ USB Failed: {e}"); return 1
+    except KeyError as e:
+        print(f"❌ {args.config} has no {e} setting"); return 1
+    except (MacroError, TypeError, ValueError) as e:  # Entries of the wrong type or out of range
+        print(f"❌ {e}"); return 1
+    finally:
+        transport.close()
+    if result["recovered"] == "discarded":
+        print("⚠️ Discarded an interrupted flash journal written for another device")
+    elif result["recovered"]:
+        print(f"♻️ Recovered interrupted flash ({result['recovered']})")
+    print(f"✅ {len(result['sectors'])} sector(s) written")
+    return 0
+
+def cmd_runtime(args):
+    from .pacing import AdaptivePacer, PacingError
+    from .protocol import polling_cmd, sensitivity_cmd, sensor_cmd
+    from .transport import TransportError, open_transport
+
+    cmds = []
+    if args.polling_rate is not None:
+        cmds.append(polling_cmd(args.polling_rate))
+    if args.sensitivity is not None:
+        cmds.append(sensitivity_cmd(*args.sensitivity))
+    if args.debounce_ms is not None:
+        cmds.append(sensor_cmd(args.debounce_ms))
+    if not cmds:
+        print("Nothing to send."); return 0
+    try:
+        with open_transport(args.transport) as transport:
+            pacer = AdaptivePacer(transport)
+            for cmd in cmds:
+                pacer.send_feature(bytes.fromhex(cmd))
+                print(f"  [Cmd] {cmd}")
+    except (PacingError, TransportError) as e:
+        print(f"❌ USB Failed: {e}"); return 1
+    return 0
+
+
+# =====================================================================
+# ENTRY POINT
+# =====================================================================
+def build_parser():
+    parser = argparse.ArgumentParser(prog="armor", description="Armor mouse (Holtek HT68FB571) driver")
+    parser.add_argument("--version", action="version", version=f"armor {__version__}")
+    sub = parser.add_subparsers(dest="command", required=True)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--transport", default=None, help="msdriver (default, or $ARMOR_TRANSPORT) or emulator")
+
+    sub.add_parser("info", parents=[common], help="Show device identity and cache state").set_defaults(func=cmd_info)
+
+    plan = sub.add_parser("plan", parents=[common], help="Show which sectors a configuration would rewrite")
+    plan.add_argument("config")
+    plan.add_argument("--full", action="store_true", help="Ignore the shadow image")
+    plan.add_argument("--json", action="store_true")
+    plan.set_defaults(func=cmd_plan)
+
+    macros = sub.add_parser("macros", parents=[common], help="Show macro slots and how many bytes each macro uses")
+    macros.add_argument("config")
+    macros.set_defaults(func=cmd_macros)
+
+    sim = sub.add_parser("simulate", help="Estimate macro run time, key overlap and debounce conflicts")
+    sim.add_argument("config")
+    sim.add_argument("--debounce", type=int, default=None, help="Debounce in ms (default: key_response_ms)")
+    sim.add_argument("--strict", action="store_true", help="Exit 1 if any macro has a warning")
+    sim.set_defaults(func=cmd_simulate)
+
+    host_opts = argparse.ArgumentParser(add_help=False)
+    host_opts.add_argument("--dry-run", action="store_true", help="Play into memory instead of /dev/uinput")
+    host_opts.add_argument("--spin", type=float, default=2.0, help="Busy-wait window before each event, ms")
+
+    play = sub.add_parser("play", parents=[host_opts], help="Play one library macro from the host")
+    play.add_argument("config")
+    play.add_argument("macro")
+    play.set_defaults(func=cmd_play)
+
+    host = sub.add_parser("host", parents=[host_opts], help="Play \"host\": true macros when their button fires")
+    host.add_argument("config")
+    host.add_argument("--evdev", help="Input device of the mouse (default: replay events from stdin)")
+    host.set_defaults(func=cmd_host)
+
+    dec = sub.add_parser("decompile", help="Decode macro payloads, captures or profile files into a library")
+    dec.add_argument("files", nargs="*", help="Captures (.txt/.log/.cap) or binary files to scan")
+    dec.add_argument("--payload", help="Decode one 128-byte payload given as hex")
+    dec.add_argument("--json", action="store_true", help="Print the library as JSON")
+    dec.set_defaults(func=cmd_decompile)
+
+    text = sub.add_parser("text", help="Compile a string into a typing macro")
+    text.add_argument("text")
+    text.add_argument("--layout", default="us", help="Keyboard layout (us, uk)")
+    text.add_argument("--delay-ms", type=int, default=10, help="Delay after every action")
+    text.add_argument("--json", action="store_true", help="Print the actions as JSON")
+    text.set_defaults(func=cmd_text)
+
+    prof = sub.add_parser("profiles", help="Query fields of vendor .pbin profile files")
+    prof.add_argument("files", nargs="+")
+    prof.add_argument("--field", action="append", help="Field to show (repeatable; default name, DPI, colours)")
+    prof.add_argument("--json", action="store_true", help="One JSON object per profile")
+    prof.set_defaults(func=cmd_profiles)
+
+    box = sub.add_parser("container", help="Manage a multi-profile file such as Data/profile.bin")
+    box.add_argument("file")
+    box.add_argument("action", choices=("list", "add", "replace", "rename", "extract", "delete", "compact"))
+    box.add_argument("arg", nargs="?", help="Slot number or profile name (add: the .pbin to add)")
+    box.add_argument("src", nargs="?", help="replace: .pbin to write in; extract: output file")
+    box.add_argument("--name", help="Name for add / rename")
+    box.set_defaults(func=cmd_container)
+
+    pdiff = sub.add_parser("diff", help="Diff .pbin profiles into annotated byte ranges")
+    pdiff.add_argument("base")
+    pdiff.add_argument("others", nargs="+", help="Profiles to compare against BASE")
+    pdiff.add_argument("--gap", type=int, default=0, help="Merge ranges separated by at most this many equal bytes")
+    pdiff.add_argument("--json", action="store_true", help="One JSON object per range")
+    pdiff.set_defaults(func=cmd_diff)
+
+    conv = sub.add_parser("convert", help="Convert a .pbin profile to a configuration (or sector payloads) and back")
+    conv.add_argument("src", help=".pbin / profile.bin, or a configuration .json")
+    conv.add_argument("-o", "--out", help="Output file (.json from a profile, .pbin from a configuration)")
+    conv.add_argument("--index", type=int, default=0, help="Profile to read from a multi-profile file")
+    conv.add_argument("--sectors", action="store_true", help="Print the DMA sector payloads instead")
+    conv.add_argument("--polling-rate", type=int, default=1000, choices=(125, 250, 500, 1000))
+    conv.add_argument("--key-response-ms", type=int, default=12)
+    conv.add_argument("--template", default="Data/Default.pbin", help="Profile the written .pbin starts from")
+    conv.add_argument("--name", help="Profile name for the written .pbin")
+    conv.set_defaults(func=cmd_convert)
+
+    st = sub.add_parser("store", help="Deduplicating profile archive with indexed queries")
+    st.add_argument("action", choices=("add", "find", "show", "get", "remove", "stats"))
+    st.add_argument("items", nargs="*", help="add: .pbin / .json files; show/get/remove: digests (prefixes)")
+    st.add_argument("--dir", default="armor_store", help="Store directory")
+    st.add_argument("--template", default="Data/Default.pbin", help="Profile configurations are written into")
+    st.add_argument("--name")
+    st.add_argument("--polling-rate", type=int)
+    st.add_argument("--dpi", type=int, help="Any stage at this DPI")
+    st.add_argument("--macro-slot", type=int, help="A button firing this macro slot")
+    st.add_argument("--mapping", help="A button with this 4-byte mapping, e.g. 0100F000")
+    st.add_argument("--button", type=int, help="Restrict --macro-slot / --mapping to one button (1-16)")
+    st.add_argument("--json", action="store_true")
+    st.set_defaults(func=cmd_store)
+
+    val = sub.add_parser("validate", help="Check profiles and configurations against the hardware limits")
+    val.add_argument("paths", nargs="+", help=".pbin / .json files or directories to sweep")
+    val.add_argument("--workers", type=int, default=None, help="Processes (default: one per CPU)")
+    val.add_argument("--fix", metavar="DIR", help="Write normalised copies into DIR")
+    val.add_argument("--verbose", action="store_true", help="Also list the issues normalising fixes")
+    val.add_argument("--json", action="store_true", help="Print the full JSON report")
+    val.set_defaults(func=cmd_validate)
+
+    ini = sub.add_parser("ini", help="Show (and watch) the vendor's Data.ini")
+    ini.add_argument("path", nargs="?", default="Data.ini")
+    ini.add_argument("--watch", action="store_true", help="Print every changed key as the file is edited")
+    ini.add_argument("--interval", type=float, default=0.5, help="Seconds between checks when watching")
+    ini.add_argument("--json", action="store_true")
+    ini.set_defaults(func=cmd_ini)
+
+    rec = sub.add_parser("record", help="Record a macro from an event replay or a Linux input device")
+    source = rec.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="Replay file ('-' for stdin): lines of 't PRESS|RELEASE KEY'")
+    source.add_argument("--evdev", help="Linux input device, e.g. /dev/input/event3")
+    rec.add_argument("--repeat", type=int, default=1)
+    rec.add_argument("--optimise", action="store_true", help="Run the size optimiser on the result")
+    rec.add_argument("--json", action="store_true", help="Print a macro library entry")
+    rec.set_defaults(func=cmd_record)
+
+    flash = sub.add_parser("flash", parents=[common], help="Flash a configuration (only the changed sectors)")
+    flash.add_argument("config")
+    flash.add_argument("--full", action="store_true", help="Rewrite every sector")
+    flash.add_argument("--max-delay", type=float, default=0.01)
+    flash.add_argument("--reboot-timeout", type=float, default=3.0)
+    flash.add_argument("--quiet", action="store_true")
+    flash.set_defaults(func=cmd_flash)
+
+    runtime = sub.add_parser("runtime", parents=[common], help="Apply volatile RAM settings without flashing")
+    runtime.add_argument("--polling-rate", type=int, choices=(125, 250, 500, 1000))
+    runtime.add_argument("--debounce-ms", type=_byte, help="0-255")
+    runtime.add_argument("--sensitivity", type=_byte, nargs=2, metavar=("X", "Y"), help="0-255 each, 100 = 100%%")
+    runtime.set_defaults(func=cmd_runtime)
+
+    for name, (_, help_text) in DELEGATED.items():
+        sub.add_parser(name, help=help_text, add_help=False)
+    return parser
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # daemon / fleet keep their own parsers (and their own --transport): hand them the rest
+    if argv and argv[0] in DELEGATED:
+        from importlib import import_module
+        return import_module(DELEGATED[argv[0]][0]).main(argv[1:])
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,212 @@
+"""
+Armor Gaming Mouse Profile Container
+
+Random-access reader/writer for multi-profile files such as Data/profile.bin
+(profile records of PROFILE_SIZE bytes back to back, no header).
+
+  * Index        - slot N lives at N * PROFILE_SIZE; a name -> slot dict is
+                   built from the name fields on open (a few bytes per record).
+  * write()      - replaces one profile in place through a writable memory
+                   map and flushes only the pages it touched.
+  * append()     - grows the file by one record and remaps it.
+  * delete()     - zero-fills a record in place, leaving an empty slot. The
+                   vendor app never writes an all-zero profile (its settings
+                   block is never empty), so empty slots are unambiguous.
+  * compact()    - slides the live records down over the empty slots and
+                   truncates the file; returns the old -> new slot map.
+Records handed out by [] are views into the map: do not keep them across
+append() or compact(), which remap the file.
+"""
+
+import mmap
+import os
+
+from .pbin import PROFILE_SCHEMA, ProfileError, ProfileFile, Record
+
+NAME_SIZE = 0x64
+
+
+class ProfileContainer(ProfileFile):
+    """A profile.bin-style file opened for random access (and writing, if writable)."""
+
+    def __init__(self, path, writable=False, schema=PROFILE_SCHEMA):
+        self.path = path
+        self.schema = schema
+        self.writable = writable
+        self._file = open(path, "r+b" if writable else "rb")
+        size = self._file.seek(0, 2)
+        if size % schema.size:
+            self._file.close()
+            raise ProfileError(f"{path}: {size} bytes is not a whole number of "
+                               f"{schema.size}-byte profiles")
+        self._map = None
+        self._remap()
+        self._reindex()
+
+    @classmethod
+    def create(cls, path, profiles=(), schema=PROFILE_SCHEMA):
+        """New container file holding `profiles` (raw records), opened writable."""
+        with open(path, "wb") as f:
+            for data in profiles:
+                f.write(_check(data, schema))
+        return cls(path, writable=True, schema=schema)
+
+    # -----------------------------------------------------------------
+    # Mapping and index
+    # -----------------------------------------------------------------
+    def _remap(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        size = self._file.seek(0, 2)
+        self.count = size // self.schema.size
+        if size:  # An empty file cannot be mapped
+            access = mmap.ACCESS_WRITE if self.writable else mmap.ACCESS_READ
+            self._map = mmap.mmap(self._file.fileno(), 0, access=access)
+
+    def _reindex(self):
+        self._names = {}  # name -> sorted slots holding it
+        for slot in range(self.count):
+            self._index_slot(slot)
+
+    def _index_slot(self, slot):
+        if not self.is_empty(slot):
+            slots = self._names.setdefault(self[slot].name, [])
+            slots.append(slot)
+            slots.sort()
+
+    def _unindex_slot(self, slot):
+        if self.is_empty(slot):
+            return
+        name = self[slot].name
+        slots = self._names.get(name, [])
+        if slot in slots:
+            slots.remove(slot)
+            if not slots:
+                del self._names[name]
+
+    def _offset(self, slot):
+        if not 0 <= slot < self.count:
+            raise IndexError(f"Slot {slot} out of range 0-{self.count - 1}")
+        return slot * self.schema.size
+
+    def _writable(self):
+        if not self.writable:
+            raise ProfileError(f"{self.path} is open read-only")
+
+    def _flush(self, offset, length):
+        # mmap.flush offsets must be page aligned
+        start = offset - offset % mmap.ALLOCATIONGRANULARITY
+        self._map.flush(start, offset + length - start)
+
+    # -----------------------------------------------------------------
+    # Lookup
+    # -----------------------------------------------------------------
+    def __getitem__(self, slot):
+        return Record(self._map, self._offset(slot), self.schema)
+
+    def find(self, name):
+        """Slot of the first profile called `name`, or None."""
+        slots = self._names.get(name)
+        return slots[0] if slots else None
+
+    def names(self):
+        """{name: first slot} of every profile."""
+        return {name: slots[0] for name, slots in self._names.items()}
+
+    def read(self, slot):
+        """A copy of one raw profile record."""
+        offset = self._offset(slot)
+        return self._map[offset:offset + self.schema.size]
+
+    def is_empty(self, slot):
+        offset = self._offset(slot)
+        return not any(self._map[offset:offset + self.schema.size])
+
+    # -----------------------------------------------------------------
+    # Updates
+    # -----------------------------------------------------------------
+    def write(self, slot, data):
+        """Replaces one profile in place; only its pages are flushed."""
+        self._writable()
+        offset = self._offset(slot)
+        data = _check(data, self.schema)
+        self._unindex_slot(slot)
+        self._map[offset:offset + self.schema.size] = data
+        self._flush(offset, self.schema.size)
+        self._index_slot(slot)
+
+    def rename(self, slot, name):
+        """Rewrites just the UTF-16 name field of one profile."""
+        self._writable()
+        raw = name.encode("utf-16-le")
+        if len(raw) > NAME_SIZE - 2:
+            raise ProfileError(f"Profile name '{name}' is longer than {NAME_SIZE // 2 - 1} characters")
+        offset = self._offset(slot)
+        self._unindex_slot(slot)
+        self._map[offset:offset + NAME_SIZE] = raw.ljust(NAME_SIZE, b"\x00")
+        self._flush(offset, NAME_SIZE)
+        self._index_slot(slot)
+
+    def append(self, data):
+        """Adds a profile at the end of the file and returns its slot."""
+        self._writable()
+        data = _check(data, self.schema)
+        if self._map is not None:
+            self._map.flush()
+        self._file.seek(0, 2)
+        self._file.write(data)
+        self._file.flush()
+        self._remap()
+        slot = self.count - 1
+        self._index_slot(slot)
+        return slot
+
+    def delete(self, slot):
+        """Empties a slot in place (compact() reclaims it)."""
+        self._writable()
+        offset = self._offset(slot)
+        self._unindex_slot(slot)
+        self._map[offset:offset + self.schema.size] = bytes(self.schema.size)
+        self._flush(offset, self.schema.size)
+
+    def compact(self):
+        """
+        Moves live profiles down over empty slots (order kept) and truncates
+        the file. Returns {old slot: new slot} for every live profile.
+        """
+        self._writable()
+        size = self.schema.size
+        moved = {}
+        new = 0
+        for old in range(self.count):
+            if self.is_empty(old):
+                continue
+            if old != new:
+                self._map.move(new * size, old * size, size)
+            moved[old] = new
+            new += 1
+        if new != self.count:
+            if self._map is not None:
+                self._map.flush()
+                self._map.close()
+                self._map = None
+            self._file.truncate(new * size)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._remap()
+        self._reindex()
+        return moved
+
+    def close(self):
+        super().close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _check(data, schema):
+    data = bytes(data)
+    if len(data) != schema.size:
+        raise ProfileError(f"A profile record is {schema.size} bytes, not {len(data)}")
+    return data
@@ -0,0 +1,159 @@
+"""
+Armor Gaming Mouse Profile Converter
+
+Bridges the vendor app's .pbin profiles and our flash configurations (the
+dict compile_plan takes), so a saved profile can be flashed directly and a
+configuration can be saved back as a profile the vendor app opens.
+
+What maps, and how (from Default.pbin against the vendor's Data.ini cache):
+  * dpi_stages - the profile counts in 50-DPI units (8 = 400, 124 = 6200),
+                 the DPI sector in 100-DPI steps; odd units are rounded.
+  * dpi_colors - COLORREF words <-> "RRGGBB"; the first `settings[0]`
+                 (the stage count) of the profile's 8 colours are stage colours.
+  * buttons    - records 0-15 carry a vendor function code per button;
+                 BUTTON_CODES maps each code to the 4-byte sector mapping.
+                 Records 16-31 are not part of the flashable layout.
+Polling rate and key response are not stored where we can find them, so
+they are passed in. Vendor macros use a different event format and are
+not converted: buttons bound to one are reported in the warnings.
+
+Going the other way needs a template profile (Data/Default.pbin): only the
+fields above are rewritten, every unmapped byte is kept as it was.
+"""
+
+from collections import namedtuple
+
+from .flash import sector_writes
+from .pbin import PROFILE_SCHEMA, PROFILE_SIZE, ProfileError, Record
+
+# result: the config dict (to_config) or the .pbin bytes (to_profile);
+# warnings: what could not be carried across, one string each
+Conversion = namedtuple("Conversion", "result warnings")
+
+PBIN_DPI_UNIT = 50
+DPI_STEP = 100
+MAX_DPI = 6200
+BUTTON_COUNT = 16
+
+DEFAULT_POLLING_RATE = 1000
+DEFAULT_KEY_RESPONSE_MS = 12
+
+# Vendor button function code -> button sector mapping (Default.pbin vs Data.ini [BUTTON])
+BUTTON_CODES = {
+    0: "00000000",    # Disabled
+    1: "0100F000",    # Left click
+    2: "0100F100",    # Right click
+    3: "0100F200",    # Middle click
+    4: "0100F400",    # Forward
+    5: "0100F300",    # Back
+    6: "07000100",    # DPI up
+    11: "04000100",   # Scroll up
+    12: "04000200",   # Scroll down
+    25: "0100F000",   # Left click (the vendor's code on the second button layer)
+    50: "07000200",   # DPI down
+    112: "0AF03203",  # Fire key: left click, 50ms interval, 3 shots
+}
+FIRE_KEY_CODE = 112
+
+# Mapping -> code for writing profiles; the first code listed for a mapping wins
+MAPPING_CODES = {mapping: code for code, mapping in reversed(BUTTON_CODES.items())}
+
+
+# =====================================================================
+# 1. PROFILE -> CONFIGURATION
+# =====================================================================
+def _stage_count(record):
+    count = record.settings[0]
+    return count if 1 <= count <= len(record.dpi_stages) else len(record.dpi_stages)
+
+def to_config(record, polling_rate=DEFAULT_POLLING_RATE, key_response_ms=DEFAULT_KEY_RESPONSE_MS):
+    """Conversion(config, warnings) for one profile Record (see pbin.ProfileFile)."""
+    warnings = []
+    count = _stage_count(record)
+
+    stages = []
+    for n, units in enumerate(record.dpi_stages[:count]):
+        dpi = units * PBIN_DPI_UNIT
+        flashed = min(MAX_DPI, max(DPI_STEP, round(dpi / DPI_STEP) * DPI_STEP))
+        if flashed != dpi:
+            warnings.append(f"DPI stage {n + 1}: {dpi} DPI flashes as {flashed}")
+        stages.append(flashed)
+
+    buttons = []
+    for button in record.buttons[:BUTTON_COUNT]:
+        mapping = BUTTON_CODES.get(button.code)
+        if mapping is None:
+            warnings.append(f"Button {button.index + 1}: unknown vendor code {button.code}, disabled")
+            mapping = "00000000"
+        elif button.macro_name and button.code != FIRE_KEY_CODE:
+            warnings.append(f"Button {button.index + 1}: vendor macro '{button.macro_name}' is not converted")
+        buttons.append(mapping)
+
+    config = {
+        "polling_rate": polling_rate,
+        "key_response_ms": key_response_ms,
+        "dpi_stages": stages,
+        "dpi_colors": list(record.dpi_colors[:count]),
+        "buttons_1": buttons[:8],
+        "buttons_2": buttons[8:],
+        "macros": {},
+    }
+    return Conversion(config, warnings)
+
+def to_sector_writes(record, polling_rate=DEFAULT_POLLING_RATE):
+    """The DMA sector writes (flash.sector_writes) that put one profile on the mouse."""
+    config = to_config(record, polling_rate).result
+    return sector_writes(config["polling_rate"], config["dpi_stages"], config["dpi_colors"],
+                         config["buttons_1"], config["buttons_2"], {})
+
+
+# =====================================================================
+# 2. CONFIGURATION -> PROFILE
+# =====================================================================
+def to_profile(config, template, name=None):
+    """
+    Conversion(pbin bytes, warnings): `template` (one raw profile) with the
+    configuration's DPI stages, colours and buttons written in. Mappings
+    with no vendor code (macro slots, DPI cycle, ...) keep the template's
+    button and are reported.
+    """
+    data = bytearray(template)
+    if len(data) != PROFILE_SIZE:
+        raise ProfileError(f"A profile template is {PROFILE_SIZE} bytes, not {len(data)}")
+    record = Record(data, 0, PROFILE_SCHEMA)
+    warnings = []
+    if name is not None:
+        record.write("name", name)
+
+    stages = list(config["dpi_stages"])
+    slots = len(record.dpi_stages)
+    if not 1 <= len(stages) <= slots:
+        raise ProfileError(f"A profile holds 1-{slots} DPI stages, not {len(stages)}")
+    units = list(record.dpi_stages)
+    for n, dpi in enumerate(stages):
+        if not 0 < dpi <= MAX_DPI or dpi % PBIN_DPI_UNIT:
+            raise ProfileError(f"DPI stage {n + 1}: {dpi} is not a multiple of {PBIN_DPI_UNIT} up to {MAX_DPI}")
+        units[n] = dpi // PBIN_DPI_UNIT
+    settings = list(record.settings)
+    settings[0] = len(stages)
+    record.write("settings", settings)
+    record.write("dpi_stages", units)
+
+    colors = list(record.dpi_colors)
+    for n, color in enumerate(config["dpi_colors"][:len(colors)]):
+        if len(color) != 6:
+            raise ProfileError(f"DPI colour {n + 1}: '{color}' is not RRGGBB")
+        colors[n] = color.upper()
+    try:
+        record.write("dpi_colors", colors)
+    except ValueError:
+        raise ProfileError(f"DPI colours must be RRGGBB hex: {config['dpi_colors']}") from None
+
+    entries = list(config["buttons_1"]) + list(config["buttons_2"])
+    for button, mapping in zip(record.buttons, entries[:BUTTON_COUNT]):
+        code = MAPPING_CODES.get(str(mapping).upper())
+        if code is None:
+            warnings.append(f"Button {button.index + 1}: '{mapping}' has no vendor code, kept the template's")
+            continue
+        button.write("code", code)
+    return Conversion(bytes(data), warnings)
@@ -0,0 +1,368 @@
+"""
+Armor Gaming Mouse Session Daemon
+
+A long-running process that owns the device session: the HID handles stay
+open between requests, so switching a runtime setting costs a few
+milliseconds instead of a full script start (DLL load, Set_VIDPID,
+Open_FeatureDevice/Open_ReportDevice). Flashes go through the same journal
+as the CLI, so a daemon killed mid-flash finishes it on its next apply.
+
+Requests are JSON messages over a Unix-domain socket (POSIX) or a named
+pipe (Windows), via multiprocessing.connection. The daemon generates a
+random authkey at start and writes it to a key file only its user can
+read (the socket itself is 0600 too); clients read it from there, so no
+other local user can push frames to the EEPROM.
+
+    python -m armor daemon serve --transport emulator
+    python -m armor daemon call runtime polling_rate=1000 debounce_ms=8
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+from .flash import ShadowImage
+from .journal import FlashJournal, apply_config
+from .pacing import AdaptivePacer, PacingError
+from .plan import PlanCache
+from .protocol import POLLING_CODES, macro_slot_limit, polling_cmd, sensitivity_cmd, sensor_cmd
+from .transport import TransportError, get_transport
+
+# Maximum time to wait for the MCU to come back on the USB bus after the commit.
+REBOOT_TIMEOUT = 3.0
+
+def default_address():
+    """Named pipe on Windows, Unix-domain socket everywhere else."""
+    if sys.platform == "win32":
+        return r"\\.\pipe\armor-mouse"
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(base, "armor-mouse.sock")
+
+def default_key_path(address=None):
+    """Where the daemon leaves its authkey: next to the socket (or in the temp dir for a pipe)."""
+    address = address or default_address()
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or tempfile.gettempdir()
+        return os.path.join(base, address.rsplit("\\", 1)[-1] + ".key")
+    return address + ".key"
+
+def read_key(path=None):
+    """The authkey of the running daemon (OSError if there is none)."""
+    with open(path or default_key_path(), "rb") as f:
+        return f.read()
+
+def _write_private(path, data):
+    """Creates (or replaces) a file only the current user can read."""
+    if os.path.exists(path):
+        os.unlink(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+
+
+class DaemonError(Exception):
+    """Raised on the client side when the daemon reports a failed request."""
+
+
+# =====================================================================
+# 1. DEVICE SESSION
+# =====================================================================
+class DeviceSession:
+    """Owns one transport for the lifetime of the daemon. Thread-safe."""
+
+    def __init__(self, transport, pacer=None, cache=None, shadow=None, journal=None,
+                 reboot_timeout=REBOOT_TIMEOUT):
+        self.transport = transport
+        self.pacer = pacer or AdaptivePacer(transport)
+        self.cache = cache or PlanCache(slot_count=macro_slot_limit(transport.name))
+        self.shadow = shadow or ShadowImage(device=transport.device_id)
+        self.journal = journal or FlashJournal()
+        self.reboot_timeout = reboot_timeout
+        self.lock = threading.Lock()
+        self.is_open = False
+        self.requests = 0
+
+    def ensure_open(self):
+        if not self.is_open:
+            if not self.transport.open():
+                raise TransportError(f"Could not open {self.transport.name} transport")
+            self.is_open = True
+
+    def reconnect(self):
+        """Drops and re-acquires the handles (device unplugged or rebooted under us)."""
+        self.transport.close()
+        self.is_open = False
+        self.ensure_open()
+
+    def _with_retry(self, action):
+        try:
+            return action()
+        except (PacingError, TransportError):
+            self.reconnect()
+            return action()
+
+    # -----------------------------------------------------------------
+    # Requests
+    # -----------------------------------------------------------------
+    def ping(self):
+        return "pong"
+
+    def status(self):
+        return {
+            "transport": self.transport.name,
+            "open": self.is_open,
+            "requests": self.requests,
+            "pacing": dict(self.pacer.stats) if hasattr(self.pacer, "stats") else None,
+        }
+
+    def runtime(self, polling_rate=None, debounce_ms=None, sensitivity=None):
+        """Applies volatile RAM settings (01H / 04H / 0EH) without touching the flash."""
+        if polling_rate is not None and polling_rate not in POLLING_CODES:
+            raise ValueError(f"Invalid polling rate {polling_rate}")
+        cmds = []
+        if polling_rate is not None:
+            cmds.append(polling_cmd(polling_rate))
+        if sensitivity is not None:
+            cmds.append(sensitivity_cmd(*sensitivity))
+        if debounce_ms is not None:
+            cmds.append(sensor_cmd(debounce_ms))
+
+        frames = [bytes.fromhex(cmd) for cmd in cmds]  # Once per request, not once per retry
+
+        def send():
+            self.ensure_open()
+            for frame in frames:
+                self.pacer.send_feature(frame)
+        self._with_retry(send)
+        return {"sent": cmds}
+
+    def apply(self, config, full=False):
+        """
+        Flashes a full configuration (only the changed sectors) under the
+        journal, then re-applies RAM settings. A flash left behind by a
+        crashed daemon is recovered first.
+        """
+        def flash():
+            self.ensure_open()
+            return apply_config(config, self.transport, self.pacer, self.cache, self.shadow,
+                                self.journal, full=full, reboot_timeout=self.reboot_timeout)
+        return self._with_retry(flash)
+
+    def raw(self, feature=None, output=None):
+        """Sends hand-crafted frames (hex) for protocol experiments."""
+        def send():
+            self.ensure_open()
+            for cmd in feature or []:
+                self.pacer.send_feature(bytes.fromhex(cmd))
+            for chunk in output or []:
+                self.pacer.send_output(bytes.fromhex(chunk))
+            return self.transport.get_feature()
+        read = self._with_retry(send)
+        return {"readback": read.hex().upper() if read else None}
+
+    OPS = ("ping", "status", "runtime", "apply", "raw")
+
+    def handle(self, request):
+        """Executes one request dict: {"op": ..., "args": {...}}."""
+        op = request.get("op")
+        if op not in self.OPS:
+            return {"ok": False, "error": f"Unknown op '{op}'"}
+        start = time.perf_counter()
+        with self.lock:
+            self.requests += 1
+            try:
+                result = getattr(self, op)(**request.get("args", {}))
+            except Exception as e:
+                return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        return {"ok": True, "result": result, "ms": (time.perf_counter() - start) * 1000}
+
+    def close(self):
+        with self.lock:
+            if self.is_open:
+                self.transport.close()
+            self.is_open = False
+
+
+# =====================================================================
+# 2. SERVER & CLIENT
+# =====================================================================
+class ArmorDaemon:
+    """Accepts client connections and serialises their requests onto one DeviceSession."""
+
+    def __init__(self, session, address=None, authkey=None, key_path=None):
+        self.session = session
+        self.address = address or default_address()
+        # No authkey given: make one and publish it in a private key file for the clients
+        self.key_path = None if authkey else key_path or default_key_path(self.address)
+        self.authkey = authkey or os.urandom(32)
+        self.listener = None
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def _running(self):
+        """True if a daemon already answers on our address."""
+        try:
+            key = read_key(self.key_path) if self.key_path else self.authkey
+        except OSError:
+            key = None
+        try:
+            Client(self.address, authkey=key).close()
+        except AuthenticationError:
+            return True  # Someone is listening, just not with the key we know
+        except (OSError, EOFError):
+            return False
+        return True
+
+    def start(self):
+        """Binds the socket/pipe and serves in a background thread."""
+        if self._running():
+            raise OSError(f"Another daemon is already listening on {self.address}")
+        if sys.platform != "win32" and os.path.exists(self.address):
+            os.unlink(self.address)  # Stale socket from a previous run
+        old = os.umask(0o077)  # Nobody else may connect, not even between bind() and chmod()
+        try:
+            self.listener = Listener(self.address, authkey=self.authkey)
+        finally:
+            os.umask(old)
+        if sys.platform != "win32":
+            os.chmod(self.address, 0o600)
+        if self.key_path:
+            _write_private(self.key_path, self.authkey)
+        self.session.ensure_open()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def serve_forever(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+            except (AuthenticationError, EOFError):
+                if self._stopping.is_set():
+                    break
+                continue  # A client without the key (or one that hung up mid-handshake)
+            except OSError:
+                break
+            if self._stopping.is_set():
+                conn.close()
+                break
+            threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+
+    def _serve_client(self, conn):
+        with conn:
+            while True:
+                try:
+                    request = json.loads(conn.recv_bytes())
+                except (EOFError, OSError):
+                    return
+                except ValueError:
+                    conn.send_bytes(json.dumps({"ok": False, "error": "Malformed request"}).encode())
+                    continue
+                if request.get("op") == "shutdown":
+                    conn.send_bytes(json.dumps({"ok": True, "result": "bye"}).encode())
+                    self.stop()
+                    return
+                conn.send_bytes(json.dumps(self.session.handle(request)).encode())
+
+    def _poke(self):
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except (AuthenticationError, EOFError, OSError):
+            pass
+
+    def stop(self):
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        if self.listener is not None:
+            # A blocked accept() does not notice close() on every platform: poke it awake. From a
+            # thread, because the poke's handshake never ends if the loop has already gone.
+            threading.Thread(target=self._poke, daemon=True).start()
+            if self._thread is not None and self._thread is not threading.current_thread():
+                self._thread.join(timeout=1.0)
+            self.listener.close()
+        if self.key_path and os.path.exists(self.key_path):
+            os.unlink(self.key_path)
+        self.session.close()
+
+
+class DaemonClient:
+    """Keeps one connection to the daemon and issues requests over it."""
+
+    def __init__(self, address=None, authkey=None, key_path=None):
+        address = address or default_address()
+        if authkey is None:
+            authkey = read_key(key_path or default_key_path(address))
+        self.conn = Client(address, authkey=authkey)
+
+    def call(self, op, **args):
+        self.conn.send_bytes(json.dumps({"op": op, "args": args}).encode())
+        reply = json.loads(self.conn.recv_bytes())
+        if not reply.get("ok"):
+            raise DaemonError(reply.get("error"))
+        return reply.get("result")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# =====================================================================
+# 3. COMMAND LINE
+# =====================================================================
+def _parse_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Armor mouse session daemon")
+    parser.add_argument("--address", default=None, help="Socket path or pipe name")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="Run the daemon in the foreground")
+    serve.add_argument("--transport", default=None, help="msdriver (default) or emulator")
+    call = sub.add_parser("call", help="Send one request to a running daemon")
+    call.add_argument("op", help="ping, status, runtime, apply, raw or shutdown")
+    call.add_argument("args", nargs="*", help="key=value (values parsed as JSON)")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        try:
+            daemon = ArmorDaemon(DeviceSession(get_transport(args.transport)), address=args.address)
+            thread = daemon.start()
+        except (TransportError, OSError) as e:
+            print(f"❌ Daemon Failed: {e}"); return 1
+        print(f"🛰️ Armor daemon listening on {daemon.address} ({daemon.session.transport.name})")
+        try:
+            thread.join()
+        except KeyboardInterrupt:
+            daemon.stop()
+        return 0
+
+    bad = [pair for pair in args.args if "=" not in pair]
+    if bad:
+        call.error(f"argument '{bad[0]}' is not key=value")
+    kwargs = dict(pair.split("=", 1) for pair in args.args)
+    try:
+        with DaemonClient(args.address) as client:
+            result = client.call(args.op, **{k: _parse_value(v) for k, v in kwargs.items()})
+    except (DaemonError, AuthenticationError, OSError) as e:
+        print(f"❌ {e}"); return 1
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""
+Armor Gaming Mouse Macro Decompiler
+
+Turns 128-byte macro slot payloads back into the (state, key, delay_ms)
+actions and repeat count compile_macro() takes. A payload decompiles only
+if recompiling the result gives back the exact same 128 bytes, so a
+decompiled macro can be flashed again without any drift.
+
+Sources, all read as streams so corpora of any size run in constant memory:
+  * scan_capture() - HID traffic: ("F"|"O", bytes) records as in
+                     HoltekEmulator.log, or "F <hex>" / "O <hex>" text lines.
+                     Output Reports after a macro slot select are reassembled.
+  * scan_blob()    - any binary file (Data/macro.bin, .pbin profiles, EEPROM
+                     dumps). Every offset is tried and only complete macros
+                     that decode strictly and round-trip are kept.
+build_library() folds the hits into a de-duplicated library in the format
+allocate_macros() and the "macros" config key use.
+"""
+
+import hashlib
+from collections import namedtuple
+
+from .hid import (
+    ACTION_SIZE, DELAY_UNIT_MS, KEY_NAMES, MACRO_HEADER, MAX_ACTIONS, RELEASE_BIT, MacroError,
+    encode_macro,
+)
+from .protocol import (
+    CMD_COMMIT, FEATURE_SIZE, MACRO_SIZE, MACRO_SLOT_COUNT, OP_DMA, OUTPUT_SIZE, macro_slot_address,
+    sector_of,
+)
+
+_COMMIT = bytes.fromhex(CMD_COMMIT)
+_SLOT_OF = {macro_slot_address(s): s for s in range(1, MACRO_SLOT_COUNT + 1)}
+
+# source: file name / "capture"; offset: byte offset in a blob, report index in a capture
+MacroHit = namedtuple("MacroHit", "source offset slot repeat actions payload")
+
+
+# =====================================================================
+# 1. DECODER
+# =====================================================================
+def decode_macro(payload):
+    """
+    Splits a compiled payload (bytes or hex) into its repeat count and
+    (state, key, delay_ms) actions. Decoding stops at the first 00 00 action.
+    """
+    if isinstance(payload, str):
+        payload = bytes.fromhex(payload)
+    repeat = (payload[0] << 8) | payload[1]
+    actions = []
+    for i in range(MACRO_HEADER, len(payload) - 1, ACTION_SIZE):
+        attr, code = payload[i], payload[i + 1]
+        if not attr and not code:
+            break
+        actions.append(("RELEASE" if attr & RELEASE_BIT else "PRESS", KEY_NAMES.get(code, code),
+                        (attr & ~RELEASE_BIT) * DELAY_UNIT_MS))
+    return repeat, actions
+
+def decompile_macro(payload, known_keys=True):
+    """
+    Strict decode: returns (actions, repeat) such that
+    encode_macro(actions, repeat) == payload, or raises MacroError.
+    With known_keys=False, key bytes without a name come back as raw ints.
+    """
+    if isinstance(payload, str):
+        payload = bytes.fromhex(payload)
+    payload = bytes(payload)
+    if len(payload) != MACRO_SIZE:
+        raise MacroError(f"Macro payload is {len(payload)} bytes, expected {MACRO_SIZE}")
+    repeat, actions = decode_macro(payload)
+    if known_keys:
+        for n, (_, key, _) in enumerate(actions):
+            if isinstance(key, int):
+                raise MacroError(f"Action {n}: key byte 0x{key:02X} has no name")
+    if len(actions) > MAX_ACTIONS:
+        raise MacroError(f"{len(actions)} actions do not fit one macro slot")
+    if encode_macro(actions, repeat) != payload:
+        end = MACRO_HEADER + ACTION_SIZE * (len(actions) + 1)
+        raise MacroError(f"Payload has data after its end marker (byte {end}); it would not round-trip")
+    return actions, repeat
+
+
+# =====================================================================
+# 2. STREAMING SCANNERS
+# =====================================================================
+def read_capture(stream):
+    """Parses "F <hex>" / "O <hex>" lines (a bare hex line is typed by its length)."""
+    for line in stream:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = line.split()
+        kind, data = (parts[0].upper(), parts[-1]) if len(parts) > 1 else (None, parts[0])
+        data = bytes.fromhex(data)
+        yield kind or ("F" if len(data) == FEATURE_SIZE else "O"), data
+
+def scan_capture(records, source="capture"):
+    """
+    Yields a MacroHit for every macro slot written in a capture. Output
+    Reports only count after a 27H select of a macro slot; a select of any
+    other sector or the commit ends the write.
+    """
+    slot = None
+    buf = bytearray()
+    start = 0
+    for n, (kind, data) in enumerate(records):
+        if kind == "F":
+            data = bytes(data[:FEATURE_SIZE])
+            if data[0] == OP_DMA:
+                slot = None if data == _COMMIT else _SLOT_OF.get(sector_of(data))
+                buf.clear()
+                start = n
+            continue
+        if slot is None:
+            continue
+        buf += bytes(data[:OUTPUT_SIZE])
+        if len(buf) == MACRO_SIZE:
+            payload = bytes(buf)
+            try:
+                actions, repeat = decompile_macro(payload, known_keys=False)
+            except MacroError:
+                pass
+            else:
+                yield MacroHit(source, start, slot, repeat, actions, payload)
+            slot = None
+            buf.clear()
+
+# Key byte -> 1 if it has a name (NONE excluded), as a table for the raw scan
+_NAMED = bytes(1 if code and code in KEY_NAMES else 0 for code in range(256))
+
+def _candidate(buf, i):
+    """
+    Early-exit check of the payload at buf[i]: named keys, no PRESS NONE, no
+    release of a key that is not held, every key released by the end and
+    zero padding after the end marker. Random data fails within a few bytes.
+    """
+    held = set()
+    pressed = False
+    end = i + MACRO_SIZE
+    j = i + MACRO_HEADER
+    while j < end:
+        attr, code = buf[j], buf[j + 1]
+        if not attr and not code:
+            break
+        if attr & RELEASE_BIT:
+            if code:
+                if code not in held:
+                    return False
+                held.discard(code)
+        elif _NAMED[code]:
+            held.add(code)
+            pressed = True
+        else:
+            return False
+        j += ACTION_SIZE
+    if held or not pressed:
+        return False
+    return not any(buf[j:end])
+
+def scan_blob(stream, source="blob", chunk_size=1 << 16):
+    """
+    Yields a MacroHit for every offset of a binary stream that holds a
+    strictly valid 128-byte payload of a complete macro (at least one key,
+    every key released). Reads chunk_size bytes at a time and keeps a
+    127-byte overlap, so macros across chunks are found.
+    """
+    window = b""
+    base = 0  # Stream offset of window[0]
+    while True:
+        chunk = stream.read(chunk_size)
+        if chunk:
+            window += chunk
+        last = len(window) - MACRO_SIZE
+        i = 0
+        while i <= last:
+            if _candidate(window, i):
+                payload = window[i:i + MACRO_SIZE]
+                actions, repeat = decompile_macro(payload)
+                yield MacroHit(source, base + i, None, repeat, actions, payload)
+                i += MACRO_SIZE
+                continue
+            i += 1
+        if not chunk:
+            return
+        base += i
+        window = window[i:]
+
+def scan_files(paths, chunk_size=1 << 16):
+    """scan_capture() for .txt/.log captures, scan_blob() for everything else."""
+    for path in paths:
+        if path.lower().endswith((".txt", ".log", ".cap")):
+            with open(path, "r", encoding="utf-8") as f:
+                yield from scan_capture(read_capture(f), path)
+        else:
+            with open(path, "rb") as f:
+                yield from scan_blob(f, path, chunk_size)
+
+
+# =====================================================================
+# 3. LIBRARY
+# =====================================================================
+def build_library(hits, prefix="MACRO"):
+    """
+    {name: {"actions", "repeat"}} from MacroHits, one entry per distinct
+    payload. Names are the payload digest, so rescanning a corpus gives the
+    same names and merging libraries never duplicates a macro.
+    """
+    library = {}
+    for hit in hits:
+        name = f"{prefix}_{hashlib.sha1(hit.payload).hexdigest()[:8].upper()}"
+        if name not in library:
+            library[name] = {"actions": [list(a) for a in hit.actions], "repeat": hit.repeat}
+    return library
@@ -0,0 +1,211 @@
+"""
+Armor Gaming Mouse Emulator
+MCU: Holtek HT68FB571 (Pure-Python behavioural model)
+
+Models the command set used by the flashing scripts so the full DMA pipeline
+can be exercised, profiled and benchmarked without the mouse or Windows:
+08H stop, the handshake/unlock pair, 272x DMA sector writes, the commit
+soft-reboot and the 01H/0EH/04H runtime commands.
+
+The GetFeature read-back (echo of the last accepted report, zeros while
+busy) is an assumption made to exercise AdaptivePacer's ack mode: it was
+not captured from the real MCU, whose read-back is still unverified.
+"""
+
+import time
+import uuid
+
+from .protocol import (
+    CMD_COMMIT, CMD_HANDSHAKE, CMD_UNLOCK, FEATURE_SIZE, OP_DMA, OP_POLLING,
+    OP_SENSITIVITY, OP_SENSOR, OP_STOP_MACRO, OUTPUT_SIZE, POLLING_CODES,
+    PREP_SEQUENCES, checksum_ok, sector_of,
+)
+
+_COMMIT = bytes.fromhex(CMD_COMMIT)
+_HANDSHAKE = bytes.fromhex(CMD_HANDSHAKE)
+_UNLOCK = bytes.fromhex(CMD_UNLOCK)
+_PREP_FRAMES = {bytes.fromhex(c) for seq in PREP_SEQUENCES.values() for c in seq}
+_RATES = {code: hz for hz, code in POLLING_CODES.items()}
+
+
+class HoltekEmulator:
+    """
+    In-process HT68FB571. Timings are optional so the model can run flat out
+    (all zero) or mimic a real MCU that drops reports while it is busy.
+    """
+
+    def __init__(self, command_time=0.0, write_time=0.0, reboot_time=0.0, clock=time.perf_counter, serial=None):
+        self.serial = serial or uuid.uuid4().hex[:8]  # Tells emulated mice apart (journals, shadows)
+        self.command_time = command_time  # MCU busy time after a Feature Report
+        self.write_time = write_time      # MCU busy time after a 32-byte sector write
+        self.reboot_time = reboot_time    # Time off the bus after commit
+        self.clock = clock
+
+        # Sealed EEPROM contents, keyed by DMA sector address
+        self.eeprom = {}
+        self.eeprom_prep = ()
+
+        # Active RAM parameters (lost on reboot)
+        self.polling_rate = None
+        self.sensitivity = (0x64, 0x64)
+        self.lift = 0x01
+        self.debounce_ms = None
+
+        self.errors = []    # Protocol violations (rejected frames)
+        self.log = []       # Every delivered report: ("F"|"O", bytes)
+        self.dropped = 0    # Reports that arrived while the MCU was busy
+        self.reboots = 0
+        self._reset_ram()
+        self._busy_until = 0.0
+        self._offline_until = 0.0
+
+    # -----------------------------------------------------------------
+    # Bus state
+    # -----------------------------------------------------------------
+    def _reset_ram(self):
+        """Power-on state: locked, macro engine armed, sensor asleep."""
+        self.macro_running = True
+        self.handshake = False
+        self.unlocked = False
+        self.awake = False
+        self.selected = None
+        self.staging = {}
+        self.staged_prep = []
+        self._commit_armed = False
+        self._last_ack = bytes(FEATURE_SIZE)
+
+    def present(self):
+        """True while the MCU is enumerated on the USB bus."""
+        return self.clock() >= self._offline_until
+
+    def ready(self):
+        """True when the MCU will accept the next report."""
+        now = self.clock()
+        return now >= self._offline_until and now >= self._busy_until
+
+    def _accept(self, busy):
+        if not self.present():
+            return False
+        if not self.ready():
+            self.dropped += 1
+            return False
+        self._busy_until = self.clock() + busy
+        return True
+
+    def _reject(self, frame, reason):
+        self.errors.append((bytes(frame).hex().upper(), reason))
+        self._last_ack = bytes(FEATURE_SIZE)
+
+    # -----------------------------------------------------------------
+    # Host -> Device
+    # -----------------------------------------------------------------
+    def feature(self, data):
+        """Handles an 8-byte SetFeature. Returns False if the report was not taken."""
+        frame = bytes(data[:FEATURE_SIZE]).ljust(FEATURE_SIZE, b"\x00")
+        if not self._accept(self.command_time):
+            return False
+        self.log.append(("F", frame))
+        self._last_ack = frame
+        op = frame[0]
+
+        if frame == _HANDSHAKE:
+            self.handshake = True
+        elif frame == _UNLOCK:
+            if not self.handshake:
+                self._reject(frame, "unlock before handshake")
+            else:
+                self.unlocked = True
+        elif op == OP_DMA:
+            self._dma(frame)
+        elif op in (OP_POLLING, OP_SENSOR, OP_STOP_MACRO, OP_SENSITIVITY):
+            self._runtime(frame)
+        return True
+
+    def _dma(self, frame):
+        if not self.unlocked:
+            self._reject(frame, "DMA while locked")
+            return
+        if frame == _COMMIT:
+            self._commit_armed = True
+            self.selected = None
+            return
+        if frame in _PREP_FRAMES:
+            self.staged_prep.append(frame.hex().upper())
+            self.selected = None
+            return
+        # Selecting a sector restarts its write pointer
+        self.selected = sector_of(frame)
+        self.staging[self.selected] = bytearray()
+
+    def _runtime(self, frame):
+        if not checksum_ok(frame):
+            self._reject(frame, "bad checksum")
+            return
+        op = frame[0]
+        if op == OP_STOP_MACRO:
+            self.macro_running = False
+        elif op == OP_POLLING:
+            if frame[1] not in _RATES:
+                self._reject(frame, "unknown polling code")
+                return
+            self.polling_rate = _RATES[frame[1]]
+            self.awake = True
+        elif op == OP_SENSITIVITY:
+            self.sensitivity = (frame[1], frame[2])
+        elif op == OP_SENSOR:
+            self.lift, self.debounce_ms = frame[1], frame[2]
+
+    def output(self, data):
+        """Handles a 32-byte WriteUSB. Returns False if the report was not taken."""
+        payload = bytes(data[:OUTPUT_SIZE]).ljust(OUTPUT_SIZE, b"\x00")
+        if not self._accept(self.write_time):
+            return False
+        self.log.append(("O", payload))
+        self._last_ack = payload[:FEATURE_SIZE]
+        if self._commit_armed:
+            # The flush report seals the flash and kicks off the soft-reboot
+            self._seal()
+        elif self.selected is not None:
+            self.staging[self.selected] += payload
+        else:
+            self.errors.append((payload.hex().upper(), "data without sector select"))
+        return True
+
+    def _seal(self):
+        for addr, buf in self.staging.items():
+            self.eeprom[addr] = bytes(buf)
+        if self.staged_prep:
+            self.eeprom_prep = tuple(self.staged_prep)
+        self.reboot()
+
+    def reboot(self):
+        """Soft-reboot: drop off the bus, lose RAM and any unsealed sector writes."""
+        self.reboots += 1
+        self._reset_ram()
+        self.polling_rate = None
+        self.debounce_ms = None
+        self._offline_until = self.clock() + self.reboot_time
+        self._busy_until = self._offline_until
+
+    # -----------------------------------------------------------------
+    # Device -> Host
+    # -----------------------------------------------------------------
+    def read_feature(self):
+        """GetFeature read-back: echoes the last accepted frame, zeros while busy (assumed, see above)."""
+        if not self.ready():
+            return bytes(FEATURE_SIZE)
+        return self._last_ack
+
+    # -----------------------------------------------------------------
+    # Inspection helpers
+    # -----------------------------------------------------------------
+    def flash_polling_rate(self):
+        """Polling rate implied by the sealed prep matrix, or None."""
+        for hz, seq in PREP_SEQUENCES.items():
+            if tuple(seq) == self.eeprom_prep:
+                return hz
+        return None
+
+    def sector(self, addr):
+        """Sealed contents of a DMA sector (b'' if never written)."""
+        return self.eeprom.get(addr, b"")
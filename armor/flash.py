@@ -0,0 +1,121 @@
+"""
+Armor Gaming Mouse Differential Flashing
+
+Keeps a persisted shadow image of every DMA sector we have committed to the
+mouse, and plans only the sector writes whose content actually changed.
+A small edit (one DPI stage) then costs one sector write plus the commit
+instead of the full colours/DPI/buttons/macro/polling sequence, saving both
+USB time and EEPROM wear.
+"""
+
+import json
+import os
+from collections import namedtuple
+
+from .protocol import (
+    CMD_COMMIT, CMD_HANDSHAKE, CMD_UNLOCK, FLUSH_DATA, MACRO_SLOT_COUNT, PID,
+    PREP_SEQUENCES, SECTOR_CMDS, VID, buttons_payload, color_payload, dpi_payload,
+    macro_chunks, macro_slot_cmd, stop_macro_cmd,
+)
+
+# One step of the DMA sequence: the Feature Reports to send, then the Output Reports.
+SectorWrite = namedtuple("SectorWrite", "name cmds chunks")
+
+# Sector write order used by the execution sequence (polling matrix first, macros last).
+SECTOR_ORDER = ["PREP", "COLORS", "COLORS_MIRROR", "DPI", "BUTTONS_1", "BUTTONS_2"] + [
+    f"MACRO_{slot}" for slot in range(1, MACRO_SLOT_COUNT + 1)]
+
+DEFAULT_SHADOW = "armor_shadow.json"
+
+
+def sector_writes(polling_rate, dpi_stages, dpi_colors, buttons_1, buttons_2, macro):
+    """
+    Builds the full set of sector writes for a configuration, keyed by sector name.
+    `macro` is one 128-byte payload (hex) for slot 1, or {slot: payload}.
+    """
+    colors = color_payload(dpi_colors)
+    macros = macro if isinstance(macro, dict) else {1: macro}
+    writes = {
+        "PREP": SectorWrite("PREP", tuple(PREP_SEQUENCES[polling_rate]), ()),
+        "COLORS": SectorWrite("COLORS", (SECTOR_CMDS["COLORS"],), (colors,)),
+        "COLORS_MIRROR": SectorWrite("COLORS_MIRROR", (SECTOR_CMDS["COLORS_MIRROR"],), (colors,)),
+        "DPI": SectorWrite("DPI", (SECTOR_CMDS["DPI"],), (dpi_payload(dpi_stages),)),
+        "BUTTONS_1": SectorWrite("BUTTONS_1", (SECTOR_CMDS["BUTTONS_1"],), (buttons_payload(buttons_1),)),
+        "BUTTONS_2": SectorWrite("BUTTONS_2", (SECTOR_CMDS["BUTTONS_2"],), (buttons_payload(buttons_2),)),
+    }
+    for slot, payload in macros.items():
+        name = f"MACRO_{slot}"
+        writes[name] = SectorWrite(name, (macro_slot_cmd(slot),), tuple(macro_chunks(payload)))
+    return writes
+
+def unlock_write():
+    """08H stop, handshake and secrecy unlock that must precede any sector write."""
+    return SectorWrite("UNLOCK", (stop_macro_cmd(), CMD_HANDSHAKE, CMD_UNLOCK), ())
+
+def commit_write():
+    """Seals the flash memory and soft-reboots the MCU."""
+    return SectorWrite("COMMIT", (CMD_COMMIT,), (FLUSH_DATA,))
+
+
+class ShadowImage:
+    """Last committed content of every sector, persisted to a JSON file per device."""
+
+    def __init__(self, path=DEFAULT_SHADOW, device=f"{VID:04X}:{PID:04X}"):
+        self.path = path
+        self.device = device
+        self.sectors = {}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # A corrupt shadow only costs us one full flash
+            return
+        self.sectors = data.get(self.device, {})
+
+    def matches(self, write):
+        return self.sectors.get(write.name) == {"cmds": list(write.cmds), "chunks": list(write.chunks)}
+
+    def record(self, writes):
+        """Stores committed sectors. Call only after the commit went through."""
+        for w in writes:
+            if w.name in SECTOR_ORDER:
+                self.sectors[w.name] = {"cmds": list(w.cmds), "chunks": list(w.chunks)}
+        self.save()
+
+    def forget(self):
+        """Device state unknown (e.g. factory reset): the next plan rewrites everything."""
+        self.sectors = {}
+        self.save()
+
+    def save(self):
+        data = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+        data[self.device] = self.sectors
+        # Write-then-rename so a crash never leaves a half-written shadow behind
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+def plan_flash(writes, shadow=None, full=False):
+    """
+    Diffs the desired sector writes against the shadow image.
+    Returns the ordered DMA sequence (unlock, changed sectors, commit),
+    or an empty list when the flash memory is already up to date.
+    """
+    changed = [writes[name] for name in SECTOR_ORDER
+               if name in writes and (full or shadow is None or not shadow.matches(writes[name]))]
+    if not changed:
+        return []
+    return [unlock_write()] + changed + [commit_write()]
@@ -0,0 +1,239 @@
+"""
+Armor Gaming Mouse Fleet Flasher
+
+Provisions a bench of identical mice concurrently: the configuration is
+compiled once into a FlashPlan, every matching device is enumerated, and
+one worker per device runs the journaled flash with its own transport,
+pacer and journal. Progress from every worker is funnelled back through a
+single queue so the caller sees one ordered event stream.
+
+Workers are threads for the emulator (each owns an independent in-process
+HoltekEmulator) and processes for MSDriver.dll, whose Set_VIDPID and open
+handles are global to the process that loaded it.
+
+    python -m armor fleet profile.json --transport emulator --devices 8
+    python -m armor fleet profile.json --transport emulator --scale 1,2,4,8
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import Manager
+
+from .journal import FlashJournal, flash, resume
+from .pacing import AdaptivePacer, PacingError
+from .plan import FlashPlan, compile_plan
+from .protocol import macro_slot_limit
+from .transport import TransportError, get_transport
+
+# Worker journals live next to the plan cache, one file per device key.
+FLEET_DIR = os.path.join(".armor_cache", "fleet")
+
+# How the emulated bench behaves when none is specified (seconds, like a real MCU).
+EMULATED_TIMING = {"command_time": 0.001, "write_time": 0.002, "reboot_time": 0.05}
+
+# One flashable device: a stable key plus what get_transport() needs to reach it.
+DeviceSpec = namedtuple("DeviceSpec", "key transport kwargs")
+
+
+# =====================================================================
+# 1. ENUMERATION
+# =====================================================================
+def enumerate_devices(transport=None, count=None, **kwargs):
+    """
+    Lists the devices a fleet run will flash.
+
+    Emulator: `count` independent emulated mice (default $ARMOR_FLEET_SIZE or 1),
+    with stable serials so a re-run finds each bench slot's journal again.
+    MSDriver: the DLL binds to the first interface matching Set_VIDPID and has
+    no per-device selector, so a host reaches at most one mouse through it; the
+    device is listed only if its handles open.
+    """
+    name = (transport or os.environ.get("ARMOR_TRANSPORT") or "msdriver").lower()
+    if name == "emulator":
+        count = count if count is not None else int(os.environ.get("ARMOR_FLEET_SIZE", "1"))
+        device_kwargs = dict(EMULATED_TIMING, **kwargs)
+        return [DeviceSpec(f"emulator:bench{i}", name, dict(device_kwargs, serial=f"bench{i}"))
+                for i in range(count)]
+
+    probe = get_transport(name, **kwargs)
+    try:
+        found = probe.open()
+    except TransportError:
+        found = False
+    finally:
+        probe.close()
+    return [DeviceSpec(probe.device_id, name, dict(kwargs))] if found else []
+
+
+# =====================================================================
+# 2. WORKER
+# =====================================================================
+def _journal_path(key):
+    return os.path.join(FLEET_DIR, key.replace(":", "_") + ".jsonl")
+
+def flash_device(spec, plan_json, events=None, reboot_timeout=3.0, max_delay=0.01):
+    """
+    Flashes one device end to end (resume, full plan, runtime) and returns a
+    result dict. Runs inside a worker thread or process; progress events
+    (key, step name, steps done, steps total) are put on `events`.
+    """
+    start = time.perf_counter()
+    plan = FlashPlan.from_json(plan_json)
+    steps = list(plan.steps)  # Bench mice are in an unknown state: always a full flash
+    total = len(steps) + 1
+    done = [0]
+
+    def on_step(step):
+        if events is not None:
+            events.put((spec.key, step.name, done[0], total))
+        done[0] += 1
+
+    result = {"device": spec.key, "ok": False, "error": None, "recovered": None,
+              "sectors": [s.name for s in steps[1:-1]], "reports": 0, "seconds": 0.0}
+    transport = get_transport(spec.transport, **spec.kwargs)
+    try:
+        if not transport.open():
+            raise TransportError("device not found")
+        pacer = AdaptivePacer(transport, max_delay=max_delay)
+        journal = FlashJournal(_journal_path(spec.key))
+        # The journal file belongs to the bench slot; its device tag to whichever mouse sat there
+        result["recovered"], _ = resume(pacer, transport, journal, None, reboot_timeout)
+        flash(steps, plan.runtime, pacer, transport, journal, None, reboot_timeout, on_step=on_step)
+        result["ok"] = True
+        result["reports"] = pacer.stats["reports"]
+    except (PacingError, TransportError) as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        transport.close()
+        result["seconds"] = time.perf_counter() - start
+        if events is not None:
+            events.put((spec.key, "DONE" if result["ok"] else "FAILED", done[0], total))
+    return result
+
+
+# =====================================================================
+# 3. FLEET
+# =====================================================================
+def flash_fleet(config, devices, workers=None, mode=None, on_progress=None,
+                reboot_timeout=3.0, max_delay=0.01):
+    """
+    Flashes `config` onto every DeviceSpec concurrently. `mode` is "thread" or
+    "process" (default: threads for the emulator, processes otherwise).
+    `on_progress(key, step, done, total)` is called from the calling thread.
+    Returns the per-device result dicts in device order.
+    """
+    if not devices:
+        return []
+    # Derived macro slots only when every target takes them
+    slot_count = min(macro_slot_limit(d.transport) for d in devices)
+    plan_json = compile_plan(config, slot_count=slot_count).to_json()
+    if mode is None:
+        mode = "thread" if all(d.transport == "emulator" for d in devices) else "process"
+    workers = workers or len(devices)
+
+    manager = None
+    if mode == "process":
+        manager = Manager()
+        events = manager.Queue()
+        pool = ProcessPoolExecutor(max_workers=workers)
+    else:
+        events = queue.Queue()
+        pool = ThreadPoolExecutor(max_workers=workers)
+
+    try:
+        with pool:
+            futures = [pool.submit(flash_device, d, plan_json, events, reboot_timeout, max_delay)
+                       for d in devices]
+            _drain(events, futures, on_progress)
+            results = [f.result() for f in futures]
+        _drain(events, [], on_progress)
+    finally:
+        if manager is not None:
+            manager.shutdown()
+    return results
+
+def _drain(events, futures, on_progress):
+    """Relays worker progress until every future has finished."""
+    while True:
+        try:
+            event = events.get(timeout=0.01)
+        except queue.Empty:
+            if all(f.done() for f in futures):
+                return
+            continue
+        if on_progress:
+            on_progress(*event)
+
+
+def scaling(config, counts, transport="emulator", **kwargs):
+    """
+    Wall time to flash 1..N devices. Returns [(n, seconds, speedup)], where
+    speedup is n * t(1) / t(n), t(1) taken from the first run: close to n means the fleet scales linearly.
+    """
+    rows = []
+    base = None
+    for n in counts:
+        devices = enumerate_devices(transport, count=n)
+        start = time.perf_counter()
+        results = flash_fleet(config, devices, **kwargs)
+        elapsed = time.perf_counter() - start
+        if not all(r["ok"] for r in results):
+            raise TransportError(f"Fleet of {n} failed: {[r['error'] for r in results if not r['ok']]}")
+        base = base if base is not None else elapsed / n  # Seconds per device of the first run
+        rows.append((n, elapsed, n * base / elapsed))
+    return rows
+
+
+# =====================================================================
+# 4. COMMAND LINE
+# =====================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Flash one configuration onto every attached Armor mouse")
+    parser.add_argument("config", help="JSON configuration (the CONFIG dict from macro.py)")
+    parser.add_argument("--transport", default=None, help="msdriver (default) or emulator")
+    parser.add_argument("--devices", type=int, default=None, help="Number of emulated devices")
+    parser.add_argument("--mode", choices=("thread", "process"), default=None)
+    parser.add_argument("--scale", default=None, help="Comma-separated fleet sizes to benchmark")
+    args = parser.parse_args(argv)
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    if args.scale:
+        counts = [int(n) for n in args.scale.split(",")]
+        try:
+            rows = scaling(config, counts, args.transport or "emulator", mode=args.mode)
+        except TransportError as e:
+            print(f"❌ {e}"); return 1
+        print(f"{'devices':>8} {'seconds':>8} {'speedup':>8}")
+        for n, elapsed, speedup in rows:
+            print(f"{n:>8} {elapsed:>8.3f} {speedup:>7.2f}x")
+        return 0
+
+    devices = enumerate_devices(args.transport, count=args.devices)
+    if not devices:
+        print("❌ No matching devices found."); return 1
+    print(f"🔌 Flashing {len(devices)} device(s)...\n")
+
+    def progress(key, step, done, total):
+        print(f"  [{key}] {step:<14} {done}/{total}")
+
+    results = flash_fleet(config, devices, mode=args.mode, on_progress=progress)
+    print()
+    for r in results:
+        if r["ok"]:
+            note = f" (recovered: {r['recovered']})" if r["recovered"] else ""
+            print(f"✅ {r['device']}: {len(r['sectors'])} sectors, {r['reports']} reports, {r['seconds']:.2f}s{note}")
+        else:
+            print(f"❌ {r['device']}: {r['error']}")
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
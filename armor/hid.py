@@ -0,0 +1,190 @@
+"""
+Armor Gaming Mouse HID Usage Tables & Macro Encoder
+
+Key names for macro actions, and a batch encoder that packs many macros
+into one contiguous buffer of 128-byte hardware payloads.
+
+A macro action is 2 bytes on the MCU:
+  * Attribute byte - bit 7 set = release, bits 0-6 = delay before the next
+                     action in 10ms steps (0-127, i.e. up to 1.27s).
+  * Key byte       - a Keyboard/Keypad page (0x07) usage, or one of the
+                     mouse button codes the firmware reserves at F0-F4.
+The payload starts with a 2-byte big-endian repeat count, so one slot
+holds at most 63 actions.
+"""
+
+from .protocol import MACRO_SIZE
+
+MACRO_HEADER = 2
+ACTION_SIZE = 2
+MAX_ACTIONS = (MACRO_SIZE - MACRO_HEADER) // ACTION_SIZE
+MAX_DELAY_STEPS = 0x7F
+DELAY_UNIT_MS = 10
+RELEASE_BIT = 0x80
+
+
+class MacroError(ValueError):
+    """Raised when a macro cannot be encoded (unknown key, too many actions...)."""
+
+
+# =====================================================================
+# 1. KEYBOARD / KEYPAD PAGE (0x07)
+# =====================================================================
+KEYBOARD = {"NONE": 0x00}  # Reserved usage: no event (used for pure-delay steps)
+KEYBOARD.update({chr(ord("A") + i): 0x04 + i for i in range(26)})
+KEYBOARD.update({str((i + 1) % 10): 0x1E + i for i in range(10)})
+KEYBOARD.update({f"F{i + 1}": 0x3A + i for i in range(12)})
+KEYBOARD.update({f"F{i + 13}": 0x68 + i for i in range(12)})
+KEYBOARD.update({
+    "ENTER": 0x28, "ESC": 0x29, "BACKSPACE": 0x2A, "TAB": 0x2B, "SPACE": 0x2C,
+    "MINUS": 0x2D, "EQUAL": 0x2E, "LEFTBRACE": 0x2F, "RIGHTBRACE": 0x30,
+    "BACKSLASH": 0x31, "HASHTILDE": 0x32, "SEMICOLON": 0x33, "APOSTROPHE": 0x34,
+    "GRAVE": 0x35, "COMMA": 0x36, "DOT": 0x37, "SLASH": 0x38, "CAPSLOCK": 0x39,
+    "PRINTSCREEN": 0x46, "SCROLLLOCK": 0x47, "PAUSE": 0x48, "INSERT": 0x49,
+    "HOME": 0x4A, "PAGEUP": 0x4B, "DELETE": 0x4C, "END": 0x4D, "PAGEDOWN": 0x4E,
+    "RIGHT": 0x4F, "LEFT": 0x50, "DOWN": 0x51, "UP": 0x52, "NUMLOCK": 0x53,
+    "KP_SLASH": 0x54, "KP_ASTERISK": 0x55, "KP_MINUS": 0x56, "KP_PLUS": 0x57,
+    "KP_ENTER": 0x58, "KP_DOT": 0x63, "102ND": 0x64, "COMPOSE": 0x65,
+    "POWER": 0x66, "KP_EQUAL": 0x67,
+    "OPEN": 0x74, "HELP": 0x75, "PROPS": 0x76, "FRONT": 0x77, "STOP": 0x78,
+    "AGAIN": 0x79, "UNDO": 0x7A, "CUT": 0x7B, "COPY": 0x7C, "PASTE": 0x7D,
+    "FIND": 0x7E, "MUTE": 0x7F, "VOLUMEUP": 0x80, "VOLUMEDOWN": 0x81,
+    "KP_COMMA": 0x85, "RO": 0x87, "KATAKANAHIRAGANA": 0x88, "YEN": 0x89,
+    "HENKAN": 0x8A, "MUHENKAN": 0x8B, "HANGEUL": 0x90, "HANJA": 0x91,
+    # Modifiers
+    "LCTRL": 0xE0, "LSHIFT": 0xE1, "LALT": 0xE2, "LGUI": 0xE3,
+    "RCTRL": 0xE4, "RSHIFT": 0xE5, "RALT": 0xE6, "RGUI": 0xE7,
+})
+KEYBOARD.update({f"KP_{(i + 1) % 10}": 0x59 + i for i in range(10)})
+
+# =====================================================================
+# 2. MOUSE BUTTONS (firmware codes, same as the button-mapping sectors)
+# =====================================================================
+MOUSE = {"LCLICK": 0xF0, "RCLICK": 0xF1, "MCLICK": 0xF2, "BACK": 0xF3, "FORWARD": 0xF4}
+
+# =====================================================================
+# 3. CONSUMER PAGE (0x0C)
+# =====================================================================
+# 16-bit usages. The 1-byte macro key field cannot carry them (0xE2 Mute would
+# read back as LALT), so macros reject these names with an explicit error.
+CONSUMER = {
+    "CC_POWER": 0x0030, "CC_SLEEP": 0x0032, "CC_MENU": 0x0040,
+    "CC_PLAY": 0x00B0, "CC_PAUSE": 0x00B1, "CC_RECORD": 0x00B2,
+    "CC_FASTFORWARD": 0x00B3, "CC_REWIND": 0x00B4, "CC_NEXTSONG": 0x00B5,
+    "CC_PREVIOUSSONG": 0x00B6, "CC_STOP": 0x00B7, "CC_EJECT": 0x00B8,
+    "CC_PLAYPAUSE": 0x00CD, "CC_MUTE": 0x00E2, "CC_BASSBOOST": 0x00E5,
+    "CC_VOLUMEUP": 0x00E9, "CC_VOLUMEDOWN": 0x00EA,
+    "CC_MEDIA": 0x0183, "CC_MAIL": 0x018A, "CC_CALCULATOR": 0x0192,
+    "CC_COMPUTER": 0x0194, "CC_SEARCH": 0x0221, "CC_HOMEPAGE": 0x0223,
+    "CC_BACK": 0x0224, "CC_FORWARD": 0x0225, "CC_WWW_STOP": 0x0226,
+    "CC_REFRESH": 0x0227, "CC_BOOKMARKS": 0x022A,
+}
+
+# Friendly spellings accepted in macro definitions
+ALIASES = {
+    "RETURN": "ENTER", "ESCAPE": "ESC", "BKSP": "BACKSPACE", "DEL": "DELETE",
+    "INS": "INSERT", "PGUP": "PAGEUP", "PGDN": "PAGEDOWN", "CAPS": "CAPSLOCK",
+    "PRTSC": "PRINTSCREEN", "MENU": "COMPOSE", "APP": "COMPOSE",
+    "CTRL": "LCTRL", "SHIFT": "LSHIFT", "ALT": "LALT", "ALTGR": "RALT",
+    "WIN": "LGUI", "GUI": "LGUI", "META": "LGUI", "CMD": "LGUI",
+    "LWIN": "LGUI", "RWIN": "RGUI",
+    "LEFTCLICK": "LCLICK", "RIGHTCLICK": "RCLICK", "MIDDLECLICK": "MCLICK",
+    "MOUSE4": "BACK", "MOUSE5": "FORWARD",
+    "-": "MINUS", "=": "EQUAL", "[": "LEFTBRACE", "]": "RIGHTBRACE",
+    "\\": "BACKSLASH", ";": "SEMICOLON", "'": "APOSTROPHE", "`": "GRAVE",
+    ",": "COMMA", ".": "DOT", "/": "SLASH", " ": "SPACE",
+}
+
+# Every name a macro action may use -> its 1-byte key code
+KEY_CODES = dict(KEYBOARD)
+KEY_CODES.update(MOUSE)
+KEY_CODES.update({alias: KEY_CODES[name] for alias, name in ALIASES.items()})
+
+# Key code -> canonical name
+KEY_NAMES = {}
+for _name, _code in list(KEYBOARD.items()) + list(MOUSE.items()):
+    KEY_NAMES.setdefault(_code, _name)
+
+
+def key_code(key):
+    """Resolves a key name (case-insensitive) or a raw 0-255 code to its macro key byte."""
+    if isinstance(key, int):
+        if not 0 <= key <= 0xFF:
+            raise MacroError(f"Key code {key} does not fit the 1-byte macro key field")
+        return key
+    name = key.upper()
+    code = KEY_CODES.get(name)
+    if code is not None:
+        return code
+    if name in CONSUMER:
+        raise MacroError(f"Consumer usage '{key}' (0x{CONSUMER[name]:04X}) cannot be sent from a hardware macro")
+    raise MacroError(f"Unknown key '{key}'")
+
+
+# =====================================================================
+# 4. PACKED ENCODER
+# =====================================================================
+_ZERO_SLOT = bytes(MACRO_SIZE)
+
+# (state, key, delay_ms) -> its 2 encoded bytes. Generated variants reuse a small
+# vocabulary of actions, so after warm-up encoding is one dict lookup per action.
+_ACTION_CACHE = {}
+_ACTION_CACHE_LIMIT = 65536
+
+def encode_action(state, key, delay_ms):
+    """The 2-byte attribute + key encoding of one action."""
+    release = str(state).upper() == "RELEASE"
+    if not release and str(state).upper() != "PRESS":
+        raise MacroError(f"state must be PRESS or RELEASE, not '{state}'")
+    steps = min(MAX_DELAY_STEPS, max(0, int(delay_ms) // DELAY_UNIT_MS))
+    return bytes((steps | (RELEASE_BIT if release else 0), key_code(key)))
+
+def _encode_body(actions, repeat):
+    if len(actions) > MAX_ACTIONS:
+        raise MacroError(f"{len(actions)} actions do not fit one macro slot (max {MAX_ACTIONS}); "
+                         "try the size optimiser (\"optimise\": true)")
+    if not 0 <= repeat <= 0xFFFF:
+        raise MacroError(f"Repeat count {repeat} does not fit 2 bytes")
+    parts = [repeat.to_bytes(MACRO_HEADER, "big")]
+    cache = _ACTION_CACHE
+    for n, action in enumerate(actions):
+        action = tuple(action)
+        encoded = cache.get(action)
+        if encoded is None:
+            try:
+                encoded = encode_action(*action)
+            except MacroError as e:
+                raise MacroError(f"Action {n}: {e}") from None
+            if len(cache) >= _ACTION_CACHE_LIMIT:
+                cache.clear()
+            cache[action] = encoded
+        parts.append(encoded)
+    return b"".join(parts)
+
+def encode_macro(actions, repeat=1):
+    """One macro as its exact 128-byte hardware payload (bytes)."""
+    body = _encode_body(actions, repeat)
+    return body + _ZERO_SLOT[len(body):]
+
+def encode_macros(macros):
+    """
+    Encodes many macros at once into one packed, zero-padded buffer of
+    len(macros) * 128 bytes; macro i lives at [i * 128:(i + 1) * 128].
+    `macros` yields (actions, repeat) pairs. Wrap the result with
+    numpy.frombuffer(buf, numpy.uint8).reshape(-1, 128) for a 2-D view.
+    """
+    macros = list(macros)
+    out = bytearray(MACRO_SIZE * len(macros))
+    for n, (actions, repeat) in enumerate(macros):
+        try:
+            body = _encode_body(actions, repeat)
+        except MacroError as e:
+            raise MacroError(f"Macro {n}: {e}") from None
+        offset = n * MACRO_SIZE
+        out[offset:offset + len(body)] = body
+    return bytes(out)
+
+def iter_slots(buf):
+    """Zero-copy 128-byte views over a buffer produced by encode_macros()."""
+    view = memoryview(buf)
+    return (view[i:i + MACRO_SIZE] for i in range(0, len(view), MACRO_SIZE))
@@ -0,0 +1,288 @@
+"""
+Armor Gaming Mouse Data.ini Model
+
+The vendor app keeps the device identity and its button cache in Data.ini:
+
+  [Default]  VID, PID, DPI, Sensor (3327), Password (FC1522), the lift-off
+             distance table (Distance, Distance_Min/Max/Value) and the
+             firmware version (Ver_H.Ver_L)
+  [BUTTON]   32 entries "MODE,B1,B2,B3,ENABLED": buttons 1-16 of profile 1,
+             then buttons 1-16 of profile 2
+
+load() parses it into a typed DeviceIni once and caches it per path; the
+file is only read again when its size or mtime moves, and only re-parsed
+when its content hash actually changed. IniWatcher polls the same
+signature and tells subscribers which keys changed, so a daemon or GUI
+can react to an edit (e.g. re-flash one button block) without re-reading
+or re-flashing everything.
+"""
+
+import configparser
+import hashlib
+import os
+import threading
+from collections import namedtuple
+
+DEFAULT_INI = "Data.ini"
+
+BUTTONS_PER_PROFILE = 16
+INI_PROFILES = 2
+
+# mapping: 4-byte hex as the button sectors take it; enabled: the fifth field
+ButtonEntry = namedtuple("ButtonEntry", "mapping enabled")
+
+# buttons: one tuple of 16 ButtonEntry per profile; extra: {"Section/Key": raw value} not modelled
+DeviceIni = namedtuple("DeviceIni", (
+    "vid pid dpi sensor password distance distance_min distance_max distance_values "
+    "version buttons extra"))
+
+
+class IniError(ValueError):
+    """Raised when Data.ini is missing a key or holds a malformed value."""
+
+
+# =====================================================================
+# 1. PARSING
+# =====================================================================
+# Key -> (field, parser) for the [Default] section
+_DEFAULT_KEYS = {
+    "VID": ("vid", lambda v: int(v, 16)),
+    "PID": ("pid", lambda v: int(v, 16)),
+    "DPI": ("dpi", int),
+    "Sensor": ("sensor", str),
+    "Password": ("password", bytes.fromhex),
+    "Distance": ("distance", int),
+    "Distance_Min": ("distance_min", int),
+    "Distance_Max": ("distance_max", int),
+    "Distance_Value": ("distance_values", lambda v: tuple(int(x) for x in v.split(","))),
+}
+
+def _button(key, value):
+    parts = [p.strip() for p in value.split(",")]
+    if len(parts) != 5:
+        raise IniError(f"[BUTTON] {key}={value}: expected MODE,B1,B2,B3,ENABLED")
+    try:
+        mapping = bytes(int(p, 16) for p in parts[:4]).hex().upper()
+        enabled = bool(int(parts[4]))
+    except ValueError:
+        raise IniError(f"[BUTTON] {key}={value}: not hex bytes and a 0/1 flag") from None
+    return ButtonEntry(mapping, enabled)
+
+def parse_ini(text):
+    """DeviceIni from the text of a Data.ini."""
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.optionxform = str  # Keep the vendor's key case
+    try:
+        parser.read_string(text)
+    except configparser.Error as e:
+        raise IniError(f"Data.ini is not a valid INI file: {e}") from None
+    for section in ("Default", "BUTTON"):
+        if not parser.has_section(section):
+            raise IniError(f"Data.ini has no [{section}] section")
+
+    fields = {}
+    extra = {}
+    default = parser["Default"]
+    for key, value in default.items():
+        if key not in _DEFAULT_KEYS and key not in ("Ver_H", "Ver_L"):
+            extra[f"Default/{key}"] = value
+    for key, (field, convert) in _DEFAULT_KEYS.items():
+        if key not in default:
+            raise IniError(f"Data.ini [Default] has no {key}")
+        try:
+            fields[field] = convert(default[key].strip())
+        except ValueError:
+            raise IniError(f"Data.ini [Default] {key}={default[key]} is malformed") from None
+    try:
+        fields["version"] = f"{int(default.get('Ver_H', '0'))}.{int(default.get('Ver_L', '0'))}"
+    except ValueError:
+        raise IniError("Data.ini [Default] Ver_H / Ver_L are not numbers") from None
+
+    entries = {}
+    for key, value in parser["BUTTON"].items():
+        if key.isdigit():
+            entries[int(key)] = _button(key, value)
+        else:
+            extra[f"BUTTON/{key}"] = value
+    total = BUTTONS_PER_PROFILE * INI_PROFILES
+    missing = [n for n in range(1, total + 1) if n not in entries]
+    if missing:
+        raise IniError(f"Data.ini [BUTTON] is missing entries {missing}")
+    fields["buttons"] = tuple(
+        tuple(entries[p * BUTTONS_PER_PROFILE + n + 1] for n in range(BUTTONS_PER_PROFILE))
+        for p in range(INI_PROFILES))
+
+    for section in parser.sections():
+        if section not in ("Default", "BUTTON"):
+            extra.update({f"{section}/{k}": v for k, v in parser[section].items()})
+    fields["extra"] = extra
+    return DeviceIni(**fields)
+
+def flatten(ini):
+    """{key: value} with one entry per scalar, e.g. "pid", "buttons[1][7]" - the keys subscribers see."""
+    flat = {}
+    for field, value in ini._asdict().items():
+        if field == "buttons":
+            for p, block in enumerate(value):
+                flat.update({f"buttons[{p}][{n}]": entry for n, entry in enumerate(block)})
+        elif field == "extra":
+            flat.update({f"extra[{k}]": v for k, v in value.items()})
+        else:
+            flat[field] = value
+    return flat
+
+def changed_keys(old, new):
+    """{key: (old value, new value)} between two DeviceIni (None for a missing side)."""
+    a, b = flatten(old) if old else {}, flatten(new) if new else {}
+    return {k: (a.get(k), b.get(k)) for k in sorted(set(a) | set(b)) if a.get(k) != b.get(k)}
+
+def button_blocks(ini, profile=0):
+    """
+    (buttons_1, buttons_2) of one Data.ini profile in the configuration
+    format; entries the vendor app flags as disabled come out as 00000000.
+    """
+    mappings = [e.mapping if e.enabled else "00000000" for e in ini.buttons[profile]]
+    return mappings[:8], mappings[8:]
+
+
+# =====================================================================
+# 2. CACHE
+# =====================================================================
+def _signature(path):
+    """What must move before a file is read again."""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class IniCache:
+    """Parsed DeviceIni per path, re-read only when the file moved and re-parsed only when its content did."""
+
+    def __init__(self):
+        self._entries = {}  # abspath -> [signature, sha1, DeviceIni]
+        self._lock = threading.Lock()
+        self.parses = 0
+
+    def load(self, path=DEFAULT_INI):
+        """(DeviceIni, changed) - changed is True when this call parsed new content."""
+        key = os.path.abspath(path)
+        signature = _signature(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                return entry[2], False
+            with open(path, "rb") as f:
+                raw = f.read()
+            digest = hashlib.sha1(raw).hexdigest()
+            if entry is not None and entry[1] == digest:
+                entry[0] = signature  # Touched but not edited
+                return entry[2], False
+            ini = parse_ini(raw.decode("utf-8-sig", "replace"))
+            self.parses += 1
+            self._entries[key] = [signature, digest, ini]
+            return ini, True
+
+    def peek(self, path=DEFAULT_INI):
+        """The cached DeviceIni of a path without touching the file (None if never loaded)."""
+        entry = self._entries.get(os.path.abspath(path))
+        return entry[2] if entry else None
+
+    def forget(self, path=DEFAULT_INI):
+        with self._lock:
+            self._entries.pop(os.path.abspath(path), None)
+
+
+_CACHE = IniCache()
+
+def load(path=DEFAULT_INI):
+    """The DeviceIni of a Data.ini from the process-wide cache (parsed once per edit)."""
+    return _CACHE.load(path)[0]
+
+
+# =====================================================================
+# 3. WATCHER
+# =====================================================================
+def _matches(key, subscribed):
+    """True if `key` is one of `subscribed` or sits under one ("buttons[0]" -> "buttons[0][3]", not "[10]")."""
+    return any(key == s or key.startswith(s + "[") for s in subscribed)
+
+class IniWatcher:
+    """
+    Polls a Data.ini and calls subscribers with {key: (old, new)} when it
+    changes. Only a stat per poll while nothing changes. Call poll() from
+    your own loop, or start() a background thread.
+    """
+
+    def __init__(self, path=DEFAULT_INI, interval=0.5, cache=None):
+        self.path = path
+        self.interval = interval
+        self.cache = cache or _CACHE
+        self._subscribers = []  # (callback, key prefixes or None)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.current = self.cache.load(path)[0] if os.path.exists(path) else None
+        self.error = None  # Last IniError / OSError seen while polling
+
+    def subscribe(self, callback, keys=None):
+        """
+        Calls callback(changes) on every edit that touches one of `keys`
+        (flatten() keys, or their leading part up to a "[": "buttons[0]"
+        covers buttons[0][0..15], "distance" only the distance itself; None
+        for any). Returns a function that unsubscribes.
+        """
+        item = (callback, tuple(keys) if keys else None)
+        with self._lock:
+            self._subscribers.append(item)
+
+        def unsubscribe():
+            with self._lock:
+                if item in self._subscribers:
+                    self._subscribers.remove(item)
+        return unsubscribe
+
+    def poll(self):
+        """Checks the file once; returns the changes it delivered ({} if none)."""
+        try:
+            ini, fresh = self.cache.load(self.path)
+        except (OSError, IniError) as e:
+            self.error = e  # Mid-write or deleted: keep the last good model
+            return {}
+        self.error = None
+        if not fresh and ini is self.current:
+            return {}
+        changes = changed_keys(self.current, ini)
+        self.current = ini
+        if changes:
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for callback, keys in subscribers:
+                if keys is None:
+                    callback(changes)
+                    continue
+                wanted = {k: v for k, v in changes.items() if _matches(k, keys)}
+                if wanted:
+                    callback(wanted)
+        return changes
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="armor-ini-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
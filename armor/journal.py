@@ -0,0 +1,220 @@
+"""
+Armor Gaming Mouse Flash Journal
+
+A write-ahead journal for the DMA sequence. Before the first frame goes out
+the selected plan steps are written to disk; every acknowledged frame and
+every completed sector is then appended. If the process dies mid-flash,
+resume() picks the journal up on the next start:
+  * Commit already sent  -> roll forward: wait for the MCU, record the
+                            shadow image and re-apply the runtime commands.
+  * Commit not sent yet  -> unlock again and re-send every sector of the
+                            journaled plan, then commit.
+
+Unsealed sector writes only live in MCU RAM, so a replug or power loss
+while the host was down wipes them without leaving a trace we could
+check. An uncommitted flash is therefore always re-sent in full, and the
+shadow only learns sectors that were sent in this session.
+
+A journal written for another device (transport.device_id) is discarded,
+never replayed. On MSDriver the device_id is only the VID:PID (the DLL
+cannot tell two mice of the same model apart), so that guard only
+separates transports and emulated mice: after swapping one physical mouse
+for another, flash with full=True.
+"""
+
+import json
+import os
+
+from .pacing import reload_delay
+from .plan import PlanCache, PlanStep, frame_from_json, frame_to_json
+from .protocol import macro_slot_limit
+from .transport import wait_for_reconnect
+
+DEFAULT_JOURNAL = os.path.join(".armor_cache", "journal.jsonl")
+
+
+class FlashJournal:
+    """Append-only JSON-lines journal of one flash in progress."""
+
+    def __init__(self, path=DEFAULT_JOURNAL, sync="step"):
+        self.path = path
+        self.sync = sync  # "frame", "step" or "none": when to fsync appended records
+        self._file = None
+
+    # -----------------------------------------------------------------
+    # Writing
+    # -----------------------------------------------------------------
+    def begin(self, steps, runtime, device=None):
+        """Write-ahead record of everything we are about to send."""
+        self.close()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._append({
+            "type": "begin",
+            "device": device,
+            "steps": [[s.name, [frame_to_json(f) for f in s.frames]] for s in steps],
+            "runtime": [frame_to_json(f) for f in runtime],
+        }, sync=True)
+
+    def reopen(self):
+        """Continues appending to an existing journal after a restart."""
+        self.close()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def frame(self, step, index):
+        self._append({"type": "frame", "step": step, "i": index}, sync=self.sync == "frame")
+
+    def step(self, step):
+        self._append({"type": "step", "step": step}, sync=self.sync != "none")
+
+    def committed(self):
+        self._append({"type": "commit"}, sync=True)
+
+    def finish(self):
+        """The flash is sealed and applied: nothing left to recover."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _append(self, record, sync):
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+
+    # -----------------------------------------------------------------
+    # Reading
+    # -----------------------------------------------------------------
+    def pending(self):
+        """
+        Returns the interrupted flash as a dict (steps, runtime, done,
+        frames, committed), or None if there is nothing to recover.
+        """
+        if not os.path.exists(self.path):
+            return None
+        state = None
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # Torn final line from the crash: everything before it is valid
+                kind = record.get("type")
+                if kind == "begin":
+                    state = {
+                        "device": record.get("device"),
+                        "steps": [PlanStep(name, tuple(frame_from_json(f) for f in frames))
+                                  for name, frames in record["steps"]],
+                        "runtime": [frame_from_json(f) for f in record["runtime"]],
+                        "done": set(),
+                        "frames": {},
+                        "committed": False,
+                    }
+                elif state is None:
+                    continue
+                elif kind == "frame":
+                    state["frames"][record["step"]] = record["i"]
+                elif kind == "step":
+                    state["done"].add(record["step"])
+                elif kind == "commit":
+                    state["committed"] = True
+        return state
+
+
+# =====================================================================
+# JOURNALED EXECUTION
+# =====================================================================
+def _send_steps(indexed_steps, pacer, journal, on_step=None, on_frame=None):
+    for index, step in indexed_steps:
+        if on_step:
+            on_step(step)
+        for i, f in enumerate(step.frames):
+            if f.kind == "F":
+                pacer.send_feature(f.data)
+            else:
+                pacer.send_output(f.data)
+            journal.frame(index, i)
+            if on_frame:
+                on_frame(f)
+        journal.step(index)
+        if step.name == "COMMIT":
+            journal.committed()
+
+def _send_runtime(runtime, pacer, on_step=None, on_frame=None):
+    """01H/0EH/04H: the MCU comes back from a reboot with the sensor asleep."""
+    if on_step:
+        on_step(PlanStep("RUNTIME", tuple(runtime)))
+    for f in runtime:
+        pacer.send_feature(f.data)
+        if on_frame:
+            on_frame(f)
+
+def _finish(written, runtime, pacer, transport, journal, shadow, reboot_timeout, on_step=None, on_frame=None):
+    """Post-commit roll-forward: reconnect, record the written sectors in the shadow, wake the sensor."""
+    wait_for_reconnect(transport, timeout=reboot_timeout, reload=reload_delay(pacer))
+    if shadow is not None:
+        shadow.record(written)
+    _send_runtime(runtime, pacer, on_step, on_frame)
+    journal.finish()
+
+def flash(steps, runtime, pacer, transport, journal, shadow=None, reboot_timeout=3.0,
+          device=None, on_step=None, on_frame=None):
+    """
+    Executes selected plan steps (UNLOCK ... COMMIT) under the journal, then the
+    runtime frames. With no steps, only the runtime frames are sent.
+    """
+    if not steps:
+        _send_runtime(runtime, pacer, on_step, on_frame)
+        return
+    journal.begin(steps, runtime, device=device or transport.device_id)
+    _send_steps(list(enumerate(steps)), pacer, journal, on_step, on_frame)
+    _finish(steps, runtime, pacer, transport, journal, shadow, reboot_timeout, on_step, on_frame)
+
+def resume(pacer, transport, journal, shadow=None, reboot_timeout=3.0, on_step=None, on_frame=None,
+           device=None):
+    """
+    Recovers an interrupted flash. Returns None (nothing to do), "rolled-forward",
+    "resumed" or "discarded" (the journal belongs to another device) together
+    with the names of the sectors that were re-sent.
+    """
+    state = journal.pending()
+    if state is None:
+        return None, []
+    if state["device"] != (device or transport.device_id):
+        # Replaying device A's sectors onto device B would corrupt B and its shadow
+        journal.finish()
+        return "discarded", []
+    steps, runtime = state["steps"], state["runtime"]
+    journal.reopen()
+    if state["committed"]:
+        written = [s for i, s in enumerate(steps) if i in state["done"]]
+        _finish(written, runtime, pacer, transport, journal, shadow, reboot_timeout, on_step, on_frame)
+        return "rolled-forward", []
+
+    # The MCU may have re-locked, or lost its unsealed writes with its power: redo everything
+    _send_steps(list(enumerate(steps)), pacer, journal, on_step, on_frame)
+    _finish(steps, runtime, pacer, transport, journal, shadow, reboot_timeout, on_step, on_frame)
+    return "resumed", [s.name for s in steps if s.name not in ("UNLOCK", "COMMIT")]
+
+def apply_config(config, transport, pacer, cache=None, shadow=None, journal=None, full=False,
+                 reboot_timeout=3.0, on_step=None, on_frame=None):
+    """
+    The whole flashing pipeline for one configuration on an open transport:
+    recover any interrupted flash, then write only the sectors that differ
+    from the shadow image, commit and re-apply the runtime commands.
+    """
+    journal = journal or FlashJournal()
+    plan = (cache or PlanCache(slot_count=macro_slot_limit(transport.name))).get(config)
+    recovered, resent = resume(pacer, transport, journal, shadow, reboot_timeout, on_step, on_frame)
+    steps = plan.select(shadow, full=full)
+    flash(steps, plan.runtime, pacer, transport, journal, shadow, reboot_timeout,
+          on_step=on_step, on_frame=on_frame)
+    return {"plan": plan.key, "recovered": recovered, "resent": resent,
+            "sectors": [s.name for s in steps[1:-1]]}
@@ -0,0 +1,99 @@
+"""
+Armor Gaming Mouse Macro Size Optimiser
+
+Rewrites a macro so it takes as few of the 128 slot bytes as possible
+without changing what the host sees:
+  * Redundant actions - a PRESS of a key already held, a RELEASE of a key
+                        that is not held, and NONE steps are dropped; their
+                        delay is merged into the previous action.
+  * Delay quantisation - delays are floored to 10ms steps, as encode_action
+                        does, but against the running total, so the error
+                        never accumulates. A dropped lead-in is quantised
+                        on its own and stays before the first action.
+  * Long delays       - anything over 127 steps (1.27s) is carried by extra
+                        RELEASE NONE steps instead of being silently capped.
+A RELEASE NONE step always has bit 7 set, so it can never be mistaken for
+the 00 00 padding that ends the macro.
+"""
+
+from collections import namedtuple
+
+from .hid import (
+    ACTION_SIZE, DELAY_UNIT_MS, KEY_NAMES, MACRO_HEADER, MAX_DELAY_STEPS, MacroError, key_code,
+)
+from .protocol import MACRO_SIZE
+
+NOOP = 0x00
+
+# bytes_free is negative when the macro still does not fit the slot
+MacroReport = namedtuple("MacroReport", "actions bytes_used bytes_free fits dropped split")
+
+
+def macro_bytes(n_actions):
+    """Slot bytes taken by a macro of n actions (repeat header included)."""
+    return MACRO_HEADER + ACTION_SIZE * n_actions
+
+def report(actions, dropped=0, split=0):
+    """Size report for an action list as it would be encoded."""
+    used = macro_bytes(len(actions))
+    return MacroReport(list(actions), used, MACRO_SIZE - used, used <= MACRO_SIZE, dropped, split)
+
+
+def _emit(out, state, code, steps):
+    """Appends one action waiting `steps`, carrying the excess in RELEASE NONE steps. Returns the split count."""
+    first = min(steps, MAX_DELAY_STEPS)
+    out.append((state, KEY_NAMES.get(code, code), first * DELAY_UNIT_MS))
+    steps -= first
+    split = 0
+    while steps:
+        chunk = min(steps, MAX_DELAY_STEPS)
+        out.append(("RELEASE", KEY_NAMES[NOOP], chunk * DELAY_UNIT_MS))
+        steps -= chunk
+        split += 1
+    return split
+
+def optimise_macro(actions):
+    """
+    Returns a MacroReport whose `actions` are the optimised (state, key, delay_ms)
+    tuples. Delays come out as exact multiples of 10ms, at most 1270ms each.
+    """
+    held = set()
+    kept = []      # [state, code, delay_ms]
+    lead_ms = 0    # Delay before the first real action (from dropped leading steps)
+    dropped = 0
+    for n, (state, key, delay_ms) in enumerate(actions):
+        state = str(state).upper()
+        if state not in ("PRESS", "RELEASE"):
+            raise MacroError(f"Action {n}: state must be PRESS or RELEASE, not '{state}'")
+        try:
+            code = key_code(key)
+        except MacroError as e:
+            raise MacroError(f"Action {n}: {e}") from None
+
+        release = state == "RELEASE"
+        if code == NOOP or (release and code not in held) or (not release and code in held):
+            dropped += 1
+            if kept:
+                kept[-1][2] += delay_ms
+            else:
+                lead_ms += delay_ms
+            continue
+        (held.discard if release else held.add)(code)
+        kept.append([state, code, delay_ms])
+
+    out = []
+    split = 0
+    # The lead-in happens before the first kept action: its remainder must not delay the ones after it
+    lead = max(0, int(lead_ms // DELAY_UNIT_MS))
+    if lead:
+        split += _emit(out, "RELEASE", NOOP, lead)
+        dropped -= 1  # That step survives as the lead-in delay
+
+    elapsed_ms = 0
+    emitted = 0  # Steps emitted so far
+    for state, code, delay_ms in kept:
+        elapsed_ms += delay_ms
+        steps = max(0, int(elapsed_ms // DELAY_UNIT_MS) - emitted)
+        emitted += steps
+        split += _emit(out, state, code, steps)
+    return report(out, dropped, split)
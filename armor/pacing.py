@@ -0,0 +1,154 @@
+"""
+Armor Gaming Mouse Packet Pacing
+
+Replaces the fixed `time.sleep(USB_DELAY)` after every report with pacing
+that sends the next packet as soon as the MCU is ready:
+  * Ack mode    - poll the GetFeature read-back until the device echoes the
+                  frame it just accepted (explored in dll-day-02 / dll-day-04).
+  * Model mode  - when no ack ever arrives, wait a per-sector timing model
+                  instead, growing the wait only when a report is refused.
+
+The ack echo has only been seen on the emulator. Until the real MCU's busy
+times are measured, the model falls back to the scripts' USB_DELAY.
+"""
+
+import time
+
+from .protocol import FEATURE_SIZE, OP_DMA, sector_of
+
+# Time the MCU needs after the commit to copy its flash into active RAM (dll.py's MCU_WAKE_DELAY)
+MCU_RELOAD_DELAY = 0.4
+
+# The scripts' fixed pause between reports: the only per-report wait known to work on the mouse
+USB_DELAY = 0.01
+
+
+class PacingError(Exception):
+    """Raised when the device keeps refusing a report after every retry."""
+
+
+def reload_delay(pacer):
+    """The commit reload delay of a pacer's timing model (the default for fixed pacing)."""
+    model = getattr(pacer, "model", None)
+    return model.reload if model is not None else MCU_RELOAD_DELAY
+
+
+class FixedPacer:
+    """Legacy behaviour: sleep a fixed delay after every report."""
+
+    def __init__(self, transport, delay=USB_DELAY):
+        self.transport = transport
+        self.delay = delay
+
+    def send_feature(self, frame):
+        ok = self.transport.set_feature(frame)
+        time.sleep(self.delay)
+        return ok
+
+    def send_output(self, payload):
+        ok = self.transport.write_output(payload)
+        time.sleep(self.delay)
+        return ok
+
+
+class TimingModel:
+    """
+    Expected MCU busy time per report, in seconds. Sector writes can be tuned
+    per DMA address (e.g. the 128-byte macro sectors take longer to burn).
+    The defaults are USB_DELAY until shorter waits are measured on hardware.
+    """
+
+    def __init__(self, feature=USB_DELAY, output=USB_DELAY, sectors=None, max_delay=0.05,
+                 reload=MCU_RELOAD_DELAY):
+        self.feature = feature
+        self.output = output
+        self.sectors = dict(sectors or {})
+        self.max_delay = max_delay
+        self.reload = reload  # Commit -> firmware running again, when the reboot cannot be observed
+
+    def delay(self, kind, sector=None):
+        if kind == "F":
+            return self.feature
+        return self.sectors.get(sector, self.output)
+
+    def penalise(self, kind, sector=None, factor=2.0):
+        """The device refused a report: lengthen the wait for that kind of report."""
+        new = min(self.max_delay, max(self.delay(kind, sector), 0.0005) * factor)
+        if kind == "F":
+            self.feature = new
+        elif sector is not None:
+            self.sectors[sector] = new
+        else:
+            self.output = new
+
+
+class AdaptivePacer:
+    """
+    Sends each report, then waits only as long as the device needs.
+    Failed reports are retried with exponential backoff up to `max_delay`.
+    """
+
+    def __init__(self, transport, model=None, use_ack=True, poll_interval=0.0002,
+                 ack_timeout=0.02, ack_misses=3, retries=6, max_delay=0.05):
+        self.transport = transport
+        self.model = model or TimingModel(max_delay=max_delay)
+        self.use_ack = use_ack
+        self.poll_interval = poll_interval
+        self.ack_timeout = ack_timeout
+        self.ack_misses = ack_misses  # Consecutive missing acks before falling back to the model
+        self.retries = retries
+        self.max_delay = max_delay
+
+        self.sector = None  # DMA sector the following Output Reports will land in
+        self._misses = 0
+        self.stats = {"reports": 0, "retries": 0, "acked": 0, "waited": 0.0}
+
+    def send_feature(self, frame):
+        # Frames, bytes and memoryviews all go straight through to the transport
+        self._send("F", self.transport.set_feature, frame)
+        if frame[0] == OP_DMA:
+            self.sector = sector_of(frame)
+        return True
+
+    def send_output(self, payload):
+        self._send("O", self.transport.write_output, payload)
+        return True
+
+    # -----------------------------------------------------------------
+    def _send(self, kind, write, data):
+        backoff = self.model.delay(kind, self.sector) or self.poll_interval
+        for attempt in range(self.retries + 1):
+            if write(data):
+                self.stats["reports"] += 1
+                self._settle(kind, data[:FEATURE_SIZE])
+                return
+            # Back off only on failure
+            self.stats["retries"] += 1
+            self.model.penalise(kind, self.sector)
+            self._sleep(backoff)
+            backoff = min(self.max_delay, backoff * 2)
+        raise PacingError(f"Device refused {data[:FEATURE_SIZE].hex().upper()} after {self.retries} retries")
+
+    def _settle(self, kind, echo):
+        """Blocks until the device is ready for the next report."""
+        # A busy MCU reads back all zeros, so a zero-prefixed report cannot be acked
+        if self.use_ack and any(echo):
+            deadline = time.perf_counter() + self.ack_timeout
+            while True:
+                if self.transport.get_feature(FEATURE_SIZE) == echo:
+                    self.stats["acked"] += 1
+                    self._misses = 0
+                    return
+                if time.perf_counter() >= deadline:
+                    break
+                self._sleep(self.poll_interval)
+            self._misses += 1
+            if self._misses >= self.ack_misses:
+                # This device (or backend) never echoes: trust the timing model from now on
+                self.use_ack = False
+            return
+        self._sleep(self.model.delay(kind, self.sector))
+
+    def _sleep(self, seconds):
+        self.stats["waited"] += seconds
+        time.sleep(seconds)
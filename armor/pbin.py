@@ -0,0 +1,342 @@
+"""
+Armor Gaming Mouse Profile Files (.pbin)
+
+Reads the vendor app's profiles (Data/*.pbin, 56,528 bytes each) through a
+declarative schema over a read-only memory map. Opening a file maps it and
+nothing else; a field is unpacked with struct only when it is read, so
+querying one field across hundreds of profiles touches a few pages of each.
+Data/profile.bin is the same layout with two profiles back to back.
+
+Field map (from diffing Default / Profile-max / Profile-yellow):
+  0x000  name        UTF-16LE, NUL padded, 100 bytes
+  0x064  settings    55 little-endian u32 words (raw)
+  0x088  dpi_stages  6 u32 DPI values (Profile-max sets all six to 124)
+  0x0D0  dpi_colors  8 COLORREF (0x00BBGGRR) stage colours, read as "RRGGBB"
+  0x150  buttons     32 button records of 0x6DC bytes running to the end of
+                     the file: UTF-16 macro / fire-key names at +0x00 / +0x64,
+                     index, code, arg at +0xC8, vendor macro events at +0x458
+Words without a name stay reachable through `settings` / raw().
+
+diff() compares two profiles and returns the differing byte ranges, each
+annotated with the schema fields it touches.
+"""
+
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+PROFILE_SIZE = 56528
+
+
+class ProfileError(ValueError):
+    """Raised when a file is not a whole number of profile records."""
+
+
+# count: array length (1 = scalar); stride: record spacing for nested schemas
+Field = namedtuple("Field", "name offset kind count stride", defaults=(1, 0))
+
+_STRUCT = {"u8": "B", "u16": "H", "u32": "I", "rgb": "I"}
+
+
+class Schema:
+    """An ordered set of Fields over a fixed-size record."""
+
+    def __init__(self, size, fields):
+        self.size = size
+        self.fields = {f.name: f for f in fields}
+        self._structs = {f.name: struct.Struct(f"<{f.count}{_STRUCT[f.kind]}")
+                         for f in fields if f.kind in _STRUCT}
+        for name in self.fields:
+            start, length = self.span(name)
+            if start + length > size:
+                raise ProfileError(f"Field '{name}' ends at 0x{start + length:X}, past the "
+                                   f"0x{size:X}-byte record")
+
+    def span(self, name):
+        """(offset, length) of a field inside one record."""
+        f = self.fields[name]
+        if isinstance(f.kind, Schema):
+            return f.offset, f.stride * (f.count - 1) + f.kind.size
+        if f.kind in _STRUCT:
+            return f.offset, self._structs[name].size
+        return f.offset, f.count  # utf16 / bytes: count is a byte length
+
+    def element(self, offset):
+        """
+        (path, end) of the most specific element covering a record offset:
+        "dpi_stages[2]", "buttons[7].macro_name", or "buttons[7]" for an
+        unnamed part of a record. path is None outside every field; end is
+        where that element (or unnamed stretch) stops.
+        """
+        best = None
+        for name in self.fields:
+            start, length = self.span(name)
+            if start <= offset < start + length and (best is None or length < best[2]):
+                best = (name, start, length)
+        if best is None:
+            following = [self.fields[n].offset for n in self.fields if self.fields[n].offset > offset]
+            return None, min(following, default=self.size)
+        name, start, length = best
+        f = self.fields[name]
+        rel = offset - start
+        if isinstance(f.kind, Schema):
+            index, inner = divmod(rel, f.stride)
+            base = start + index * f.stride
+            if inner >= f.kind.size:
+                return None, base + f.stride  # Gap between records
+            sub, sub_end = f.kind.element(inner)
+            return f"{name}[{index}]" + (f".{sub}" if sub else ""), base + sub_end
+        if f.kind in _STRUCT and f.count > 1:
+            size = struct.calcsize(_STRUCT[f.kind])
+            index = rel // size
+            # An item of a broad field may be cut short by a narrower field inside it
+            inner = [self.fields[n].offset for n in self.fields
+                     if n != name and offset < self.fields[n].offset < start + (index + 1) * size]
+            return f"{name}[{index}]", min(inner, default=start + (index + 1) * size)
+        return name, start + length
+
+    def locate(self, offset):
+        """Field path of one record offset, e.g. "buttons[7]+0xD0" (None if unmapped)."""
+        path, _ = self.element(offset)
+        f = self.fields.get(path.split("[", 1)[0]) if path else None
+        if f is not None and isinstance(f.kind, Schema) and "." not in path:
+            return f"{path}+0x{(offset - f.offset) % f.stride:X}"
+        return path
+
+    def read(self, buf, base, name):
+        """Decodes one field of the record at buf[base]."""
+        f = self.fields[name]
+        if isinstance(f.kind, Schema):
+            return [Record(buf, base + f.offset + i * f.stride, f.kind) for i in range(f.count)]
+        if f.kind in _STRUCT:
+            values = self._structs[name].unpack_from(buf, base + f.offset)
+            if f.kind == "rgb":
+                values = tuple(f"{v & 0xFF:02X}{(v >> 8) & 0xFF:02X}{(v >> 16) & 0xFF:02X}" for v in values)
+            return values[0] if f.count == 1 else values
+        raw = bytes(buf[base + f.offset:base + f.offset + f.count])
+        if f.kind == "utf16":
+            return raw.decode("utf-16-le", "replace").split("\x00", 1)[0]
+        return raw
+
+    def write(self, buf, base, name, value):
+        """Encodes one field into the record at buf[base] (the inverse of read)."""
+        f = self.fields[name]
+        if isinstance(f.kind, Schema):
+            raise ProfileError(f"'{name}' is a nested record; write its fields one by one")
+        if f.kind in _STRUCT:
+            values = [value] if f.count == 1 else list(value)
+            if len(values) != f.count:
+                raise ProfileError(f"'{name}' holds {f.count} values, not {len(values)}")
+            if f.kind == "rgb":
+                values = [int(v[4:6] + v[2:4] + v[0:2], 16) for v in values]  # RRGGBB -> 0x00BBGGRR
+            self._structs[name].pack_into(buf, base + f.offset, *values)
+            return
+        raw = value.encode("utf-16-le") if f.kind == "utf16" else bytes(value)
+        if len(raw) > f.count - (2 if f.kind == "utf16" else 0):
+            raise ProfileError(f"'{name}' holds at most {f.count} bytes")
+        buf[base + f.offset:base + f.offset + f.count] = raw.ljust(f.count, b"\x00")
+
+
+class Record:
+    """
+    Lazy view of one record: attribute access decodes that field (and
+    caches it); nothing else is read.
+    """
+
+    def __init__(self, buf, base, schema):
+        self._buf = buf
+        self._base = base
+        self._schema = schema
+        self._cache = {}
+
+    def __getattr__(self, name):
+        if name.startswith("_") or name not in self._schema.fields:
+            raise AttributeError(name)
+        if name not in self._cache:
+            self._cache[name] = self._schema.read(self._buf, self._base, name)
+        return self._cache[name]
+
+    def raw(self, name=None):
+        """
+        Zero-copy memoryview of one field, or of the whole record (e.g. for
+        numpy.frombuffer(record.raw("settings"), "<u4")). Release it before
+        the file is closed.
+        """
+        if name is None:
+            offset, length = 0, self._schema.size
+        else:
+            offset, length = self._schema.span(name)
+        start = self._base + offset
+        return memoryview(self._buf)[start:start + length]
+
+    def write(self, name, value):
+        """Encodes one field back into the buffer (which must be writable)."""
+        self._schema.write(self._buf, self._base, name, value)
+        self._cache.clear()  # Fields may overlap (settings spans dpi_stages)
+
+    def as_dict(self):
+        out = {}
+        for name in self._schema.fields:
+            value = getattr(self, name)
+            if isinstance(value, list):
+                value = [r.as_dict() for r in value]
+            elif isinstance(value, bytes):
+                value = value.hex().upper()
+            out[name] = value
+        return out
+
+
+# =====================================================================
+# SCHEMA
+# =====================================================================
+# The records start right after the colour table and fill the profile exactly:
+# 0x150 + 32 * 0x6DC == PROFILE_SIZE. (Read first as starting at 0x218 with the
+# names at +0x00, which ran the last record 200 bytes into the next profile.)
+BUTTON_SCHEMA = Schema(0x6DC, (
+    Field("macro_name", 0x00, "utf16", 0x64),  # "The default macro" on button 7 of Default.pbin
+    Field("fire_name", 0x64, "utf16", 0x64),   # "The fire key"
+    Field("index", 0xC8, "u8"),
+    Field("code", 0xC9, "u8"),
+    Field("arg", 0xCA, "u8"),
+    Field("macro", 0x458, "bytes", 0x284),     # Vendor macro event list (format not decoded)
+))
+
+PROFILE_SCHEMA = Schema(PROFILE_SIZE, (
+    Field("name", 0x00, "utf16", 0x64),
+    Field("settings", 0x64, "u32", 55),
+    Field("dpi_stages", 0x88, "u32", 6),
+    Field("dpi_colors", 0xD0, "rgb", 8),
+    Field("buttons", 0x150, BUTTON_SCHEMA, 32, 0x6DC),
+))
+
+
+# =====================================================================
+# FILES
+# =====================================================================
+class ProfileFile:
+    """
+    A memory-mapped .pbin / profile.bin: a sequence of profile Records.
+    Use as a context manager, or close() it; Records must not outlive it.
+    """
+
+    def __init__(self, path, schema=PROFILE_SCHEMA):
+        self.path = path
+        self.schema = schema
+        with open(path, "rb") as f:
+            size = f.seek(0, 2)
+            if not size or size % schema.size:
+                raise ProfileError(f"{path}: {size} bytes is not a whole number of "
+                                   f"{schema.size}-byte profiles")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.count = size // schema.size
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not -self.count <= index < self.count:
+            raise IndexError(index)
+        return Record(self._map, (index % self.count) * self.schema.size, self.schema)
+
+    def __iter__(self):
+        return (self[i] for i in range(self.count))
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def query(paths, *fields, schema=PROFILE_SCHEMA):
+    """Yields (path, index, {field: value}) for every profile in `paths`, one file mapped at a time."""
+    for path in paths:
+        with ProfileFile(path, schema) as pf:
+            for i in range(len(pf)):
+                record = pf[i]
+                values = {}
+                for name in fields:
+                    value = getattr(record, name)
+                    values[name] = [r.as_dict() for r in value] if isinstance(value, list) else value
+                yield path, i, values
+
+
+# =====================================================================
+# DIFF
+# =====================================================================
+# end is exclusive; fields lists every schema path the range touches; old / new are hex
+DiffRange = namedtuple("DiffRange", "start end fields old new")
+
+_BLOCKS = (4096, 64)
+
+def _differing(a, b, start, end, level=0):
+    """Yields differing offsets in [start, end), skipping equal blocks with one slice compare."""
+    if level == len(_BLOCKS):
+        for i in range(start, end):
+            if a[i] != b[i]:
+                yield i
+        return
+    size = _BLOCKS[level]
+    for lo in range(start, end, size):
+        hi = min(end, lo + size)
+        if a[lo:hi] != b[lo:hi]:
+            yield from _differing(a, b, lo, hi, level + 1)
+
+def _annotate(schema, start, end):
+    """Schema paths touched by [start, end), one element lookup per element."""
+    fields = []
+    offset = start
+    while offset < end:
+        record, rel = divmod(offset, schema.size)
+        path, stop = schema.element(rel)
+        path = path or "unknown"
+        if path not in fields:
+            fields.append(path)
+        offset = record * schema.size + max(stop, rel + 1)
+    return fields
+
+def diff(a, b, schema=PROFILE_SCHEMA, gap=0):
+    """
+    Differing byte ranges between two buffers (bytes, mmap or Records' raw()).
+    Runs separated by at most `gap` equal bytes are merged into one range
+    (gap=0 only joins adjacent bytes). If the lengths differ, the tail of
+    the longer one is a range of its own.
+    With schema=None the ranges are not annotated (fields is empty).
+    """
+    ranges = []
+    n = min(len(a), len(b))
+    run = None
+    for i in _differing(a, b, 0, n):
+        if run is not None and i - run[1] <= gap:  # i - run[1] equal bytes in between
+            run[1] = i + 1
+        else:
+            if run is not None:
+                ranges.append(run)
+            run = [i, i + 1]
+    if run is not None:
+        ranges.append(run)
+    if len(a) != len(b):
+        ranges.append([n, max(len(a), len(b))])
+    return [DiffRange(start, end, _annotate(schema, start, end) if schema is not None else [],
+                      bytes(a[start:end]).hex().upper(), bytes(b[start:end]).hex().upper())
+            for start, end in ranges]
+
+def _is_profile_file(path, schema):
+    size = os.path.getsize(path)
+    return size and size % schema.size == 0
+
+def diff_files(path_a, path_b, schema=PROFILE_SCHEMA, gap=0):
+    """
+    diff() of two profile files, both memory-mapped. Anything else (gun.bin,
+    Data.bin, a truncated profile) is compared as raw bytes, unannotated.
+    """
+    if not (_is_profile_file(path_a, schema) and _is_profile_file(path_b, schema)):
+        with open(path_a, "rb") as fa, open(path_b, "rb") as fb:
+            return diff(fa.read(), fb.read(), None, gap)
+    with ProfileFile(path_a, schema) as fa, ProfileFile(path_b, schema) as fb:
+        return diff(fa._map, fb._map, schema, gap)
@@ -0,0 +1,184 @@
+"""
+Armor Gaming Mouse Flash Plans
+
+Compiles a full configuration (polling rate, DPI, colours, buttons, macro,
+debounce) once into an immutable FlashPlan: the ordered frames of every DMA
+step plus the post-reboot runtime commands, each with its expected MCU busy
+time. Plans are cached on disk by a content hash of the configuration, so
+re-applying a known profile skips compilation and goes straight to I/O.
+"""
+
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+from .flash import SECTOR_ORDER, commit_write, sector_writes, unlock_write
+from .pacing import TimingModel
+from .protocol import (
+    OP_DMA, compile_macro, macro_slot_limit, polling_cmd, sector_of, sensitivity_cmd, sensor_cmd,
+)
+from .slots import allocate_macros
+
+# Bump whenever the compiler output changes so stale cached plans are ignored.
+PLAN_VERSION = 2  # 2: compile_macro raises on unknown keys instead of emitting 0x00
+
+DEFAULT_CACHE_DIR = ".armor_cache"
+
+# kind: "F" (8-byte Feature Report) or "O" (32-byte Output Report)
+PlanFrame = namedtuple("PlanFrame", "kind data delay")
+
+
+class PlanStep(namedtuple("PlanStep", "name frames")):
+    """One named DMA step. Exposes cmds/chunks as hex so ShadowImage can diff it."""
+
+    __slots__ = ()
+
+    @property
+    def cmds(self):
+        return tuple(f.data.hex().upper() for f in self.frames if f.kind == "F")
+
+    @property
+    def chunks(self):
+        return tuple(f.data.hex().upper() for f in self.frames if f.kind == "O")
+
+
+def frame_to_json(f):
+    return [f.kind, f.data.hex().upper(), f.delay]
+
+def frame_from_json(f):
+    return PlanFrame(f[0], bytes.fromhex(f[1]), f[2])
+
+def config_hash(config, model=None, slot_count=None):
+    """Content hash of a configuration (and the timing model and macro slots it was planned with)."""
+    model = model or TimingModel()
+    blob = json.dumps({"version": PLAN_VERSION, "config": config, "model": vars(model),
+                       "slots": slot_count or macro_slot_limit()},
+                      sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class FlashPlan:
+    """Immutable, serialisable result of compiling one configuration."""
+
+    def __init__(self, key, steps, runtime):
+        self.key = key
+        self.steps = tuple(steps)      # UNLOCK, every sector, COMMIT
+        self.runtime = tuple(runtime)  # 01H/0EH/04H frames for the active RAM
+
+    def select(self, shadow=None, full=False):
+        """Steps to execute: only the sectors the shadow image says changed."""
+        sectors = [s for s in self.steps if s.name in SECTOR_ORDER
+                   and (full or shadow is None or not shadow.matches(s))]
+        if not sectors:
+            return []
+        return [self.steps[0]] + sectors + [self.steps[-1]]
+
+    def expected_duration(self, steps=None):
+        """Sum of the modelled busy times (seconds), ignoring the reboot."""
+        frames = [f for s in (self.steps if steps is None else steps) for f in s.frames]
+        return sum(f.delay for f in frames + list(self.runtime))
+
+    def to_json(self):
+        return {
+            "version": PLAN_VERSION,
+            "key": self.key,
+            "steps": [[s.name, [frame_to_json(f) for f in s.frames]] for s in self.steps],
+            "runtime": [frame_to_json(f) for f in self.runtime],
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        steps = [PlanStep(name, tuple(frame_from_json(f) for f in frames)) for name, frames in data["steps"]]
+        return cls(data["key"], steps, [frame_from_json(f) for f in data["runtime"]])
+
+
+def compile_plan(config, model=None, slot_count=None):
+    """
+    Compiles a configuration dict into a FlashPlan. Expected keys:
+    polling_rate, key_response_ms, dpi_stages, dpi_colors, buttons_1,
+    buttons_2 and either macro ({"actions": [...], "repeat": n}, slot 1) or
+    macros ({name: {"actions", "repeat", "slot"?}}, allocated across the
+    hardware slots; buttons may then say "MACRO:<name>"). `slot_count`
+    defaults to protocol.macro_slot_limit(): slot 1 only on real hardware.
+    """
+    model = model or TimingModel()
+    slot_count = slot_count or macro_slot_limit()
+    buttons_1, buttons_2 = config["buttons_1"], config["buttons_2"]
+    if "macros" in config:
+        allocation = allocate_macros(config["macros"], buttons_1, buttons_2, slot_count)
+        macro, buttons_1, buttons_2 = allocation.payloads, allocation.buttons_1, allocation.buttons_2
+    else:
+        macro = compile_macro([tuple(a) for a in config["macro"]["actions"]], repeat=config["macro"]["repeat"])
+    writes = sector_writes(config["polling_rate"], config["dpi_stages"], config["dpi_colors"],
+                           buttons_1, buttons_2, macro)
+    ordered = [unlock_write()] + [writes[name] for name in SECTOR_ORDER if name in writes] + [commit_write()]
+
+    steps = []
+    for write in ordered:
+        frames = []
+        sector = None
+        for cmd in write.cmds:
+            data = bytes.fromhex(cmd)
+            if data[0] == OP_DMA:
+                sector = sector_of(data)
+            frames.append(PlanFrame("F", data, model.delay("F")))
+        for chunk in write.chunks:
+            frames.append(PlanFrame("O", bytes.fromhex(chunk), model.delay("O", sector)))
+        steps.append(PlanStep(write.name, tuple(frames)))
+
+    runtime = [PlanFrame("F", bytes.fromhex(cmd), model.delay("F")) for cmd in (
+        polling_cmd(config["polling_rate"]),
+        sensitivity_cmd(),
+        sensor_cmd(config["key_response_ms"]),
+    )]
+    return FlashPlan(config_hash(config, model, slot_count), steps, runtime)
+
+
+class PlanCache:
+    """Compiled plans on disk, one JSON file per configuration hash."""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, model=None, slot_count=None):
+        self.directory = os.path.join(directory, "plans")
+        self.model = model or TimingModel()
+        self.slot_count = slot_count  # None: protocol.macro_slot_limit() at compile time
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, config):
+        """Returns the cached plan for this configuration, compiling it on a miss."""
+        slot_count = self.slot_count or macro_slot_limit()
+        key = config_hash(config, self.model, slot_count)
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == PLAN_VERSION and data.get("key") == key:
+                self.hits += 1
+                return FlashPlan.from_json(data)
+        except (OSError, ValueError, KeyError, IndexError):
+            pass
+        self.misses += 1
+        plan = compile_plan(config, self.model, slot_count)
+        self.put(plan)
+        return plan
+
+    def put(self, plan):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self._path(plan.key) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(plan.to_json(), f)
+        os.replace(tmp, self._path(plan.key))
+
+
+def execute(steps, pacer):
+    """Streams plan steps (or runtime frames) to the device through a pacer."""
+    for item in steps:
+        frames = item.frames if isinstance(item, PlanStep) else (item,)
+        for f in frames:
+            if f.kind == "F":
+                pacer.send_feature(f.data)
+            else:
+                pacer.send_output(f.data)
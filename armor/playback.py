@@ -0,0 +1,307 @@
+"""
+Armor Gaming Mouse Host Macro Playback
+
+Plays macros the 128-byte hardware slot cannot hold (more than 63 actions,
+delays over 1.27s) from the host, on a monotonic high-resolution clock:
+  * Drift correction - every event has an absolute deadline measured from
+                       the start of playback, so one late wake-up never
+                       shifts the events after it.
+  * Sleep + spin     - the thread sleeps until just before a deadline and
+                       busy-waits the last stretch; GC is paused and, where
+                       the OS allows it, the thread runs at real-time
+                       priority with a 1ms timer tick.
+  * Jitter stats     - how late each event fired, as mean / p50 / p99 / max.
+
+Events go to a sink: UInputSink (Linux /dev/uinput, no python-evdev needed)
+or RecordingSink (in memory, for tests and dry runs). serve() listens for
+the trigger keys allocate_macros() assigned to "host": true macros and plays
+the matching macro, so the button is mapped with the normal 09H encoding.
+"""
+
+import gc
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from .hid import KEY_NAMES, MacroError, key_code
+from .recorder import EV_KEY, INPUT_EVENT, LINUX_KEYS
+from .slots import spec_actions
+
+# Lateness figures are in microseconds; drift_us is how late the last event fired
+PlaybackStats = namedtuple("PlaybackStats", (
+    "events duration_ms mean_us p50_us p99_us max_us drift_us stopped"))
+
+
+# =====================================================================
+# 1. SINKS
+# =====================================================================
+class Sink:
+    """Receives key edges. `check` rejects a key before playback starts."""
+
+    def check(self, key):
+        pass
+
+    def press(self, key):
+        raise NotImplementedError
+
+    def release(self, key):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RecordingSink(Sink):
+    """Keeps every edge as (time, state, key) in `events`."""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.events = []
+
+    def press(self, key):
+        self.events.append((self.clock(), "PRESS", key))
+
+    def release(self, key):
+        self.events.append((self.clock(), "RELEASE", key))
+
+
+class UInputSink(Sink):
+    """Virtual keyboard + mouse buttons on Linux via raw /dev/uinput ioctls."""
+
+    UI_SET_EVBIT = 0x40045564
+    UI_SET_KEYBIT = 0x40045565
+    UI_DEV_SETUP = 0x405C5503
+    UI_DEV_CREATE = 0x5501
+    UI_DEV_DESTROY = 0x5502
+    BUS_USB = 0x03
+    EV_SYN = 0x00
+
+    CODES = {name: code for code, name in LINUX_KEYS.items()}
+
+    def __init__(self, path="/dev/uinput", name="Armor Host Macro"):
+        import fcntl
+        import struct
+        self.fd = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+        try:
+            fcntl.ioctl(self.fd, self.UI_SET_EVBIT, EV_KEY)
+            for code in self.CODES.values():
+                fcntl.ioctl(self.fd, self.UI_SET_KEYBIT, code)
+            # struct uinput_setup: input_id (bus, vendor, product, version), name[80], ff_effects_max
+            setup = struct.pack("HHHH80sI", self.BUS_USB, 0x04D9, 0xA09F, 1, name.encode()[:79], 0)
+            fcntl.ioctl(self.fd, self.UI_DEV_SETUP, setup)
+            fcntl.ioctl(self.fd, self.UI_DEV_CREATE)
+        except OSError:
+            os.close(self.fd)
+            raise
+        time.sleep(0.1)  # Give the input stack time to pick the new device up
+
+    def check(self, key):
+        if key not in self.CODES:
+            raise MacroError(f"Key '{key}' has no Linux input code")
+
+    def _emit(self, key, value):
+        os.write(self.fd, INPUT_EVENT.pack(0, 0, EV_KEY, self.CODES[key], value)
+                 + INPUT_EVENT.pack(0, 0, self.EV_SYN, 0, 0))
+
+    def press(self, key):
+        self._emit(key, 1)
+
+    def release(self, key):
+        self._emit(key, 0)
+
+    def close(self):
+        if self.fd is not None:
+            import fcntl
+            fcntl.ioctl(self.fd, self.UI_DEV_DESTROY)
+            os.close(self.fd)
+            self.fd = None
+
+
+# =====================================================================
+# 2. SCHEDULER
+# =====================================================================
+def schedule(actions):
+    """
+    (state, key, delay_ms) actions -> ([(offset_s, state, key)], pass_s).
+    Keys come out as canonical names; NONE steps only add time.
+    """
+    events = []
+    offset_ms = 0
+    for n, (state, key, delay_ms) in enumerate(actions):
+        state = str(state).upper()
+        if state not in ("PRESS", "RELEASE"):
+            raise MacroError(f"Action {n}: state must be PRESS or RELEASE, not '{state}'")
+        code = key_code(key)
+        if code:
+            events.append((offset_ms / 1000, state, KEY_NAMES.get(code, code)))
+        offset_ms += max(0, delay_ms)
+    return events, offset_ms / 1000
+
+@contextmanager
+def _realtime(enabled=True):
+    """
+    Best-effort real-time scheduling for the playing thread while a macro
+    runs: SCHED_FIFO on Linux, time-critical priority and a 1ms timer tick
+    (default 15.6ms) on Windows. Silently does nothing without permission.
+    """
+    restore = []
+    if enabled and sys.platform == "win32":
+        try:
+            import ctypes
+            winmm, kernel32 = ctypes.WinDLL("winmm"), ctypes.WinDLL("kernel32")
+            winmm.timeBeginPeriod(1)
+            restore.append(lambda: winmm.timeEndPeriod(1))
+            thread = kernel32.GetCurrentThread()
+            previous = kernel32.GetThreadPriority(thread)
+            if kernel32.SetThreadPriority(thread, 15):  # THREAD_PRIORITY_TIME_CRITICAL
+                restore.append(lambda: kernel32.SetThreadPriority(thread, previous))
+        except (OSError, AttributeError):
+            pass
+    elif enabled and hasattr(os, "sched_setscheduler"):
+        try:
+            policy, param = os.sched_getscheduler(0), os.sched_getparam(0)
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(1))
+            restore.append(lambda: os.sched_setscheduler(0, policy, param))
+        except OSError:
+            pass
+    try:
+        yield
+    finally:
+        for undo in reversed(restore):
+            undo()
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class MacroPlayer:
+    """
+    Plays action lists on a sink. `spin` is how long before each deadline
+    the thread stops sleeping and busy-waits (longer = more accurate, more
+    CPU). `realtime` raises the thread's priority during playback. Works
+    with any clock, so tests can inject a fake one.
+    """
+
+    def __init__(self, sink, clock=time.perf_counter, sleep=time.sleep, spin=0.002, realtime=True):
+        self.sink = sink
+        self.clock = clock
+        self.sleep = sleep
+        self.spin = spin
+        self.realtime = realtime
+
+    def _wait(self, deadline, stop):
+        """Waits for `deadline`. Returns True if `stop` was set first."""
+        clock = self.clock
+        while True:
+            remaining = deadline - clock()
+            if remaining <= 0:
+                return False
+            if stop is not None and stop.is_set():
+                return True
+            if remaining > self.spin:
+                self.sleep(min(remaining - self.spin, 0.05))  # Short naps keep `stop` responsive
+
+    def play(self, actions, repeat=1, stop=None):
+        """
+        Plays `actions` `repeat` times (0 plays once, like the hardware) and
+        returns PlaybackStats. Keys still held at the end, or when `stop`
+        (a threading.Event) is set, are released.
+        """
+        events, pass_s = schedule(actions)
+        for _, _, key in events:
+            self.sink.check(key)
+        runs = max(1, repeat)
+        sink, clock = self.sink, self.clock
+        lateness = []
+        held = set()
+        stopped = False
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with _realtime(self.realtime):
+                t0 = clock()
+                for n in range(runs):
+                    base = t0 + n * pass_s
+                    for offset, state, key in events:
+                        deadline = base + offset
+                        if self._wait(deadline, stop):
+                            stopped = True
+                            break
+                        if state == "PRESS":
+                            sink.press(key)
+                            held.add(key)
+                        else:
+                            sink.release(key)
+                            held.discard(key)
+                        lateness.append(clock() - deadline)
+                    if stopped:
+                        break
+                if not stopped:
+                    stopped = self._wait(t0 + runs * pass_s, stop)  # Trailing delay of the last pass
+                end = clock()
+        finally:
+            for key in sorted(held, key=str):
+                sink.release(key)
+            if gc_enabled:
+                gc.enable()
+
+        if not lateness:
+            return PlaybackStats(0, (end - t0) * 1000, 0.0, 0.0, 0.0, 0.0, 0.0, stopped)
+        ordered = sorted(lateness)
+        return PlaybackStats(len(lateness), (end - t0) * 1000,
+                             sum(lateness) / len(lateness) * 1e6, _percentile(ordered, 0.5) * 1e6,
+                             _percentile(ordered, 0.99) * 1e6, ordered[-1] * 1e6,
+                             lateness[-1] * 1e6, stopped)
+
+
+# =====================================================================
+# 3. TRIGGER LISTENER
+# =====================================================================
+def serve(library, triggers, events, player, on_play=None):
+    """
+    Plays host macros from an event stream ((t, state, key), e.g. from
+    recorder.evdev_events). A PRESS of a macro's trigger key starts it; a
+    second press while it runs stops it. `on_play(name, stats)` is called
+    after each playback. Returns when the stream ends.
+    """
+    by_key = {key.upper(): name for name, key in triggers.items()}
+    current = {}  # "thread", "stop", "name" of the running playback
+
+    def run(name, stop):
+        spec = library[name]
+        stats = player.play(spec_actions(spec), spec.get("repeat", 1), stop)
+        if on_play:
+            on_play(name, stats)
+
+    try:
+        for _, state, key in events:
+            name = by_key.get(str(key).upper())
+            if name is None or state != "PRESS":
+                continue
+            thread = current.get("thread")
+            if thread is not None and thread.is_alive():
+                current["stop"].set()
+                thread.join()
+                if current["name"] == name:
+                    continue  # Same button again: toggle off
+            stop = threading.Event()
+            thread = threading.Thread(target=run, args=(name, stop), daemon=True)
+            current.update(thread=thread, stop=stop, name=name)
+            thread.start()
+    except BaseException:
+        if current:
+            current["stop"].set()  # Interrupted: do not wait for a long macro to finish
+        raise
+    finally:
+        thread = current.get("thread")
+        if thread is not None:
+            thread.join()
@@ -0,0 +1,182 @@
+"""
+Armor Gaming Mouse Protocol Definitions
+MCU: Holtek HT68FB571
+
+Every command frame, sector address and payload rule discovered during the
+dll-day-XX experiments, collected in one place so the flashing scripts, the
+transports and the device emulator all speak exactly the same protocol.
+"""
+
+import os
+
+# =====================================================================
+# 1. USB IDENTITY & REPORT SIZES
+# =====================================================================
+# Target the specific Holtek MCU hardware ID (Vendor ID: 04D9, Product ID: A09F)
+VID = 0x04D9
+PID = 0xA09F
+
+# Feature Reports carry 8-byte commands, Output Reports carry 32-byte payloads.
+FEATURE_SIZE = 8
+OUTPUT_SIZE = 32
+
+# The Holtek MCU expects exactly 128 bytes (4 chunks of 32 bytes) per macro.
+MACRO_SIZE = 128
+
+
+# =====================================================================
+# 2. STANDARD COMMANDS (Checksummed, byte 0 = opcode)
+# =====================================================================
+OP_POLLING = 0x01      # Command 01H: Active polling rate (wakes the USB interrupt pipe)
+OP_SENSOR = 0x04       # Command 04H: Sensor lift & debounce time
+OP_STOP_MACRO = 0x08   # Command 08H: Stop macro sending
+OP_SENSITIVITY = 0x0E  # Command 0EH: Hardware X/Y sensitivity
+
+# Command 01H argument: USB report rate in Hz -> interval code
+POLLING_CODES = {1000: 0x01, 500: 0x02, 250: 0x04, 125: 0x08}
+
+
+# =====================================================================
+# 3. UNDOCUMENTED DMA COMMANDS (27H sector selects)
+# =====================================================================
+OP_DMA = 0x27
+
+CMD_HANDSHAKE = "2727DDFFF4DD7676"  # Official wake command handshake
+CMD_UNLOCK = "252BA5FFF0E0E6EE"     # Security bypass key to unlock the memory sectors
+CMD_COMMIT = "272BFDFFF86576D6"     # Seal the flash memory and soft-reboot
+
+# Empty 32-byte payload pushed after the commit to flush the write buffer.
+FLUSH_DATA = "FF000000000000000000000000000000"
+
+# DMA sector selects. Every Output Report sent after one of these lands in that sector.
+SECTOR_CMDS = {
+    "COLORS": "272A85FFF0657636",         # RGB LED states
+    "COLORS_MIRROR": "272A8DFFE8657636",  # Secondary RGB LED states (Dual Write)
+    "DPI": "272BFDFFE06D76B6",            # Sensor DPI stages
+    "BUTTONS_1": "272D5DFFE8557876",      # First 8 button mappings
+    "BUTTONS_2": "272D25FF00557876",      # Final 8 button mappings
+    "MACRO_1": "272725FFE85D7A76",        # Macro Slot 1 (Bypasses standard 13H Protocol)
+}
+
+# Hardware macro slots. Slot 1 is the captured MACRO_1 select above; the others follow
+# its 128-byte stride. Their select frames are derived by macro_slot_cmd() with the same
+# byte 2 / byte 4 pairing the COLORS / COLORS_MIRROR selects show (byte 2 + byte 4 is
+# constant), and the last slot ends before the colour sector at 0x2A85.
+MACRO_SLOT_BASE = 0x2725
+MACRO_SLOT_STRIDE = 0x80
+MACRO_SLOT_COUNT = 6
+
+# That pairing does not hold for BUTTONS_1 / BUTTONS_2 (0x5D + 0xE8 vs 0x25 + 0x00) or DPI,
+# so slots 2-6 are a guess: real hardware only gets the captured slot 1 unless the user
+# opts in with ARMOR_UNVERIFIED_SLOTS=1. The emulator accepts every derived slot.
+VERIFIED_MACRO_SLOTS = 1
+UNVERIFIED_SLOTS_ENV = "ARMOR_UNVERIFIED_SLOTS"
+
+# Button mode 09H: byte 2 carries the macro slot ID ("09000100" triggers slot 1).
+MODE_MACRO = 0x09
+
+# The 7C78 suffix is an undocumented static hardware terminator required by the sensor.
+DPI_TERMINATOR = "7C78"
+
+# These specific memory sectors dictate the permanent polling rate burned into the MCU.
+PREP_SEQUENCES = {
+    1000: ["272BDDFFE8D57676", "272BD5FFE8ED7676", "272B6DFF001D7676", "272B9D0498457676", "272B5DFFD0524E8E"],
+    500:  ["272BDDFFE8D57676", "272BDDFF00ED7676", "272B75FFF81D7676", "272B9D0498457676", "272B5DFFD0524E8E"],
+    250:  ["272BDDFFE8D57676", "272BADFFD0ED7676", "272B75FFF81D7676", "272B9D0498457676", "272B5DFFD0524E8E"],
+    125:  ["272BDDFFE8D57676", "272B8DFF30ED7676", "272B6DFF001D7676", "272B9D0498457676", "272B5DFFD0524E8E"]
+}
+
+
+# =====================================================================
+# 4. FRAME HELPERS
+# =====================================================================
+def build_cmd(byte_list):
+    """Calculates the Holtek C++ Checksum: Checksum = 255 - Sum(Bytes 0-6)"""
+    byte_list = list(byte_list)
+    byte_list.append((255 - sum(byte_list)) & 0xFF)
+    return "".join([f"{b:02X}" for b in byte_list])
+
+def checksum_ok(frame):
+    """True if an 8-byte standard command carries a valid Holtek checksum."""
+    return len(frame) == FEATURE_SIZE and (255 - sum(frame[:7])) & 0xFF == frame[7]
+
+def sector_of(frame):
+    """Returns the 16-bit DMA sector address of a 27H frame (e.g. 0x2A85)."""
+    return (frame[1] << 8) | frame[2]
+
+def polling_cmd(rate):
+    """Command 01H for a polling rate in Hz."""
+    return build_cmd([OP_POLLING, POLLING_CODES[rate], 0, 0, 0, 0, 0])
+
+def sensitivity_cmd(x=0x64, y=0x64):
+    """Command 0EH. 0x64 = 100% hardware scale on each axis."""
+    return build_cmd([OP_SENSITIVITY, x, y, 0, 0, 0, 0])
+
+def sensor_cmd(debounce_ms, lift=0x01):
+    """Command 04H: sensor lift distance and switch debounce time."""
+    return build_cmd([OP_SENSOR, lift, debounce_ms, 0, 0, 0, 0])
+
+def macro_slot_address(slot):
+    """16-bit DMA sector address of a hardware macro slot (1-based)."""
+    if not 1 <= slot <= MACRO_SLOT_COUNT:
+        raise ValueError(f"Macro slot {slot} out of range 1-{MACRO_SLOT_COUNT}")
+    return MACRO_SLOT_BASE + (slot - 1) * MACRO_SLOT_STRIDE
+
+def macro_slot_limit(transport=None):
+    """
+    Macro slots a flash may use: all of them on the emulator or with
+    ARMOR_UNVERIFIED_SLOTS=1, else only the verified slot 1. `transport`
+    is a transport name (defaults to $ARMOR_TRANSPORT).
+    """
+    name = (transport or os.environ.get("ARMOR_TRANSPORT") or "msdriver").lower()
+    if name == "emulator" or os.environ.get(UNVERIFIED_SLOTS_ENV) == "1":
+        return MACRO_SLOT_COUNT
+    return VERIFIED_MACRO_SLOTS
+
+def macro_slot_cmd(slot):
+    """27H sector select for a macro slot, re-addressed from the captured slot 1 frame."""
+    frame = bytearray.fromhex(SECTOR_CMDS["MACRO_1"])
+    addr = macro_slot_address(slot)
+    shift = (addr & 0xFF) - frame[2]
+    frame[1], frame[2] = addr >> 8, addr & 0xFF
+    frame[4] = (frame[4] - shift) & 0xFF
+    return frame.hex().upper()
+
+def macro_button(slot):
+    """Button mapping (4-byte hex) that fires a hardware macro slot."""
+    return f"{MODE_MACRO:02X}00{slot:02X}00"
+
+def stop_macro_cmd():
+    """Command 08H: halt the macro engine before unlocking secrecy memory."""
+    return build_cmd([OP_STOP_MACRO, 0xAA, 0xCC, 0xEE, 0x00, 0x00, 0x00])
+
+
+# =====================================================================
+# 5. SECTOR PAYLOAD BUILDERS
+# =====================================================================
+def color_payload(colors):
+    """DPI stage LED colours (RRGGBB hex strings) as one continuous sector payload."""
+    return "".join(colors)
+
+def dpi_payload(stages):
+    """DPI stages in 100-DPI steps, followed by the sensor terminator."""
+    return "".join([f"{int(d/100):02X}" for d in stages]) + DPI_TERMINATOR
+
+def buttons_payload(block):
+    """8 button mappings (4-byte hex strings) as one continuous sector payload."""
+    return "".join(block)
+
+def compile_macro(actions, repeat=1):
+    """
+    Compiles human-readable actions into an EXACT 128-byte hardware payload (hex).
+    The Holtek MCU expects exactly 128 bytes (4 chunks of 32 bytes) per macro.
+    If we send less, the USB Endpoint stalls and the mouse crashes.
+    Raises hid.MacroError on unknown keys or when the actions overflow the slot.
+    """
+    from .hid import encode_macro
+    return encode_macro(actions, repeat).hex().upper()
+
+def macro_chunks(macro_hex):
+    """Splits a 128-byte macro into the 4 full 32-byte chunks the endpoint expects."""
+    step = OUTPUT_SIZE * 2
+    return [macro_hex[i:i + step] for i in range(0, MACRO_SIZE * 2, step)]
@@ -0,0 +1,142 @@
+"""
+Armor Gaming Mouse Macro Recorder
+
+Turns a timestamped key/button event stream into the (state, key, delay_ms)
+actions compile_macro() takes, one action at a time as events arrive.
+
+Sources:
+  * read_events()  - text or JSON-lines replay from a file or pipe
+                     ("0.125 PRESS A" or {"t": 0.125, "state": "PRESS", "key": "A"})
+  * evdev_events() - raw Linux input_event records from /dev/input/eventN
+                     (EV_KEY only, auto-repeat ignored; no python-evdev needed)
+
+Delays are quantised to the device's 10ms step against the first event's
+timestamp, so every action lands on the nearest point of the 10ms grid and
+rounding error never accumulates over a long recording.
+"""
+
+import json
+import struct
+
+from .hid import DELAY_UNIT_MS, MacroError, key_code
+
+# struct input_event: struct timeval time; __u16 type; __u16 code; __s32 value
+INPUT_EVENT = struct.Struct("llHHi")
+EV_KEY = 0x01
+
+# Linux KEY_* / BTN_* codes -> armor.hid key names
+LINUX_KEYS = {
+    1: "ESC", 12: "MINUS", 13: "EQUAL", 14: "BACKSPACE", 15: "TAB", 26: "LEFTBRACE",
+    27: "RIGHTBRACE", 28: "ENTER", 29: "LCTRL", 39: "SEMICOLON", 40: "APOSTROPHE",
+    41: "GRAVE", 42: "LSHIFT", 43: "BACKSLASH", 51: "COMMA", 52: "DOT", 53: "SLASH",
+    54: "RSHIFT", 55: "KP_ASTERISK", 56: "LALT", 57: "SPACE", 58: "CAPSLOCK",
+    69: "NUMLOCK", 70: "SCROLLLOCK", 74: "KP_MINUS", 78: "KP_PLUS", 83: "KP_DOT",
+    86: "102ND", 87: "F11", 88: "F12", 96: "KP_ENTER", 97: "RCTRL", 98: "KP_SLASH",
+    99: "PRINTSCREEN", 100: "RALT", 102: "HOME", 103: "UP", 104: "PAGEUP", 105: "LEFT",
+    106: "RIGHT", 107: "END", 108: "DOWN", 109: "PAGEDOWN", 110: "INSERT", 111: "DELETE",
+    113: "MUTE", 114: "VOLUMEDOWN", 115: "VOLUMEUP", 116: "POWER", 117: "KP_EQUAL",
+    119: "PAUSE", 125: "LGUI", 126: "RGUI", 127: "COMPOSE",
+    0x110: "LCLICK", 0x111: "RCLICK", 0x112: "MCLICK", 0x113: "BACK", 0x114: "FORWARD",
+}
+LINUX_KEYS.update({2 + i: str((i + 1) % 10) for i in range(10)})
+LINUX_KEYS.update({16 + i: c for i, c in enumerate("QWERTYUIOP")})
+LINUX_KEYS.update({30 + i: c for i, c in enumerate("ASDFGHJKL")})
+LINUX_KEYS.update({44 + i: c for i, c in enumerate("ZXCVBNM")})
+LINUX_KEYS.update({59 + i: f"F{i + 1}" for i in range(10)})
+LINUX_KEYS.update({183 + i: f"F{i + 13}" for i in range(12)})
+LINUX_KEYS.update({code: f"KP_{n}" for code, n in ((71, 7), (72, 8), (73, 9), (75, 4), (76, 5),
+                                                   (77, 6), (79, 1), (80, 2), (81, 3), (82, 0))})
+
+
+# =====================================================================
+# 1. EVENT SOURCES -> (t_seconds, "PRESS"|"RELEASE", key)
+# =====================================================================
+def read_events(stream):
+    """Parses a replay stream line by line (blank lines and # comments skipped)."""
+    for n, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            if line.startswith("{"):
+                record = json.loads(line)
+                yield float(record["t"]), record["state"].upper(), record["key"]
+            else:
+                t, state, key = line.split(None, 2)
+                yield float(t), state.upper(), key
+        except (ValueError, KeyError) as e:
+            raise MacroError(f"Line {n}: cannot parse event '{line}' ({e})") from None
+
+def evdev_events(path, unknown="skip"):
+    """Reads EV_KEY presses/releases from a Linux input device node (or a captured dump)."""
+    size = INPUT_EVENT.size
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            raw = f.read(size)
+            if len(raw) < size:
+                return
+            sec, usec, ev_type, code, value = INPUT_EVENT.unpack(raw)
+            if ev_type != EV_KEY or value == 2:  # 2 = auto-repeat
+                continue
+            key = LINUX_KEYS.get(code)
+            if key is None:
+                if unknown == "skip":
+                    continue
+                raise MacroError(f"No macro key for Linux key code {code}")
+            yield sec + usec / 1e6, "PRESS" if value else "RELEASE", key
+
+
+# =====================================================================
+# 2. RECORDER
+# =====================================================================
+class MacroRecorder:
+    """
+    Incremental event -> action converter. An action is emitted (appended to
+    `actions` and passed to `on_action`) as soon as the next event fixes its
+    delay; finish() flushes the last one with a zero delay.
+    """
+
+    def __init__(self, on_action=None):
+        self.on_action = on_action
+        self.actions = []
+        self._t0 = None
+        self._pending = None  # (state, key) waiting for its delay
+        self._pending_step = 0
+
+    def feed(self, t, state, key):
+        if state not in ("PRESS", "RELEASE"):
+            raise MacroError(f"state must be PRESS or RELEASE, not '{state}'")
+        if isinstance(key, str):
+            key = key.upper()
+        key_code(key)  # Fail on the event that introduced an unknown key, not at compile time
+        if self._t0 is None:
+            self._t0 = t
+        step = round((t - self._t0) * 1000 / DELAY_UNIT_MS)
+        if self._pending is not None:
+            self._emit(max(0, step - self._pending_step) * DELAY_UNIT_MS)
+        self._pending = (state, key)
+        self._pending_step = step
+
+    def finish(self):
+        """Flushes the final action and returns the full action list."""
+        if self._pending is not None:
+            self._emit(0)
+            self._pending = None
+        return self.actions
+
+    def _emit(self, delay_ms):
+        action = (self._pending[0], self._pending[1], delay_ms)
+        self.actions.append(action)
+        if self.on_action is not None:
+            self.on_action(action)
+
+def record(events):
+    """Generator form: yields each action as soon as its delay is known."""
+    out = []
+    recorder = MacroRecorder(out.append)
+    for t, state, key in events:
+        recorder.feed(t, state, key)
+        while out:
+            yield out.pop(0)
+    recorder.finish()
+    yield from out
@@ -0,0 +1,97 @@
+"""
+Armor Gaming Mouse Macro Simulator
+
+Decodes compiled 128-byte macro payloads and plays them on a virtual clock:
+total run time, the event timeline, how long two or more keys are held at
+once, the most keys held at the same time, keys left stuck down, and
+transitions closer together than the switch debounce (KEY_RESPONSE_MS),
+which the host may never see.
+
+Repetitions are not simulated one by one. The keys held after a pass depend
+only on the keys held before it, so every pass after the second is an exact
+copy of the second. Two passes describe a macro with any repeat count.
+"""
+
+from collections import namedtuple
+
+from .decompiler import decode_macro
+from .hid import KEY_NAMES, encode_macro, key_code
+from .slots import macro_actions, spec_actions
+
+# time_ms is measured from the start of the macro
+MacroEvent = namedtuple("MacroEvent", "time_ms state key")
+# gap_ms: time since that key's previous edge; count: how many repetitions hit it
+DebounceHit = namedtuple("DebounceHit", "time_ms key gap_ms count")
+
+MacroSimulation = namedtuple("MacroSimulation", (
+    "repeat actions duration_ms pass_ms overlap_ms max_keys stuck debounce timeline"))
+
+
+def _pass(actions, t0, held, edges, debounce_ms, timeline):
+    """Plays one repetition from t0. Mutates held/edges; returns (end, overlap, max_keys, hits)."""
+    t = t0
+    overlap = 0
+    max_keys = len(held)
+    hits = []
+    for state, key, delay in actions:
+        if key != "NONE":
+            last = edges.get(key)
+            if debounce_ms and last is not None and t - last < debounce_ms:
+                hits.append((t, key, t - last))
+            edges[key] = t
+            if state == "PRESS":
+                held.add(key)
+            else:
+                held.discard(key)
+            if len(held) > max_keys:
+                max_keys = len(held)
+            if timeline is not None:
+                timeline.append(MacroEvent(t, state, key))
+        if len(held) > 1:
+            overlap += delay
+        t += delay
+    return t, overlap, max_keys, hits
+
+def simulate(payload, debounce_ms=None, timeline=False):
+    """
+    Simulates a compiled macro: a bytes/hex payload, or (repeat, actions) already
+    in decoded form (canonical key names).
+    With timeline=True the full event list is returned too (every repetition).
+    """
+    repeat, actions = payload if isinstance(payload, tuple) else decode_macro(payload)
+    runs = max(1, repeat)  # Repeat 0 still plays the sequence once
+
+    held, edges = set(), {}
+    events = [] if timeline else None
+    end1, overlap1, max1, hits1 = _pass(actions, 0, held, edges, debounce_ms, events)
+    pass_ms = end1
+    duration, overlap, max_keys = end1, overlap1, max1
+    debounce = [DebounceHit(t, k, g, 1) for t, k, g in hits1]
+    if runs > 1:
+        # Second pass: its state, overlap and debounce hits repeat for every later pass
+        end2, overlap2, max2, hits2 = _pass(actions, end1, held, edges, debounce_ms, events)
+        duration = end1 + (end2 - end1) * (runs - 1)
+        overlap += overlap2 * (runs - 1)
+        max_keys = max(max1, max2)
+        debounce += [DebounceHit(t, k, g, runs - 1) for t, k, g in hits2]
+        if timeline:
+            span = end2 - end1
+            second = events[len(events) - sum(1 for a in actions if a[1] != "NONE"):]
+            for n in range(2, runs):
+                events.extend(MacroEvent(e.time_ms + span * (n - 1), e.state, e.key) for e in second)
+    return MacroSimulation(repeat, actions, duration, pass_ms, overlap, max_keys,
+                           sorted(held, key=str), debounce, events)
+
+def _host_form(spec):
+    """A host-played macro in decoded form: canonical names, delays kept exact."""
+    return spec.get("repeat", 1), [(str(state).upper(), KEY_NAMES.get(key_code(key), key), delay)
+                                   for state, key, delay in spec_actions(spec)]
+
+def simulate_library(library, debounce_ms=None):
+    """
+    {name: MacroSimulation} for a macro library, simulated exactly as it would
+    be flashed ("host": true macros as the host plays them).
+    """
+    return {name: simulate(_host_form(spec) if spec.get("host") else
+                           encode_macro(macro_actions(spec), spec.get("repeat", 1)), debounce_ms)
+            for name, spec in library.items()}
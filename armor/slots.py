@@ -0,0 +1,132 @@
+"""
+Armor Gaming Mouse Macro Slot Allocator
+
+Maps a named macro library onto the hardware macro slots and rewrites the
+button blocks so every "MACRO:<name>" reference becomes the 09H mapping of
+the slot that macro landed in. Each slot is its own DMA sector write, so
+the shadow image diff only rewrites the slots whose payload changed.
+
+Allocation is deterministic: macros pinned with "slot" keep it, the rest
+fill the free slots in library order. Pin long-lived macros to keep them
+from moving when the library is edited. Macros marked "optimise": true go
+through the size optimiser before encoding. An entry may give "text" (with
+an optional "layout") instead of "actions" to type a string.
+
+Only slot 1 is verified on real hardware (see protocol.macro_slot_limit):
+a library that needs more slots, host-played macros included, is refused
+there unless ARMOR_UNVERIFIED_SLOTS=1.
+"""
+
+from collections import namedtuple
+
+from .hid import MacroError, encode_macro
+from .optimiser import optimise_macro
+from .protocol import MACRO_SLOT_COUNT, UNVERIFIED_SLOTS_ENV, macro_button, macro_slot_limit
+from .text import text_actions
+
+# Button entry that refers to a library macro by name instead of by slot ID
+MACRO_REF = "MACRO:"
+
+# Keys no keyboard sends, used to signal a host-played macro
+HOST_TRIGGERS = tuple(f"F{n}" for n in range(13, 25))
+
+# slots: {name: slot}, payloads: {slot: 128-byte hex}, buttons_*: resolved 4-byte hex lists,
+# triggers: {host macro name: trigger key}
+SlotAllocation = namedtuple("SlotAllocation", "slots payloads buttons_1 buttons_2 triggers")
+
+
+def unverified_hint(slot_count):
+    """Tells the user how to opt in to the derived slots, when the limit is what failed."""
+    if slot_count >= MACRO_SLOT_COUNT:
+        return ""
+    return (f" (only slot 1 is verified on hardware; set {UNVERIFIED_SLOTS_ENV}=1 or use the emulator "
+            f"to try the derived slots 2-{MACRO_SLOT_COUNT})")
+
+def assign_slots(library, slot_count=None):
+    """
+    Returns {name: slot} for a library of {name: {"actions", "repeat", "slot"?}}.
+    `slot_count` defaults to protocol.macro_slot_limit().
+    """
+    slot_count = slot_count or macro_slot_limit()
+    slots = {}
+    taken = {}
+    for name, spec in library.items():
+        slot = spec.get("slot")
+        if slot is None:
+            continue
+        if not 1 <= slot <= slot_count:
+            raise MacroError(f"Macro '{name}' pinned to slot {slot}, outside 1-{slot_count}"
+                             + unverified_hint(slot_count))
+        if slot in taken:
+            raise MacroError(f"Macros '{taken[slot]}' and '{name}' are both pinned to slot {slot}")
+        slots[name] = taken[slot] = slot
+
+    free = (s for s in range(1, slot_count + 1) if s not in taken)
+    for name in library:
+        if name not in slots:
+            slot = next(free, None)
+            if slot is None:
+                raise MacroError(f"{len(library)} macros (host-played ones included) do not fit "
+                                 f"{slot_count} hardware slot(s)" + unverified_hint(slot_count))
+            slots[name] = slot
+    return slots
+
+def resolve_buttons(block, slots):
+    """Replaces "MACRO:<name>" entries with the 09H mapping of that macro's slot."""
+    resolved = []
+    for entry in block:
+        if entry.upper().startswith(MACRO_REF):
+            name = entry[len(MACRO_REF):]
+            if name not in slots:
+                raise MacroError(f"Button refers to unknown macro '{name}'")
+            entry = macro_button(slots[name])
+        resolved.append(entry)
+    return resolved
+
+def assign_triggers(library):
+    """Returns {name: trigger key} for the host-played macros of a library."""
+    hosted = [name for name, spec in library.items() if spec.get("host")]
+    pinned = {name: library[name]["trigger"].upper() for name in hosted if library[name].get("trigger")}
+    if len(set(pinned.values())) < len(pinned):
+        raise MacroError("Two host macros share the same trigger key")
+    free = (key for key in HOST_TRIGGERS if key not in pinned.values())
+    triggers = {}
+    for name in hosted:
+        key = pinned.get(name) or next(free, None)
+        if key is None:
+            raise MacroError(f"No spare trigger key left for host macro '{name}'")
+        triggers[name] = key
+    return triggers
+
+def trigger_actions(key):
+    """The hardware side of a host macro: one tap of its trigger key."""
+    return [("PRESS", key, 10), ("RELEASE", key, 0)]
+
+def spec_actions(spec):
+    """The actions a library entry describes: its "actions", or its "text" typed out."""
+    if "text" in spec:
+        return text_actions(spec["text"], spec.get("layout", "us"), spec.get("delay_ms", 10))
+    return [tuple(a) for a in spec["actions"]]
+
+def macro_actions(spec):
+    """The action list a library entry encodes to (optimised if it asks for it)."""
+    actions = spec_actions(spec)
+    return optimise_macro(actions).actions if spec.get("optimise") else actions
+
+def allocate_macros(library, buttons_1=(), buttons_2=(), slot_count=None):
+    """
+    Assigns slots, encodes every macro and resolves the button references.
+    Raises MacroError if the library needs slots the target cannot take.
+    """
+    slots = assign_slots(library, slot_count)
+    triggers = assign_triggers(library)
+    payloads = {}
+    for name, spec in library.items():
+        try:
+            actions = trigger_actions(triggers[name]) if name in triggers else macro_actions(spec)
+            payload = encode_macro(actions, 1 if name in triggers else spec.get("repeat", 1))
+        except MacroError as e:
+            raise MacroError(f"Macro '{name}': {e}") from None
+        payloads[slots[name]] = payload.hex().upper()
+    return SlotAllocation(slots, dict(sorted(payloads.items())),
+                          resolve_buttons(buttons_1, slots), resolve_buttons(buttons_2, slots), triggers)
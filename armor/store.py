@@ -0,0 +1,323 @@
+"""
+Armor Gaming Mouse Profile Store
+
+A local archive for large numbers of .pbin profiles that mostly differ in a
+name or one DPI stage:
+  * Sections   - every profile is cut along the schema (name, settings
+                 block, each of the 32 button records, and any gaps) and
+                 each section is stored once, as a blob named by its
+                 SHA-256 under blobs/ab/. A renamed copy of a stored
+                 profile adds one small blob.
+  * Profiles   - identified by the SHA-256 of the whole record; adding the
+                 same bytes again only records the new source.
+  * Index      - SQLite tables of decoded fields (DPI stages, polling rate,
+                 button mappings and the macro slots they fire), so
+                 find(polling_rate=1000, macro_slot=4) is an indexed query
+                 instead of a scan of every file.
+Decoded fields come from convert.to_config. A .pbin does not record its
+polling rate, so it is indexed only when given (or the profile was added
+from a configuration with add_config); adding known bytes again with a
+polling rate fills it in if it was missing.
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+
+from .convert import to_config, to_profile
+from .pbin import PROFILE_SCHEMA, ProfileError, Record, Schema
+from .protocol import MACRO_SLOT_COUNT, MODE_MACRO
+from .slots import assign_slots, resolve_buttons
+
+DEFAULT_STORE = "armor_store"
+
+_TABLES = """
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY, hash TEXT NOT NULL UNIQUE, size INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY, digest TEXT NOT NULL UNIQUE, name TEXT NOT NULL,
+    polling_rate INTEGER, key_response_ms INTEGER);
+CREATE TABLE IF NOT EXISTS profile_sections (
+    profile INTEGER NOT NULL, position INTEGER NOT NULL, section INTEGER NOT NULL,
+    PRIMARY KEY (profile, position)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY, profile INTEGER NOT NULL, source TEXT, added REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS dpi_stages (
+    profile INTEGER NOT NULL, stage INTEGER NOT NULL, dpi INTEGER NOT NULL,
+    PRIMARY KEY (profile, stage)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS buttons (
+    profile INTEGER NOT NULL, button INTEGER NOT NULL, mapping TEXT NOT NULL, macro_slot INTEGER,
+    PRIMARY KEY (profile, button)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS profiles_name ON profiles (name);
+CREATE INDEX IF NOT EXISTS profiles_polling ON profiles (polling_rate);
+CREATE INDEX IF NOT EXISTS sections_used ON profile_sections (section);
+CREATE INDEX IF NOT EXISTS entries_profile ON entries (profile);
+CREATE INDEX IF NOT EXISTS dpi_value ON dpi_stages (dpi);
+CREATE INDEX IF NOT EXISTS buttons_mapping ON buttons (mapping);
+CREATE INDEX IF NOT EXISTS buttons_macro ON buttons (macro_slot);
+"""
+
+
+def sections(schema=PROFILE_SCHEMA):
+    """
+    (label, start, end) cuts covering a whole record: each top-level field
+    not inside an earlier one, nested records split per element, and the
+    gaps between fields as sections of their own.
+    """
+    cuts = []
+    offset = 0
+    for name in sorted(schema.fields, key=lambda n: schema.fields[n].offset):
+        start, length = schema.span(name)
+        if start < offset:
+            continue  # Inside a field already cut (dpi_stages lies in settings)
+        if start > offset:
+            cuts.append((f"gap@0x{offset:X}", offset, start))
+        f = schema.fields[name]
+        if isinstance(f.kind, Schema):
+            cuts.extend((f"{name}[{i}]", start + i * f.stride, start + (i + 1) * f.stride)
+                        for i in range(f.count))
+        else:
+            cuts.append((name, start, start + length))
+        offset = start + length
+    if offset < schema.size:
+        cuts.append((f"gap@0x{offset:X}", offset, schema.size))
+    return cuts
+
+def _macro_slot(mapping):
+    raw = bytes.fromhex(mapping) if len(mapping) == 8 else b""
+    return raw[2] if raw and raw[0] == MODE_MACRO else None
+
+
+class ProfileStore:
+    """A directory holding index.db and the section blobs. Use as a context manager."""
+
+    def __init__(self, directory=DEFAULT_STORE, schema=PROFILE_SCHEMA):
+        self.directory = directory
+        self.schema = schema
+        self.sections = sections(schema)
+        os.makedirs(os.path.join(directory, "blobs"), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(directory, "index.db"))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_TABLES)
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -----------------------------------------------------------------
+    # Blobs
+    # -----------------------------------------------------------------
+    def _blob_path(self, digest):
+        return os.path.join(self.directory, "blobs", digest[:2], digest)
+
+    def _put_blob(self, digest, data):
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    # -----------------------------------------------------------------
+    # Adding
+    # -----------------------------------------------------------------
+    def add(self, data, source=None, config=None, polling_rate=None, key_response_ms=None):
+        """
+        Stores one raw profile and returns its digest. The index is built
+        from `config` if given (a flash configuration describing the same
+        profile), otherwise decoded from the profile itself.
+        """
+        with self.db:
+            return self._add(data, source, config, polling_rate, key_response_ms)
+
+    def add_files(self, paths):
+        """Adds every profile of every file in one transaction; returns their digests."""
+        from .pbin import ProfileFile
+        digests = []
+        with self.db:
+            for path in paths:
+                with ProfileFile(path, self.schema) as pf:
+                    for i in range(len(pf)):
+                        label = path if len(pf) == 1 else f"{path}[{i}]"
+                        digests.append(self._add(pf[i].raw(), label))
+        return digests
+
+    def add_config(self, config, template, source=None, name=None):
+        """Converts a flash configuration (convert.to_profile) and stores it, indexed by the configuration."""
+        data, _ = to_profile(config, template, name)
+        with self.db:
+            return self._add(data, source, config)
+
+    def _add(self, data, source=None, config=None, polling_rate=None, key_response_ms=None):
+        data = bytes(data)
+        if len(data) != self.schema.size:
+            raise ProfileError(f"A profile record is {self.schema.size} bytes, not {len(data)}")
+        digest = hashlib.sha256(data).hexdigest()
+        row = self.db.execute("SELECT id FROM profiles WHERE digest = ?", (digest,)).fetchone()
+        if row is not None:
+            self._entry(row[0], source)
+            if config is not None or polling_rate is not None or key_response_ms is not None:
+                config = config or {}
+                self.db.execute(  # The bytes are known; fill in what the profile could not say
+                    "UPDATE profiles SET polling_rate = COALESCE(polling_rate, ?), "
+                    "key_response_ms = COALESCE(key_response_ms, ?) WHERE id = ?",
+                    (config.get("polling_rate", polling_rate),
+                     config.get("key_response_ms", key_response_ms), row[0]))
+            return digest
+
+        record = Record(data, 0, self.schema)
+        if config is None:
+            config = to_config(record, polling_rate, key_response_ms).result
+        slots = assign_slots(config.get("macros") or {}, MACRO_SLOT_COUNT)  # Indexing only, not a flash
+        buttons = resolve_buttons(config["buttons_1"], slots) + resolve_buttons(config["buttons_2"], slots)
+        profile = self.db.execute(
+            "INSERT INTO profiles (digest, name, polling_rate, key_response_ms) VALUES (?, ?, ?, ?)",
+            (digest, record.name, config.get("polling_rate"), config.get("key_response_ms"))).lastrowid
+        self._entry(profile, source)
+
+        rows = []
+        for position, (_, start, end) in enumerate(self.sections):
+            chunk = data[start:end]
+            section = hashlib.sha256(chunk).hexdigest()
+            found = self.db.execute("SELECT id FROM sections WHERE hash = ?", (section,)).fetchone()
+            if found is None:
+                self._put_blob(section, chunk)
+                found = (self.db.execute("INSERT INTO sections (hash, size) VALUES (?, ?)",
+                                         (section, len(chunk))).lastrowid,)
+            rows.append((profile, position, found[0]))
+        self.db.executemany("INSERT INTO profile_sections VALUES (?, ?, ?)", rows)
+        self.db.executemany("INSERT INTO dpi_stages VALUES (?, ?, ?)",
+                            [(profile, n + 1, dpi) for n, dpi in enumerate(config["dpi_stages"])])
+        mappings = [str(m).upper() for m in buttons]
+        self.db.executemany("INSERT INTO buttons VALUES (?, ?, ?, ?)",
+                            [(profile, n + 1, m, _macro_slot(m)) for n, m in enumerate(mappings)])
+        return digest
+
+    def _entry(self, profile, source):
+        self.db.execute("INSERT INTO entries (profile, source, added) VALUES (?, ?, ?)",
+                        (profile, source, time.time()))
+
+    # -----------------------------------------------------------------
+    # Reading
+    # -----------------------------------------------------------------
+    def resolve(self, prefix):
+        """(row id, full digest) of the profile whose digest starts with `prefix`."""
+        prefix = prefix.lower()
+        found = self.db.execute(
+            "SELECT id, digest FROM profiles WHERE digest >= ? AND digest < ? LIMIT 2",
+            (prefix, prefix + "g")).fetchall()
+        if len(found) != 1:
+            raise ProfileError(f"{'No' if not found else 'More than one'} profile matches '{prefix}'")
+        return found[0]
+
+    def get(self, digest):
+        """The raw profile with this digest (a unique prefix will do), reassembled and verified."""
+        profile, digest = self.resolve(digest)
+        hashes = [h for (h,) in self.db.execute(
+            "SELECT s.hash FROM profile_sections ps JOIN sections s ON s.id = ps.section "
+            "WHERE ps.profile = ? ORDER BY ps.position", (profile,))]
+        parts = []
+        for section in hashes:
+            try:
+                with open(self._blob_path(section), "rb") as f:
+                    parts.append(f.read())
+            except FileNotFoundError:
+                raise ProfileError(f"Profile {digest[:12]} is damaged: section {section[:12]} is missing") from None
+        data = b"".join(parts)
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ProfileError(f"Profile {digest[:12]} is damaged: its sections do not add up")
+        return data
+
+    def find(self, name=None, polling_rate=None, dpi=None, macro_slot=None, mapping=None, button=None):
+        """
+        Digests of the profiles matching every given condition. `dpi` matches
+        any stage; `macro_slot` / `mapping` match any button, or only
+        `button` (1-16) when it is given.
+        """
+        sql = ["SELECT p.digest FROM profiles p"]
+        where, params = [], []
+        if name is not None:
+            where.append("p.name = ?")
+            params.append(name)
+        if polling_rate is not None:
+            where.append("p.polling_rate = ?")
+            params.append(polling_rate)
+        if dpi is not None:
+            where.append("p.id IN (SELECT profile FROM dpi_stages WHERE dpi = ?)")
+            params.append(dpi)
+        if macro_slot is not None or mapping is not None or button is not None:
+            cond = []
+            for column, value in (("macro_slot", macro_slot), ("mapping", mapping), ("button", button)):
+                if value is not None:
+                    cond.append(f"{column} = ?")
+                    params.append(value.upper() if column == "mapping" else value)
+            where.append(f"p.id IN (SELECT profile FROM buttons WHERE {' AND '.join(cond)})")
+        if where:
+            sql.append("WHERE " + " AND ".join(where))
+        sql.append("ORDER BY p.name, p.digest")
+        return [d for (d,) in self.db.execute(" ".join(sql), params)]
+
+    def describe(self, digest):
+        """Indexed fields and sources of one profile, as a dict."""
+        profile, digest = self.resolve(digest)
+        name, polling_rate, key_response_ms = self.db.execute(
+            "SELECT name, polling_rate, key_response_ms FROM profiles WHERE id = ?", (profile,)).fetchone()
+        return {
+            "digest": digest,
+            "name": name,
+            "polling_rate": polling_rate,
+            "key_response_ms": key_response_ms,
+            "dpi_stages": [d for (d,) in self.db.execute(
+                "SELECT dpi FROM dpi_stages WHERE profile = ? ORDER BY stage", (profile,))],
+            "buttons": [m for (m,) in self.db.execute(
+                "SELECT mapping FROM buttons WHERE profile = ? ORDER BY button", (profile,))],
+            "sources": [s for (s,) in self.db.execute(
+                "SELECT source FROM entries WHERE profile = ? ORDER BY id", (profile,))],
+        }
+
+    # -----------------------------------------------------------------
+    # Removing and statistics
+    # -----------------------------------------------------------------
+    def remove(self, digest):
+        """Drops a profile and every section no other profile uses; returns how many sections went."""
+        profile, digest = self.resolve(digest)
+        with self.db:
+            used = {i for (i,) in self.db.execute(
+                "SELECT section FROM profile_sections WHERE profile = ?", (profile,))}
+            self.db.execute("DELETE FROM profiles WHERE id = ?", (profile,))
+            for table in ("profile_sections", "entries", "dpi_stages", "buttons"):
+                self.db.execute(f"DELETE FROM {table} WHERE profile = ?", (profile,))
+            orphans = [(i, h) for i in used if not self.db.execute(
+                "SELECT 1 FROM profile_sections WHERE section = ? LIMIT 1", (i,)).fetchone()
+                for (h,) in self.db.execute("SELECT hash FROM sections WHERE id = ?", (i,))]
+            self.db.executemany("DELETE FROM sections WHERE id = ?", [(i,) for i, _ in orphans])
+        for _, section in orphans:
+            try:
+                os.remove(self._blob_path(section))
+            except FileNotFoundError:
+                pass
+        return len(orphans)
+
+    def stats(self):
+        """Counts, and the bytes stored against the bytes the profiles add up to."""
+        profiles, entries, count, stored = self.db.execute(
+            "SELECT (SELECT COUNT(*) FROM profiles), (SELECT COUNT(*) FROM entries), "
+            "(SELECT COUNT(*) FROM sections), (SELECT COALESCE(SUM(size), 0) FROM sections)").fetchone()
+        return {
+            "profiles": profiles,
+            "entries": entries,
+            "sections": count,
+            "stored_bytes": stored,
+            "profile_bytes": profiles * self.schema.size,
+        }
@@ -0,0 +1,126 @@
+"""
+Armor Gaming Mouse Text Macro Compiler
+
+Turns a string into the shortest press/release sequence that types it on a
+given keyboard layout, for chat and login macros.
+
+Every character costs a press and a release of its key; what varies is the
+modifiers. Rather than wrapping each capital in its own Shift, the compiler
+searches the cheapest path through the held-modifier states, so a run like
+"HELLO" types under one held Shift, and Shift stays down across a space
+("HELLO WORLD") since Shift+Space is still a space.
+"""
+
+import unicodedata
+
+from .hid import MacroError
+from .optimiser import report
+
+SHIFT = "LSHIFT"
+ALTGR = "RALT"
+
+# Characters whose key types the same thing with Shift held
+SHIFT_SAFE = {" "}
+
+
+def _layout(base, shifted, extra=None):
+    """char -> (key, modifiers) from paired unshifted/shifted key rows."""
+    chars = {}
+    for key, (plain, upper) in base.items():
+        chars[plain] = (key, frozenset())
+        if upper:
+            chars[upper] = (key, frozenset((SHIFT,)))
+    for ch in shifted:
+        chars[ch.lower()] = (ch.upper(), frozenset())
+        chars[ch.upper()] = (ch.upper(), frozenset((SHIFT,)))
+    chars.update(extra or {})
+    chars.update({"\n": ("ENTER", frozenset()), "\t": ("TAB", frozenset())})
+    return chars
+
+_LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# key -> (unshifted char, shifted char)
+_US_KEYS = {
+    "1": ("1", "!"), "2": ("2", "@"), "3": ("3", "#"), "4": ("4", "$"), "5": ("5", "%"),
+    "6": ("6", "^"), "7": ("7", "&"), "8": ("8", "*"), "9": ("9", "("), "0": ("0", ")"),
+    "MINUS": ("-", "_"), "EQUAL": ("=", "+"), "LEFTBRACE": ("[", "{"), "RIGHTBRACE": ("]", "}"),
+    "BACKSLASH": ("\\", "|"), "SEMICOLON": (";", ":"), "APOSTROPHE": ("'", '"'),
+    "GRAVE": ("`", "~"), "COMMA": (",", "<"), "DOT": (".", ">"), "SLASH": ("/", "?"),
+    "SPACE": (" ", None),
+}
+
+_UK_KEYS = dict(_US_KEYS, **{
+    "2": ("2", '"'), "3": ("3", "£"), "APOSTROPHE": ("'", "@"), "GRAVE": ("`", "¬"),
+    "HASHTILDE": ("#", "~"), "102ND": ("\\", "|"),
+})
+del _UK_KEYS["BACKSLASH"]
+
+LAYOUTS = {
+    "us": _layout(_US_KEYS, _LETTERS),
+    "uk": _layout(_UK_KEYS, _LETTERS, {
+        "€": ("4", frozenset((ALTGR,))), "¦": ("GRAVE", frozenset((ALTGR,))),
+        "á": ("A", frozenset((ALTGR,))), "é": ("E", frozenset((ALTGR,))), "í": ("I", frozenset((ALTGR,))),
+        "ó": ("O", frozenset((ALTGR,))), "ú": ("U", frozenset((ALTGR,))),
+        "Á": ("A", frozenset((ALTGR, SHIFT))), "É": ("E", frozenset((ALTGR, SHIFT))),
+        "Í": ("I", frozenset((ALTGR, SHIFT))), "Ó": ("O", frozenset((ALTGR, SHIFT))),
+        "Ú": ("U", frozenset((ALTGR, SHIFT))),
+    }),
+}
+
+
+def _keys_for(text, layout):
+    chars = LAYOUTS.get(layout)
+    if chars is None:
+        raise MacroError(f"Unknown layout '{layout}' (known: {', '.join(LAYOUTS)})")
+    keys = []
+    for n, ch in enumerate(unicodedata.normalize("NFC", text)):
+        if ch not in chars:
+            raise MacroError(f"Character {ch!r} at position {n} cannot be typed on the '{layout}' layout")
+        key, mods = chars[ch]
+        allowed = (mods, mods | {SHIFT}) if ch in SHIFT_SAFE else (mods,)
+        keys.append((key, allowed))
+    return keys
+
+def _cheapest_path(keys):
+    """Modifier state to type each character in, minimising modifier edges."""
+    # cost[state] = (modifier edges so far, path of states)
+    cost = {frozenset(): (0, [])}
+    for _, allowed in keys:
+        step = {}
+        for state in allowed:
+            best = min(((c + len(prev ^ state), path) for prev, (c, path) in cost.items()),
+                       key=lambda item: item[0])
+            step[state] = (best[0], best[1] + [state])
+        cost = step
+    _, path = min(((c + len(state), path) for state, (c, path) in cost.items()), key=lambda item: item[0])
+    return path
+
+def text_actions(text, layout="us", delay_ms=10):
+    """
+    (state, key, delay_ms) actions that type `text`. Every action waits
+    delay_ms before the next; the last one does not wait.
+    """
+    keys = _keys_for(text, layout)
+    path = _cheapest_path(keys)
+    actions = []
+    held = frozenset()
+    for (key, _), state in zip(keys, path):
+        for mod in sorted(held - state):
+            actions.append(("RELEASE", mod, delay_ms))
+        for mod in sorted(state - held):
+            actions.append(("PRESS", mod, delay_ms))
+        held = state
+        actions.append(("PRESS", key, delay_ms))
+        actions.append(("RELEASE", key, delay_ms))
+    for mod in sorted(held):
+        actions.append(("RELEASE", mod, delay_ms))
+    if actions:
+        actions[-1] = actions[-1][:2] + (0,)
+    return actions
+
+def compile_text(text, layout="us", delay_ms=10):
+    """
+    MacroReport for a typed string: `fits` is False (and `bytes_free`
+    negative) when it needs more than one hardware slot.
+    """
+    return report(text_actions(text, layout, delay_ms))
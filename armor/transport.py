@@ -0,0 +1,268 @@
+"""
+Armor Gaming Mouse HID Transports
+
+One interface (open / close / set_feature / get_feature / write_output) with
+two backends:
+  * MSDriverTransport - the manufacturer's MSDriver.dll (Windows + real mouse)
+  * EmulatorTransport - the in-process HoltekEmulator (any OS, no hardware)
+
+Pick one by name with open_transport(), or through the ARMOR_TRANSPORT
+environment variable ("msdriver" or "emulator").
+"""
+
+import ctypes
+import os
+import time
+
+from .pacing import MCU_RELOAD_DELAY
+from .protocol import FEATURE_SIZE, OUTPUT_SIZE, PID, VID
+
+
+class TransportError(Exception):
+    """Raised when a HID link cannot be established."""
+
+
+# =====================================================================
+# 0. REUSABLE REPORT BUFFERS
+# =====================================================================
+class Frame:
+    """
+    One fixed-size HID report backed by a preallocated bytearray. The ctypes
+    array and the memoryview share that memory, so loading a frame and
+    handing it to the DLL never allocates or round-trips through hex.
+    """
+
+    __slots__ = ("size", "data", "view", "cbuf", "_zeros")
+
+    def __init__(self, size):
+        self.size = size
+        self.data = bytearray(size)
+        self.view = memoryview(self.data)
+        self.cbuf = (ctypes.c_byte * size).from_buffer(self.data)
+        self._zeros = bytes(size)
+
+    def load(self, data):
+        """Copies bytes (or any buffer) in place, zero-padding up to the report size."""
+        n = len(data)
+        if n > self.size:
+            raise ValueError(f"{n}-byte payload does not fit a {self.size}-byte report")
+        self.view[:n] = data
+        self.view[n:] = self._zeros[n:]
+        return self
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        return self.view[index]
+
+    def hex(self):
+        return self.data.hex().upper()
+
+
+class Transport:
+    """Base class for a HID link to the mouse."""
+
+    name = "base"
+
+    @property
+    def device_id(self):
+        """Identifies the mouse behind the link (journals refuse to resume onto another one)."""
+        return self.name
+
+    def open(self):
+        """Acquires the device handles. Returns True on success."""
+        raise NotImplementedError
+
+    def close(self):
+        """Releases the device handles."""
+        raise NotImplementedError
+
+    def set_feature(self, data):
+        """Sends an 8-byte Feature Report. Returns True if the device took it."""
+        raise NotImplementedError
+
+    def get_feature(self, size=FEATURE_SIZE):
+        """Reads a Feature Report back from the device (bytes, or None on failure)."""
+        raise NotImplementedError
+
+    def write_output(self, data):
+        """Sends a 32-byte Output Report. Returns True if the device took it."""
+        raise NotImplementedError
+
+    def probe(self):
+        """Re-opens the handles: succeeds only while the MCU is enumerated on the bus."""
+        self.close()
+        try:
+            return bool(self.open())
+        except TransportError:
+            return False
+
+    def __enter__(self):
+        if not self.open():
+            raise TransportError(f"Could not open {self.name} transport")
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# =====================================================================
+# 1. MANUFACTURER DLL BACKEND
+# =====================================================================
+class MSDriverTransport(Transport):
+    """Talks to the mouse through the manufacturer's MSDriver.dll."""
+
+    name = "msdriver"
+
+    def __init__(self, dll_path="./MSDriver.dll", vid=VID, pid=PID):
+        self.dll_path = dll_path
+        self.vid = vid
+        self.pid = pid
+        self.driver = None
+        # Preallocated per-transport report buffers (one set per device handle)
+        self._feature = Frame(FEATURE_SIZE)
+        self._readback = Frame(FEATURE_SIZE)
+        self._output = Frame(OUTPUT_SIZE)
+
+    @property
+    def device_id(self):
+        # The DLL has no serial or path selector: mice of the same model look alike
+        return f"{self.name}:{self.vid:04X}:{self.pid:04X}"
+
+    def _load(self):
+        # Load the manufacturer's C++ library to communicate with the USB stack
+        try:
+            driver = ctypes.CDLL(self.dll_path)
+        except OSError as e:
+            raise TransportError(f"DLL Load Failed: {e}") from e
+
+        # DLL Function Signatures
+        driver.Set_VIDPID.argtypes = [ctypes.c_int, ctypes.c_int]
+        driver.SetFeature.argtypes = [ctypes.POINTER(ctypes.c_byte), ctypes.c_int]
+        driver.SetFeature.restype = ctypes.c_int
+        driver.GetFeature.argtypes = [ctypes.POINTER(ctypes.c_byte), ctypes.c_int]
+        driver.GetFeature.restype = ctypes.c_int
+        driver.WriteUSB.argtypes = [ctypes.POINTER(ctypes.c_byte), ctypes.c_int]
+        driver.WriteUSB.restype = ctypes.c_int
+        driver.Open_FeatureDevice.restype = ctypes.c_int
+        driver.Open_ReportDevice.restype = ctypes.c_int
+        return driver
+
+    def open(self):
+        if self.driver is None:
+            self.driver = self._load()
+        self.driver.Set_VIDPID(self.vid, self.pid)
+        return bool(self.driver.Open_FeatureDevice()) and bool(self.driver.Open_ReportDevice())
+
+    def close(self):
+        if self.driver is not None:
+            self.driver.Close_FeatureDevice()
+            self.driver.Close_ReportDevice()
+
+    def set_feature(self, data):
+        frame = data if isinstance(data, Frame) else self._feature.load(data)
+        return self.driver.SetFeature(frame.cbuf, FEATURE_SIZE) != 0
+
+    def get_feature(self, size=FEATURE_SIZE):
+        frame = self._readback if size == FEATURE_SIZE else Frame(size)
+        if self.driver.GetFeature(frame.cbuf, size) == 0:
+            return None
+        return bytes(frame.data)
+
+    def write_output(self, data):
+        # Pads the data with zeros if it doesn't fill the full 32-byte USB buffer
+        frame = data if isinstance(data, Frame) else self._output.load(data)
+        return self.driver.WriteUSB(frame.cbuf, OUTPUT_SIZE) != 0
+
+
+# =====================================================================
+# 2. EMULATOR BACKEND
+# =====================================================================
+class EmulatorTransport(Transport):
+    """Routes reports into an in-process HoltekEmulator."""
+
+    name = "emulator"
+
+    def __init__(self, device=None, **device_kwargs):
+        if device is None:
+            from .emulator import HoltekEmulator
+            device = HoltekEmulator(**device_kwargs)
+        self.device = device
+        self.is_open = False
+
+    @property
+    def device_id(self):
+        return f"{self.name}:{self.device.serial}"
+
+    def open(self):
+        self.is_open = self.device.present()
+        return self.is_open
+
+    def close(self):
+        self.is_open = False
+
+    def set_feature(self, data):
+        return self.is_open and self.device.feature(data.view if isinstance(data, Frame) else data)
+
+    def get_feature(self, size=FEATURE_SIZE):
+        if not (self.is_open and self.device.present()):
+            return None
+        return bytes(self.device.read_feature()[:size])
+
+    def write_output(self, data):
+        return self.is_open and self.device.output(data.view if isinstance(data, Frame) else data)
+
+
+TRANSPORTS = {
+    MSDriverTransport.name: MSDriverTransport,
+    EmulatorTransport.name: EmulatorTransport,
+}
+
+def get_transport(name=None, **kwargs):
+    """Creates a transport by name (defaults to $ARMOR_TRANSPORT or msdriver)."""
+    name = (name or os.environ.get("ARMOR_TRANSPORT") or MSDriverTransport.name).lower()
+    if name not in TRANSPORTS:
+        raise TransportError(f"Unknown transport '{name}' (choose from {', '.join(TRANSPORTS)})")
+    return TRANSPORTS[name](**kwargs)
+
+def open_transport(name=None, **kwargs):
+    """Creates a transport by name and opens its device handles."""
+    transport = get_transport(name, **kwargs)
+    if not transport.open():
+        raise TransportError(f"Could not open {transport.name} transport")
+    return transport
+
+
+# =====================================================================
+# 3. RECONNECT DETECTION
+# =====================================================================
+def wait_for_reconnect(transport, timeout=3.0, interval=0.005, drop_window=0.1, reload=MCU_RELOAD_DELAY):
+    """
+    Blocks until the MCU is back on the bus after the commit soft-reboot,
+    polling with handle re-open attempts instead of a fixed sleep.
+
+    Phase 1 (up to `drop_window`) waits for the device to drop off the bus;
+    if it is never seen missing, the reboot was too quick to catch (or has
+    not started yet), so the wait falls back to the `reload` delay the MCU
+    needs to copy its flash into RAM. Phase 2 polls every `interval` until
+    the handles open again, raising TransportError after `timeout`.
+    Returns the seconds spent waiting.
+    """
+    start = time.perf_counter()
+    deadline = start + drop_window
+    while transport.probe():
+        now = time.perf_counter()
+        if now >= deadline:
+            remaining = start + reload - now
+            if remaining > 0:
+                time.sleep(remaining)
+            return time.perf_counter() - start
+        time.sleep(interval)
+
+    deadline = start + timeout
+    while not transport.probe():
+        if time.perf_counter() >= deadline:
+            raise TransportError(f"Device did not reconnect within {timeout:.1f}s")
+        time.sleep(interval)
+    return time.perf_counter() - start
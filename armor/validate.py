@@ -0,0 +1,314 @@
+"""
+Armor Gaming Mouse Profile Validator
+
+Checks flash configurations and .pbin profiles against the hardware limits,
+and normalises what can be fixed without guessing:
+  * polling_rate     - 1000 / 500 / 250 / 125 Hz (else 1000, as the scripts do)
+  * key_response_ms  - 4-26ms, clamped
+  * dpi_stages       - 1-6 stages, multiples of 100 up to 6200, rounded/clamped
+  * dpi_colors       - one RRGGBB per stage ("#" and case are normalised)
+  * buttons          - 8 + 8 mappings of 4 bytes; every known mode's code
+                       must be legal, "MACRO:<name>" must name a macro
+  * macros           - each must fit its 128-byte slot ("host": true macros
+                       are exempt); the library, and any 09H mapping, must
+                       fit protocol.macro_slot_limit() (slot 1 on hardware
+                       unless the derived slots are opted in)
+A .pbin is decoded with convert.to_config and checked the same way; its
+normalised form is written back over the profile's own bytes.
+
+sweep() runs the checks over whole directory trees in a process pool and
+returns one JSON-ready report.
+"""
+
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from .convert import to_config, to_profile
+from .hid import CONSUMER, MOUSE, MacroError, encode_macro
+from .pbin import PROFILE_SIZE, ProfileFile
+from .protocol import MACRO_SLOT_COUNT, MODE_MACRO, POLLING_CODES, macro_slot_limit
+from .slots import MACRO_REF, assign_slots, macro_actions, unverified_hint
+
+# severity: "error" (cannot be flashed as is) or "warning"; fixed: normalise() corrected it
+Issue = namedtuple("Issue", "field severity message fixed")
+
+MAX_DPI = 6200
+DPI_STEP = 100
+MAX_STAGES = 6
+KEY_RESPONSE_RANGE = (4, 26)
+DEFAULT_POLLING_RATE = 1000
+
+_MOUSE_CODES = set(MOUSE.values())
+_CONSUMER_CODES = set(CONSUMER.values())
+
+# Button mode -> (name, check(b1, b2, b3) -> problem or None)
+BUTTON_MODES = {
+    0x00: ("disabled", lambda b1, b2, b3: None if not (b1 or b2 or b3) else "disabled mapping with a payload"),
+    0x01: ("mouse", lambda b1, b2, b3: None if b2 in _MOUSE_CODES else f"mouse button code {b2:02X}"),
+    0x03: ("consumer", lambda b1, b2, b3: None if (b1 << 8 | b2) in _CONSUMER_CODES
+           else f"consumer usage {b1 << 8 | b2:04X}"),
+    0x04: ("scroll", lambda b1, b2, b3: None if b2 in (1, 2) else f"scroll direction {b2:02X}"),
+    0x07: ("dpi", lambda b1, b2, b3: None if b2 in (1, 2, 3) else f"DPI action {b2:02X}"),
+    0x09: ("macro", lambda b1, b2, b3: None if 1 <= b2 <= MACRO_SLOT_COUNT else f"macro slot {b2}"),
+    0x0A: ("fire", lambda b1, b2, b3: None if b1 in _MOUSE_CODES and b2 and b3
+           else f"fire key {b1:02X} / {b2}ms / {b3} shot(s)"),
+}
+# Modes seen in vendor data whose codes we cannot check yet
+UNVERIFIED_MODES = {0x05}
+
+
+# =====================================================================
+# 1. CONFIGURATIONS
+# =====================================================================
+def _is_hex(text, size):
+    try:
+        return len(bytes.fromhex(text)) == size and " " not in text
+    except ValueError:
+        return False
+
+def _check_button(field, entry, macros, slot_count):
+    entry = str(entry)
+    if entry.upper().startswith(MACRO_REF):
+        name = entry[len(MACRO_REF):]
+        return None if name in macros else Issue(field, "error", f"refers to unknown macro '{name}'", False)
+    if not _is_hex(entry, 4):
+        return Issue(field, "error", f"'{entry}' is not a 4-byte hex mapping", False)
+    mode, b1, b2, b3 = bytes.fromhex(entry)
+    if mode in UNVERIFIED_MODES:
+        return Issue(field, "warning", f"mode {mode:02X} is not verified", False)
+    if mode not in BUTTON_MODES:
+        return Issue(field, "error", f"unknown button mode {mode:02X}", False)
+    name, check = BUTTON_MODES[mode]
+    problem = check(b1, b2, b3)
+    if problem:
+        return Issue(field, "error", f"illegal {name} mapping: {problem}", False)
+    if mode == MODE_MACRO and b2 > slot_count:
+        return Issue(field, "error", f"macro slot {b2} is outside 1-{slot_count}" + unverified_hint(slot_count),
+                     False)
+    return None
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _list_field(config, name, issue):
+    """The list under `name` ([] if missing); anything else is reported and comes back as None."""
+    value = config.get(name, [])
+    if isinstance(value, list):
+        return value
+    issue(name, f"{type(value).__name__} where a list is expected", False)
+    return None
+
+def normalise(config, slot_count=None):
+    """
+    (normalised copy, [Issue]) for one flash configuration. Issues that were
+    fixed in the copy have fixed=True; the rest still block flashing if
+    their severity is "error". A malformed configuration (wrong types,
+    not even a JSON object) is reported as issues, never raised.
+    `slot_count` defaults to protocol.macro_slot_limit().
+    """
+    slot_count = slot_count or macro_slot_limit()
+    config = json.loads(json.dumps(config))  # Deep copy of plain JSON data
+    issues = []
+
+    def issue(field, message, fixed, severity="error"):
+        issues.append(Issue(field, severity, message, fixed))
+
+    if not isinstance(config, dict):
+        issue("config", f"{type(config).__name__} where a configuration object is expected", False)
+        return config, issues
+
+    rate = config.get("polling_rate")
+    if rate is not None and not (_is_int(rate) and rate in POLLING_CODES):
+        issue("polling_rate", f"{rate}Hz is not one of {sorted(POLLING_CODES)}", True)
+        config["polling_rate"] = DEFAULT_POLLING_RATE
+    debounce = config.get("key_response_ms")
+    low, high = KEY_RESPONSE_RANGE
+    if debounce is not None and not _is_int(debounce):
+        issue("key_response_ms", f"'{debounce}' is not a whole number of ms", False)
+    elif debounce is not None and not low <= debounce <= high:
+        issue("key_response_ms", f"{debounce}ms is outside {low}-{high}ms", True)
+        config["key_response_ms"] = min(high, max(low, debounce))
+
+    stages = _list_field(config, "dpi_stages", issue)
+    if stages is not None and not 1 <= len(stages) <= MAX_STAGES:
+        issue("dpi_stages", f"{len(stages)} stages (1-{MAX_STAGES} allowed)", len(stages) > MAX_STAGES)
+        config["dpi_stages"] = stages = stages[:MAX_STAGES]
+    for n, dpi in enumerate(stages or []):
+        if not isinstance(dpi, (int, float)) or isinstance(dpi, bool):
+            issue(f"dpi_stages[{n}]", f"'{dpi}' is not a DPI value", False)
+            continue
+        fixed = min(MAX_DPI, max(DPI_STEP, int(round(dpi / DPI_STEP)) * DPI_STEP))
+        if fixed != dpi:
+            issue(f"dpi_stages[{n}]", f"{dpi} DPI is not a multiple of {DPI_STEP} up to {MAX_DPI}", True)
+            stages[n] = fixed
+
+    colors = _list_field(config, "dpi_colors", issue)
+    for n, color in enumerate(colors or []):
+        clean = str(color).lstrip("#").upper()
+        if not _is_hex(clean, 3):
+            issue(f"dpi_colors[{n}]", f"'{color}' is not an RRGGBB colour", False)
+        elif clean != color:
+            issue(f"dpi_colors[{n}]", f"'{color}' written as '{clean}'", True, "warning")
+            colors[n] = clean
+    if colors is not None and stages is not None and len(colors) != len(stages):
+        issue("dpi_colors", f"{len(colors)} colours for {len(stages)} DPI stages", False, "warning")
+
+    macros = config.get("macros") or {}
+    if not isinstance(macros, dict):
+        issue("macros", f"{type(macros).__name__} where a {{name: macro}} object is expected", False)
+        macros = {}
+    for block in ("buttons_1", "buttons_2"):
+        entries = _list_field(config, block, issue)
+        if entries is None:
+            continue
+        if len(entries) != 8:
+            issue(block, f"{len(entries)} mappings (8 required)", True)
+            config[block] = entries = (list(entries) + ["00000000"] * 8)[:8]
+        for n, entry in enumerate(entries):
+            found = _check_button(f"{block}[{n}]", entry, macros, slot_count)
+            if found:
+                issues.append(found)
+            elif not str(entry).upper().startswith(MACRO_REF) and entry != str(entry).upper():
+                entries[n] = str(entry).upper()
+
+    library = {}
+    for name, spec in macros.items():
+        if not isinstance(spec, dict):
+            issue(f"macros.{name}", f"{type(spec).__name__} where a macro object is expected", False)
+            continue
+        library[name] = spec
+        if spec.get("host"):
+            continue
+        try:
+            encode_macro(macro_actions(spec), spec.get("repeat", 1))
+        except (MacroError, AttributeError, IndexError, KeyError, TypeError, ValueError) as e:
+            issue(f"macros.{name}", str(e) or type(e).__name__, False)
+    try:
+        assign_slots(library, slot_count)
+    except (MacroError, TypeError) as e:
+        issue("macros", str(e), False)
+    return config, issues
+
+def validate(config):
+    """The [Issue] list of one flash configuration (nothing is changed)."""
+    return normalise(config)[1]
+
+
+# =====================================================================
+# 2. FILES
+# =====================================================================
+def _summary(index, name, issues):
+    return {
+        "index": index,
+        "name": name,
+        "ok": not any(i.severity == "error" and not i.fixed for i in issues),
+        "issues": [i._asdict() for i in issues],
+    }
+
+def validate_file(path, fix_path=None):
+    """
+    Report dict for one .pbin / profile.bin / configuration .json. With
+    `fix_path`, the normalised file is written there.
+    """
+    result = {"file": path, "kind": None, "profiles": [], "error": None}
+    try:
+        if path.lower().endswith(".json"):
+            result["kind"] = "config"
+            with open(path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+            fixed, issues = normalise(config)
+            result["profiles"].append(_summary(0, os.path.basename(path), issues))
+            if fix_path:
+                with open(fix_path, "w", encoding="utf-8") as f:
+                    json.dump(fixed, f, indent=2)
+        else:
+            result["kind"] = "pbin"
+            out = []
+            with ProfileFile(path) as pf:
+                for i, record in enumerate(pf):
+                    config, notes = to_config(record, None, None)
+                    fixed, issues = normalise(config)
+                    # Rounding already happened while decoding: report it as fixed
+                    issues = [Issue("decode", "warning", n, True) for n in notes] + issues
+                    if not record.name:
+                        issues.append(Issue("name", "warning", "profile has no name", False))
+                    result["profiles"].append(_summary(i, record.name, issues))
+                    if fix_path:
+                        raw = bytes(record.raw())
+                        out.append(to_profile(fixed, raw).result)
+            if fix_path:
+                with open(fix_path, "wb") as f:
+                    f.write(b"".join(out))
+    except (OSError, ValueError) as e:  # Unreadable, not a profile, bad JSON
+        result["error"] = str(e) if path in str(e) else f"{path}: {e}"
+    except Exception as e:  # One odd file must not take the whole sweep (and its pool) down
+        result["error"] = f"{path}: {type(e).__name__}: {e}"
+    result["ok"] = result["error"] is None and all(p["ok"] for p in result["profiles"])
+    return result
+
+def _is_candidate(path):
+    lower = path.lower()
+    if lower.endswith((".pbin", ".json")):
+        return True
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return False
+    return lower.endswith(".bin") and size and size % PROFILE_SIZE == 0
+
+def find_files(paths):
+    """
+    (path, relative path) of the profile and configuration files under
+    `paths` (files, or directory trees walked without hidden folders).
+    """
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+                for name in sorted(files):
+                    full = os.path.join(root, name)
+                    if _is_candidate(full):
+                        found.append((full, os.path.relpath(full, path)))
+        else:
+            found.append((path, os.path.basename(path)))
+    return found
+
+def _validate_task(task):
+    return validate_file(*task)
+
+def sweep(paths, workers=None, fix_dir=None):
+    """
+    Validates every file under `paths` across a process pool (`workers`,
+    default one per CPU; 1 runs in-process) and returns the report dict.
+    With `fix_dir`, normalised copies are written there, mirroring the tree.
+    """
+    tasks = []
+    for path, relative in find_files(paths):
+        fix_path = None
+        if fix_dir:
+            fix_path = os.path.join(fix_dir, relative)
+            os.makedirs(os.path.dirname(fix_path), exist_ok=True)
+        tasks.append((path, fix_path))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) < 2:
+        results = [_validate_task(t) for t in tasks]
+    else:
+        # Large chunks: one file takes well under a millisecond, so IPC would dominate
+        chunk = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_validate_task, tasks, chunksize=chunk))
+
+    issues = [i for r in results for p in r["profiles"] for i in p["issues"]]
+    return {
+        "files": len(results),
+        "profiles": sum(len(r["profiles"]) for r in results),
+        "failed": [r["file"] for r in results if not r["ok"]],
+        "errors": sum(1 for i in issues if i["severity"] == "error" and not i["fixed"]),
+        "warnings": sum(1 for i in issues if i["severity"] == "warning"),
+        "fixed": sum(1 for i in issues if i["fixed"]),
+        "results": results,
+    }
@@ -0,0 +1,44 @@
+"""
+Armor Gaming Mouse Windows Settings
+
+The software half of the configuration: pointer speed, acceleration,
+double-click time and wheel scroll lines live in the OS, not the MCU,
+and are applied through the User32 API exactly like the official app.
+"""
+
+import ctypes
+
+# Maps the UI 1-11 pointer slider to the Windows internal 1-20 scale
+POINTER_SPEED_MAP = {1: 1, 2: 2, 3: 4, 4: 6, 5: 8, 6: 10, 7: 12, 8: 14, 9: 16, 10: 18, 11: 20}
+
+SPI_SETMOUSE = 0x0004
+SPI_SETWHEELSCROLLLINES = 0x0069
+SPI_SETMOUSESPEED = 0x0071
+SPIF_BROADCAST = 3  # Update the user profile and notify every open application
+
+
+def double_click_ms(speed):
+    """Maps the 0-10 slider to the Windows double-click window (900ms down to 200ms)."""
+    return 900 - (speed * 70)
+
+def apply_os_settings(pointer_speed=6, enhance_precision=False, double_click_speed=5,
+                      scroll_one_page=False, scroll_lines=3):
+    """
+    Hooks into the Windows User32 API to change OS-level mouse configurations.
+    Returns False (and changes nothing) when not running on Windows.
+    """
+    if not hasattr(ctypes, "windll"):
+        return False
+    user32 = ctypes.windll.user32
+
+    user32.SetDoubleClickTime(double_click_ms(double_click_speed))
+
+    # -1 tells Windows to use "Page Scroll" mode
+    user32.SystemParametersInfoW(SPI_SETWHEELSCROLLLINES, -1 if scroll_one_page else scroll_lines, 0, SPIF_BROADCAST)
+
+    user32.SystemParametersInfoW(SPI_SETMOUSESPEED, 0, ctypes.c_void_p(POINTER_SPEED_MAP.get(pointer_speed, 10)), SPIF_BROADCAST)
+
+    # Enhance Pointer Precision needs the 3-integer acceleration curve array
+    arr = (ctypes.c_int * 3)(6, 10, 1) if enhance_precision else (ctypes.c_int * 3)(0, 0, 0)
+    user32.SystemParametersInfoW(SPI_SETMOUSE, 0, ctypes.byref(arr), SPIF_BROADCAST)
+    return True
@@ -1,36 +1,45 @@
+import json
 import os
+import sys
+
+from armor.pbin import diff_files
 
 FILE_1 = "./Data/Default.pbin"
 FILE_2 = "./Data/Profile-yellow.pbin"
 
+# Usage: python compare_pbin.py [FILE_1 FILE_2] [--json]
+args = [a for a in sys.argv[1:] if a != "--json"]
+as_json = "--json" in sys.argv[1:]
+if len(args) == 2:
+    FILE_1, FILE_2 = args
+
 if not os.path.exists(FILE_1) or not os.path.exists(FILE_2):
     print("❌ Error: Make sure both .pbin files are in this folder!")
     exit()
 
-with open(FILE_1, "rb") as f1, open(FILE_2, "rb") as f2:
-    data1 = f1.read()
-    data2 = f2.read()
+ranges = diff_files(FILE_1, FILE_2)
+
+if as_json:
+    print(json.dumps([r._asdict() for r in ranges], indent=2))
+    exit()
 
-print(f"📊 {FILE_1} Size: {len(data1)} bytes")
-print(f"📊 {FILE_2} Size: {len(data2)} bytes")
+print(f"📊 {FILE_1} Size: {os.path.getsize(FILE_1)} bytes")
+print(f"📊 {FILE_2} Size: {os.path.getsize(FILE_2)} bytes")
 
-if len(data1) != len(data2):
+if os.path.getsize(FILE_1) != os.path.getsize(FILE_2):
     print("⚠️ Warning: The files are different sizes! The comparison might be shifted.")
+    print("   The tail of the longer file is reported as one range.")
 
 print("\n--- HEX DIFFERENCE REPORT ---")
-print("Offset | Default | New Profile")
-print("------------------------------")
-
-diff_count = 0
-# Compare up to the length of the shorter file
-min_len = min(len(data1), len(data2))
-
-for i in range(min_len):
-    if data1[i] != data2[i]:
-        # Print the memory offset and the hex values
-        print(f"0x{i:04X} |   {data1[i]:02X}    |    {data2[i]:02X}")
-        diff_count += 1
-
-print("------------------------------")
-print(f"✅ Found {diff_count} byte differences.")
-print("👉 COPY AND PASTE THIS OUTPUT TO THE AI!")
\ No newline at end of file
+print("Offset        | Field(s)              | Default -> New Profile")
+print("----------------------------------------------------------------")
+
+for r in ranges:
+    fields = ", ".join(r.fields[:3]) + (" ..." if len(r.fields) > 3 else "") or "raw bytes"
+    old = r.old if len(r.old) <= 24 else r.old[:24] + "..."
+    new = r.new if len(r.new) <= 24 else r.new[:24] + "..."
+    print(f"0x{r.start:04X}-0x{r.end - 1:04X} | {fields:<21} | {old} -> {new}")
+
+print("----------------------------------------------------------------")
+print(f"✅ Found {sum(r.end - r.start for r in ranges)} byte differences in {len(ranges)} range(s).")
+print("👉 COPY AND PASTE THIS OUTPUT TO THE AI!")
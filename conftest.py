@@ -0,0 +1,5 @@
+"""
+Armor Gaming Mouse Test Configuration
+
+Keeps the repository root importable, so plain `pytest` finds the armor package.
+"""
@@ -4,11 +4,11 @@ Reverse-Engineered by Custom Protocol Injection
 MCU: Holtek HT68FB571
 """
 
-import ctypes
+import sys
 import time
 
-# Start the execution stopwatch
-start_time = time.perf_counter()
+from armor import AdaptivePacer, PacingError, TransportError, apply_os_settings, get_transport
+from armor.windows import double_click_ms
 
 # =====================================================================
 # 1. USER CONFIGURATION (CUSTOMIZE YOUR MOUSE HERE)
@@ -47,8 +47,9 @@ SCROLL_LINES = 3
 
 # --- 🚀 ADVANCED TUNING (Communication Speed Optimization) ---
 
-# USB_DELAY: Time to pause between sending USB packets (in seconds).
-# 0.005s (5ms) is incredibly fast but stable for modern USB HID protocols.
+# USB_DELAY: Upper bound for the pause between USB packets (in seconds).
+# Packets go out as soon as the mouse acknowledges the previous one; the pacer
+# only backs off towards this value if a packet is refused.
 USB_DELAY = 0.005 
 
 # MCU_WAKE_DELAY: Wait time for the mouse to copy its Flash memory to its active RAM.
@@ -117,30 +118,25 @@ DOUBLE_CLICK_SPEED = clamp(DOUBLE_CLICK_SPEED, 0, 10)
 # =====================================================================
 # 3. DRIVER ENGINE & OS HOOKS
 # =====================================================================
-try:
-    # Loads the manufacturer's C++ library to communicate with the USB stack
-    driver = ctypes.CDLL("./MSDriver.dll")
-except Exception as e:
-    print(f"❌ DLL Error: {e}"); exit()
+class USBWriteError(Exception):
+    """A report was refused after every pacing retry."""
 
-# Target the specific Holtek MCU hardware ID (Vendor ID: 04D9, Product ID: A09F)
-driver.Set_VIDPID(0x04D9, 0xA09F)
-
-def send_cmd(hex_str):
+def send_cmd(pacer, hex_str):
     """Sends 8-byte Feature Reports (Used for settings and memory addresses)"""
-    data = bytes.fromhex(hex_str)
-    res = driver.SetFeature((ctypes.c_byte * 8)(*data), 8)
+    try:
+        res = pacer.send_feature(bytes.fromhex(hex_str))
+    except PacingError as e:
+        raise USBWriteError(e) from e
     print(f"  [Cmd] {hex_str} | Status: {res}")
-    time.sleep(USB_DELAY) 
 
-def send_data(hex_str):
+def send_data(pacer, hex_str):
     """Sends 32-byte Output Reports (Used for injecting long custom payloads)"""
-    data = bytes.fromhex(hex_str)
-    # Pads the data with zeros if it doesn't fill the full 32-byte buffer
-    if len(data) < 32: data += b'\x00' * (32 - len(data))
-    res = driver.WriteUSB((ctypes.c_byte * 32)(*data), 32)
+    # The transport pads the data with zeros if it doesn't fill the full 32-byte buffer
+    try:
+        res = pacer.send_output(bytes.fromhex(hex_str))
+    except PacingError as e:
+        raise USBWriteError(e) from e
     print(f"  [Mem] {hex_str[:16]}... | Status: {res}")
-    time.sleep(USB_DELAY) 
 
 def build_standard_cmd(byte_list):
     """Calculates the Holtek C++ Checksum: Checksum = 255 - Sum(Bytes 0-6)"""
@@ -151,42 +147,20 @@ def build_standard_cmd(byte_list):
 def apply_windows_settings():
     """Hooks into the Windows User32 API to change OS-level mouse configurations"""
     print("\n🖥️ Applying Windows OS Mouse Settings...")
-    
-    # 1. Double Click Speed
-    # Maps the 0-10 slider to Windows Milliseconds (900ms down to 200ms)
-    calc_double_click_ms = 900 - (DOUBLE_CLICK_SPEED * 70)
-    ctypes.windll.user32.SetDoubleClickTime(calc_double_click_ms)
-    
-    # 2. Scroll Speed (SPI_SETWHEELSCROLLLINES = 0x0069)
+    if not apply_os_settings(POINTER_SPEED, ENHANCE_PRECISION, DOUBLE_CLICK_SPEED, SCROLL_ONE_PAGE, SCROLL_LINES):
+        print("  [OS] Not running on Windows, skipping."); return
+
     if SCROLL_ONE_PAGE:
-        scroll_val = -1 # -1 tells Windows to use "Page Scroll" mode
         print(f"  [OS] Scroll Speed set to: One Full Page")
     else:
-        scroll_val = SCROLL_LINES
         print(f"  [OS] Scroll Speed set to: {SCROLL_LINES} lines")
-    # '3' at the end broadcasts the change to all open applications instantly
-    ctypes.windll.user32.SystemParametersInfoW(0x0069, scroll_val, 0, 3)
-    
-    # 3. Pointer Speed (SPI_SETMOUSESPEED = 0x0071)
-    # Maps the UI 1-11 slider to the Windows internal 1-20 scale
-    speed_map = {1:1, 2:2, 3:4, 4:6, 5:8, 6:10, 7:12, 8:14, 9:16, 10:18, 11:20}
-    win_speed = speed_map.get(POINTER_SPEED, 10)
-    ctypes.windll.user32.SystemParametersInfoW(0x0071, 0, ctypes.c_void_p(win_speed), 3)
-
-    # 4. Enhance Pointer Precision / Acceleration (SPI_SETMOUSE = 0x0004)
-    # Requires a specific 3-integer array for Windows acceleration curves
-    arr = (ctypes.c_int * 3)(0, 0, 0) if not ENHANCE_PRECISION else (ctypes.c_int * 3)(6, 10, 1)
-    ctypes.windll.user32.SystemParametersInfoW(0x0004, 0, ctypes.byref(arr), 3)
-
     print(f"  [OS] Pointer Speed set to: {POINTER_SPEED}/11")
-    print(f"  [OS] Double Click Speed set to: {DOUBLE_CLICK_SPEED}/10 ({calc_double_click_ms}ms)")
+    print(f"  [OS] Double Click Speed set to: {DOUBLE_CLICK_SPEED}/10 ({double_click_ms(DOUBLE_CLICK_SPEED)}ms)")
 
 
 # =====================================================================
 # 4. DYNAMIC PAYLOAD COMPILER
 # =====================================================================
-print("\n🧮 Compiling dynamically calculated commands...")
-
 # Runtime RAM Parameters (Volatile Memory - Lost on Reboot)
 # Polling Rate (Command 01H) 
 hz_map = {1000: 0x01, 500: 0x02, 250: 0x04, 125: 0x08}
@@ -222,60 +196,85 @@ btn2_payload = "".join(BUTTONS_BLOCK_2)
 # =====================================================================
 # 5. HARDWARE FLASHING SEQUENCE (DMA INJECTION)
 # =====================================================================
-print("🔌 Opening USB Handles...\n")
-driver.Open_FeatureDevice()
-driver.Open_ReportDevice()
-
-print("🔓 1. Initializing Hardware Waking...")
-# Official wake command handshake
-send_cmd("2727DDFFF4DD7676") 
-# Security bypass key to unlock the memory sectors
-send_cmd("252BA5FFF0E0E6EE") 
-
-print(f"\n🧹 2. Preparing Flash Sectors (Injecting {POLLING_RATE}Hz Matrix)...")
-for cmd in active_prep_sequence: send_cmd(cmd)
-
-print("\n🎨 3. Flashing LED Colors (Dual Sector Write)...")
-# Sector address for RGB LED states
-send_cmd("272A85FFF0657636") 
-send_data(color_payload)     
-send_cmd("272A8DFFE8657636") 
-send_data(color_payload)     
-
-print("\n⚡ 4. Flashing DPI Profiles...")
-# Sector address for sensor DPI stages
-send_cmd("272BFDFFE06D76B6") 
-send_data(dpi_payload)       
-
-print("\n⚙️ 5. Flashing Button Mappings...")
-# Sector address for the 16 button mappings (Split across two sectors)
-send_cmd("272D5DFFE8557876") 
-send_data(btn1_payload)      
-send_cmd("272D25FF00557876") 
-send_data(btn2_payload)      
-
-print("\n🏁 6. Locking Configuration (Flash to RAM Reload)...")
-# Triggers the microchip to seal the flash memory and copy it to active RAM
-send_cmd("272BFDFFF86576D6") 
-send_data("FF000000000000000000000000000000") 
-
-# Required delay to prevent Race Condition: We must wait for the MCU to finish 
-# copying its Flash memory over its RAM before we send the active RAM commands.
-print(f"⏳ Waiting {MCU_WAKE_DELAY}s for MCU memory copy to finish...")
-time.sleep(MCU_WAKE_DELAY) 
-
-print("\n🛠️ 7. Applying Runtime System Parameters to Active RAM...")
-# Flashes volatile settings. If the mouse is unplugged, it loses these and 
-# re-reads defaults from its flash memory.
-send_cmd(polling_cmd)   
-send_cmd(move_cmd_hw)
-send_cmd(debounce_cmd)  
-
-# Hooks into Windows OS to finish the software-side configuration
-apply_windows_settings()
-print("\n🎉 SUCCESS! Hardware and OS settings fully updated.")
-
-# Stop the timer and print the performance result
-end_time = time.perf_counter()
-total_time = end_time - start_time
-print(f"⏱️ Total execution time: {total_time:.2f} seconds\n")
\ No newline at end of file
+def flash_sequence(pacer):
+    """The original day-17 DMA sequence, one report at a time."""
+    print("🔓 1. Initializing Hardware Waking...")
+    # Official wake command handshake
+    send_cmd(pacer, "2727DDFFF4DD7676") 
+    # Security bypass key to unlock the memory sectors
+    send_cmd(pacer, "252BA5FFF0E0E6EE") 
+
+    print(f"\n🧹 2. Preparing Flash Sectors (Injecting {POLLING_RATE}Hz Matrix)...")
+    for cmd in active_prep_sequence: send_cmd(pacer, cmd)
+
+    print("\n🎨 3. Flashing LED Colors (Dual Sector Write)...")
+    # Sector address for RGB LED states
+    send_cmd(pacer, "272A85FFF0657636") 
+    send_data(pacer, color_payload)     
+    send_cmd(pacer, "272A8DFFE8657636") 
+    send_data(pacer, color_payload)     
+
+    print("\n⚡ 4. Flashing DPI Profiles...")
+    # Sector address for sensor DPI stages
+    send_cmd(pacer, "272BFDFFE06D76B6") 
+    send_data(pacer, dpi_payload)       
+
+    print("\n⚙️ 5. Flashing Button Mappings...")
+    # Sector address for the 16 button mappings (Split across two sectors)
+    send_cmd(pacer, "272D5DFFE8557876") 
+    send_data(pacer, btn1_payload)      
+    send_cmd(pacer, "272D25FF00557876") 
+    send_data(pacer, btn2_payload)      
+
+    print("\n🏁 6. Locking Configuration (Flash to RAM Reload)...")
+    # Triggers the microchip to seal the flash memory and copy it to active RAM
+    send_cmd(pacer, "272BFDFFF86576D6") 
+    send_data(pacer, "FF000000000000000000000000000000") 
+
+    # Required delay to prevent Race Condition: We must wait for the MCU to finish 
+    # copying its Flash memory over its RAM before we send the active RAM commands.
+    print(f"⏳ Waiting {MCU_WAKE_DELAY}s for MCU memory copy to finish...")
+    time.sleep(MCU_WAKE_DELAY) 
+
+    print("\n🛠️ 7. Applying Runtime System Parameters to Active RAM...")
+    # Flashes volatile settings. If the mouse is unplugged, it loses these and 
+    # re-reads defaults from its flash memory.
+    send_cmd(pacer, polling_cmd)   
+    send_cmd(pacer, move_cmd_hw)
+    send_cmd(pacer, debounce_cmd)
+
+
+def main():
+    # Start the execution stopwatch
+    start_time = time.perf_counter()
+
+    try:
+        # MSDriver.dll targets the Holtek MCU (Vendor ID: 04D9, Product ID: A09F).
+        # Set ARMOR_TRANSPORT=emulator to run the whole sequence against the in-process emulator.
+        transport = get_transport()
+        pacer = AdaptivePacer(transport, max_delay=USB_DELAY)
+        print(f"🔌 Opening USB Handles ({transport.name})...\n")
+        if not transport.open(): raise TransportError("device not found")
+    except TransportError as e:
+        print(f"❌ Open Failed: {e}"); return 1
+
+    try:
+        flash_sequence(pacer)
+    except USBWriteError as e:
+        print(f"❌ USB Write Failed: {e}"); return 1
+    finally:
+        transport.close()
+
+    # Hooks into Windows OS to finish the software-side configuration
+    apply_windows_settings()
+    print("\n🎉 SUCCESS! Hardware and OS settings fully updated.")
+
+    # Stop the timer and print the performance result
+    end_time = time.perf_counter()
+    total_time = end_time - start_time
+    print(f"⏱️ Total execution time: {total_time:.2f} seconds\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
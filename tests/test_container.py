@@ -0,0 +1,80 @@
+"""
+Armor Gaming Mouse Profile Container Tests
+
+Packing the Data/ samples into one container and reading them back through
+the memory map must give the original bytes, edits must stay inside their
+record, and every sample must convert to a configuration and back without
+changing a byte.
+"""
+
+import os
+
+import pytest
+
+from armor.container import ProfileContainer
+from armor.convert import to_config, to_profile
+from armor.pbin import PROFILE_SIZE, ProfileError, ProfileFile
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data")
+SAMPLES = ["Default.pbin", "Profile-max.pbin", "Profile-yellow.pbin"]
+
+
+def _raw(name):
+    with open(os.path.join(DATA, name), "rb") as f:
+        return f.read()
+
+
+def test_profile_bin_reads_through_the_map():
+    original = _raw("profile.bin")
+    with ProfileContainer(os.path.join(DATA, "profile.bin")) as box:
+        assert box.count == 2
+        assert b"".join(box.read(slot) for slot in range(box.count)) == original
+        assert box.find("Profile1") == 1
+        with pytest.raises(ProfileError):
+            box.write(0, original[:PROFILE_SIZE])  # Opened read-only
+
+
+def test_packed_samples_round_trip(tmp_path):
+    path = str(tmp_path / "profiles.bin")
+    profiles = [_raw(name) for name in SAMPLES]
+    with ProfileContainer.create(path, profiles) as box:
+        assert box.count == 3
+    with open(path, "rb") as f:
+        assert f.read() == b"".join(profiles)
+
+    with ProfileContainer(path) as box:
+        for slot, name in enumerate(SAMPLES):
+            assert box.read(slot) == profiles[slot]
+            with ProfileFile(os.path.join(DATA, name)) as pf:
+                assert box[slot].dpi_stages == pf[0].dpi_stages
+                assert [b.code for b in box[slot].buttons] == [b.code for b in pf[0].buttons]
+
+
+def test_edits_stay_in_their_record(tmp_path):
+    path = str(tmp_path / "profiles.bin")
+    profiles = [_raw(name) for name in SAMPLES]
+    with ProfileContainer.create(path, profiles) as box:
+        box.rename(1, "Max")
+        assert box.find("Max") == 1
+        assert box.read(0) == profiles[0] and box.read(2) == profiles[2]
+
+        box.delete(0)
+        assert box.is_empty(0)
+        assert box.compact() == {1: 0, 2: 1}
+        assert box.count == 2
+        assert box.append(profiles[0]) == 2
+        assert box.read(2) == profiles[0]
+    with open(path, "rb") as f:
+        data = f.read()
+    assert len(data) == 3 * PROFILE_SIZE
+    assert data[PROFILE_SIZE:2 * PROFILE_SIZE] == profiles[2]
+
+
+@pytest.mark.parametrize("name", SAMPLES + ["profile.bin"])
+def test_samples_convert_and_back_unchanged(name):
+    with ProfileFile(os.path.join(DATA, name)) as pf:
+        for record in pf:
+            raw = bytes(record.raw())
+            config, warnings = to_config(record)
+            assert warnings == []
+            assert to_profile(config, raw) == (raw, [])
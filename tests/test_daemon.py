@@ -0,0 +1,109 @@
+"""
+Armor Gaming Mouse Daemon Tests
+
+Only clients holding the daemon's key may talk to it, a second daemon must
+not steal a live socket, and flashes through the daemon are journalled
+like the CLI's.
+"""
+
+import os
+import stat
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+
+import pytest
+
+from armor.daemon import ArmorDaemon, DaemonClient, DeviceSession, main
+from armor.journal import FlashJournal
+from armor.pacing import AdaptivePacer, TimingModel
+from armor.transport import EmulatorTransport
+
+CONFIG = {
+    "polling_rate": 1000,
+    "key_response_ms": 12,
+    "dpi_stages": [400, 800, 1600],
+    "dpi_colors": ["FF0000", "00FF00", "0000FF"],
+    "buttons_1": ["0100F000", "0100F100", "0100F200", "0100F400", "0100F300", "07000100", "04000100", "04000200"],
+    "buttons_2": ["00000000"] * 8,
+    "macros": {},
+}
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _session():
+    transport = EmulatorTransport()
+    return DeviceSession(transport, AdaptivePacer(transport, TimingModel(reload=0)))
+
+
+@pytest.fixture
+def daemon(workdir):
+    daemon = ArmorDaemon(_session(), address=str(workdir / "armor.sock"))
+    daemon.start()
+    yield daemon
+    daemon.stop()
+
+
+@pytest.mark.skipif(os.name != "posix", reason="Unix-domain sockets only")
+def test_socket_and_key_are_private(daemon):
+    assert stat.S_IMODE(os.stat(daemon.address).st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(daemon.key_path).st_mode) == 0o600
+    with DaemonClient(daemon.address) as client:
+        assert client.call("ping") == "pong"
+
+
+def test_client_without_the_key_is_rejected(daemon):
+    with pytest.raises(AuthenticationError):
+        Client(daemon.address, authkey=b"guess").close()
+    with DaemonClient(daemon.address) as client:  # The daemon is still serving
+        assert client.call("ping") == "pong"
+
+
+def test_second_daemon_refuses_a_live_address(daemon):
+    with pytest.raises(OSError, match="already listening"):
+        ArmorDaemon(_session(), address=daemon.address).start()
+    with DaemonClient(daemon.address) as client:
+        assert client.call("ping") == "pong"
+
+
+def test_apply_is_journalled(daemon):
+    session = daemon.session
+    with DaemonClient(daemon.address) as client:
+        result = client.call("apply", config=CONFIG)
+        assert result["sectors"] == ["PREP", "COLORS", "COLORS_MIRROR", "DPI", "BUTTONS_1", "BUTTONS_2"]
+        assert result["recovered"] is None
+        assert client.call("apply", config=CONFIG)["sectors"] == []
+    assert session.journal.pending() is None
+    assert session.transport.device.reboots == 1
+
+
+def test_raw_returns_the_readback(daemon):
+    with DaemonClient(daemon.address) as client:
+        result = client.call("raw", feature=["2727DDFFF4DD7676"])
+    assert result["readback"] is not None
+    assert daemon.session.transport.device.log[-1] == ("F", bytes.fromhex("2727DDFFF4DD7676"))
+
+
+def test_call_rejects_arguments_without_a_value(daemon, capsys):
+    with pytest.raises(SystemExit) as exit:
+        main(["--address", daemon.address, "call", "runtime", "polling_rate"])
+    assert exit.value.code == 2
+    assert "not key=value" in capsys.readouterr().err
+
+
+def test_interrupted_flash_is_recovered_by_the_next_apply(workdir):
+    session = _session()
+    session.ensure_open()
+    plan = session.cache.get(CONFIG)
+    steps = plan.select(None, full=True)
+    session.journal.begin(steps, plan.runtime, device=session.transport.device_id)
+    session.journal.close()  # The daemon died right after starting the flash
+
+    result = session.apply(CONFIG)
+    assert result["recovered"] == "resumed"
+    assert result["sectors"] == []
+    assert FlashJournal().pending() is None
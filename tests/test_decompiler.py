@@ -0,0 +1,69 @@
+"""
+Armor Gaming Mouse Macro Decompiler Tests
+
+Compile, decompile, compile again: the second compile must give the exact
+bytes of the first, whether the payload comes from the allocator, a wire
+capture or a binary blob.
+"""
+
+import io
+
+import pytest
+
+from armor.decompiler import build_library, decompile_macro, scan_blob, scan_capture
+from armor.hid import MacroError, encode_macro
+from armor.journal import FlashJournal, flash
+from armor.pacing import AdaptivePacer, TimingModel
+from armor.plan import compile_plan
+from armor.slots import allocate_macros
+from armor.transport import EmulatorTransport
+
+LIBRARY = {
+    "combo": {"actions": [["PRESS", "LCTRL", 0], ["PRESS", "C", 30], ["RELEASE", "C", 10],
+                          ["RELEASE", "LCTRL", 0]], "repeat": 3},
+    "hello": {"text": "Hello!", "delay_ms": 20},
+    "slow": {"actions": [["PRESS", "LCLICK", 3000], ["RELEASE", "LCLICK", 0]], "optimise": True},
+}
+
+
+def test_allocated_payloads_round_trip():
+    allocation = allocate_macros(LIBRARY, slot_count=6)
+    for payload in allocation.payloads.values():
+        payload = bytes.fromhex(payload)
+        actions, repeat = decompile_macro(payload)
+        assert encode_macro(actions, repeat) == payload
+
+
+def test_flashed_library_recompiles_to_the_same_bytes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = {"polling_rate": 1000, "key_response_ms": 12, "dpi_stages": [800], "dpi_colors": ["FF0000"],
+              "buttons_1": ["MACRO:combo", "MACRO:hello", "MACRO:slow"] + ["00000000"] * 5,
+              "buttons_2": ["00000000"] * 8, "macros": LIBRARY}
+    transport = EmulatorTransport()
+    assert transport.open()
+    plan = compile_plan(config, slot_count=6)
+    flash(plan.select(None, full=True), plan.runtime, AdaptivePacer(transport, TimingModel(reload=0)),
+          transport, FlashJournal("journal.jsonl"))
+
+    hits = list(scan_capture(transport.device.log))
+    first = allocate_macros(LIBRARY, slot_count=6).payloads
+    assert {hit.slot: hit.payload.hex().upper() for hit in hits} == first
+
+    recovered = build_library(hits)
+    pinned = {name: dict(spec, slot=hit.slot) for (name, spec), hit in zip(recovered.items(), hits)}
+    assert allocate_macros(pinned, slot_count=6).payloads == first
+
+
+def test_blob_scan_finds_embedded_macros():
+    payload = bytes.fromhex(allocate_macros({"combo": LIBRARY["combo"]}, slot_count=6).payloads[1])
+    blob = b"\xFF" * 37 + payload + b"\xFF" * 11
+    hits = list(scan_blob(io.BytesIO(blob), chunk_size=64))  # The macro straddles two chunks
+    assert [(h.offset, h.payload) for h in hits] == [(37, payload)]
+    assert encode_macro(hits[0].actions, hits[0].repeat) == payload
+
+
+def test_data_after_the_end_marker_does_not_decompile():
+    payload = bytearray(encode_macro([("PRESS", "A", 10), ("RELEASE", "A", 0)]))
+    payload[-1] = 0x04
+    with pytest.raises(MacroError, match="round-trip"):
+        decompile_macro(bytes(payload))
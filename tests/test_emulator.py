@@ -0,0 +1,120 @@
+"""
+Armor Gaming Mouse Emulator Tests
+
+The compiled flash must put exactly the frames dll-day-18.py sends on the
+wire (the sequence captured from the vendor app), in the same order, and
+flashing the same configuration twice must only rewrite what changed.
+"""
+
+import pytest
+
+from armor.daemon import DeviceSession
+from armor.flash import ShadowImage
+from armor.journal import FlashJournal, flash
+from armor.pacing import AdaptivePacer, TimingModel
+from armor.plan import compile_plan
+from armor.transport import EmulatorTransport
+
+# dll-day-18.py's configuration
+CONFIG = {
+    "polling_rate": 250,
+    "key_response_ms": 12,
+    "dpi_stages": [400, 800, 1200, 2400, 3200, 6200],
+    "dpi_colors": ["FFFFFF", "00FF00", "0000FF", "FFFF00", "FF8800", "00FFFF"],
+    "buttons_1": ["0100F000", "07000300", "0100F200", "09000100", "0100F300", "0100F100", "00000000", "00000000"],
+    "buttons_2": ["00000000"] * 6 + ["04000100", "04000200"],
+    "macro": {"actions": [["PRESS", "A", 10], ["RELEASE", "A", 10], ["PRESS", "B", 10],
+                          ["RELEASE", "B", 10], ["PRESS", "LCLICK", 10], ["RELEASE", "LCLICK", 10]],
+              "repeat": 3},
+}
+
+_MACRO = "0003010481040105810501F081F0" + "00" * 114
+
+# What dll-day-18.py sends for CONFIG, frame by frame (Output Reports zero-padded to 32 bytes)
+CAPTURED = [
+    ("F", "08AACCEE00000093"),   # 08H stop macro engine
+    ("F", "2727DDFFF4DD7676"),   # Handshake
+    ("F", "252BA5FFF0E0E6EE"),   # Unlock
+    ("F", "272BDDFFE8D57676"),   # 250Hz prep sectors
+    ("F", "272BADFFD0ED7676"),
+    ("F", "272B75FFF81D7676"),
+    ("F", "272B9D0498457676"),
+    ("F", "272B5DFFD0524E8E"),
+    ("F", "272A85FFF0657636"),   # Colours
+    ("O", "FFFFFF00FF000000FFFFFF00FF8800" + "00FFFF".ljust(34, "0")),
+    ("F", "272A8DFFE8657636"),   # Colours (dual write)
+    ("O", "FFFFFF00FF000000FFFFFF00FF8800" + "00FFFF".ljust(34, "0")),
+    ("F", "272BFDFFE06D76B6"),   # DPI stages
+    ("O", "04080C18203E7C78".ljust(64, "0")),
+    ("F", "272D5DFFE8557876"),   # Buttons 1-8
+    ("O", "0100F000070003000100F200090001000100F3000100F1000000000000000000"),
+    ("F", "272D25FF00557876"),   # Buttons 9-16
+    ("O", "0000000000000000000000000000000000000000000000000400010004000200"),
+    ("F", "272725FFE85D7A76"),   # Macro slot 1
+    ("O", _MACRO[0:64]),
+    ("O", _MACRO[64:128]),
+    ("O", _MACRO[128:192]),
+    ("O", _MACRO[192:256]),
+    ("F", "272BFDFFF86576D6"),   # Commit
+    ("O", "FF".ljust(64, "0")),  # Flush
+    ("F", "01040000000000FA"),   # 01H 250Hz
+    ("F", "0E64640000000029"),   # 0EH 100% sensitivity
+    ("F", "04010C00000000EE"),   # 04H lift 1, 12ms debounce
+]
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_flash_matches_the_captured_frames(workdir):
+    transport = EmulatorTransport()
+    assert transport.open()
+    plan = compile_plan(CONFIG)
+    pacer = AdaptivePacer(transport, TimingModel(reload=0))
+    flash(plan.select(None, full=True), plan.runtime, pacer, transport, FlashJournal("journal.jsonl"))
+
+    device = transport.device
+    sent = [(kind, bytes(data).hex().upper()) for kind, data in device.log]
+    assert sent == CAPTURED
+    assert device.errors == []
+    assert device.reboots == 1
+
+
+def test_second_identical_flash_is_skipped(workdir):
+    transport = EmulatorTransport()
+    session = DeviceSession(transport, AdaptivePacer(transport, TimingModel(reload=0)),
+                            shadow=ShadowImage("shadow.json", device=transport.device_id))
+    first = session.apply(CONFIG)
+    assert first["sectors"] == ["PREP", "COLORS", "COLORS_MIRROR", "DPI", "BUTTONS_1", "BUTTONS_2", "MACRO_1"]
+
+    device = transport.device
+    device.log.clear()
+    second = session.apply(CONFIG)
+    assert second["sectors"] == []
+    assert [bytes(data).hex().upper() for _, data in device.log] == [f for _, f in CAPTURED[-3:]]
+    assert device.reboots == 1
+
+    # A new session (e.g. a restarted daemon) reads the same shadow from disk
+    restarted = DeviceSession(transport, AdaptivePacer(transport, TimingModel(reload=0)),
+                              shadow=ShadowImage("shadow.json", device=transport.device_id))
+    assert restarted.apply(CONFIG)["sectors"] == []
+
+    # Only the changed sector goes out again
+    device.log.clear()
+    third = session.apply(dict(CONFIG, dpi_stages=[400, 800, 1600, 2400, 3200, 6200]))
+    assert third["sectors"] == ["DPI"]
+    assert device.reboots == 2
+
+
+def test_shadow_is_per_device_not_per_transport(workdir):
+    first, second = EmulatorTransport(), EmulatorTransport()
+    assert first.device_id != second.device_id
+    DeviceSession(first, AdaptivePacer(first, TimingModel(reload=0))).apply(CONFIG)
+
+    # Same transport, same shadow file, different mouse: nothing may be skipped
+    result = DeviceSession(second, AdaptivePacer(second, TimingModel(reload=0))).apply(CONFIG)
+    assert result["sectors"] == ["PREP", "COLORS", "COLORS_MIRROR", "DPI", "BUTTONS_1", "BUTTONS_2", "MACRO_1"]
+    assert second.device.reboots == 1
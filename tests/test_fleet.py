@@ -0,0 +1,97 @@
+"""
+Armor Gaming Mouse Fleet Tests
+
+Every bench mouse gets the same EEPROM, progress arrives per device in
+step order, and a worker only ever recovers a journal its own mouse wrote.
+"""
+
+import pytest
+
+from armor.fleet import _journal_path, enumerate_devices, flash_device, flash_fleet
+from armor.journal import FlashJournal, flash
+from armor.pacing import AdaptivePacer, TimingModel
+from armor.plan import compile_plan
+from armor.transport import get_transport
+
+CONFIG = {
+    "polling_rate": 1000,
+    "key_response_ms": 12,
+    "dpi_stages": [400, 800, 1600],
+    "dpi_colors": ["FF0000", "00FF00", "0000FF"],
+    "buttons_1": ["0100F000", "0100F100", "0100F200", "0100F400", "0100F300", "07000100", "04000100", "04000200"],
+    "buttons_2": ["00000000"] * 8,
+    "macros": {},
+}
+
+FAST = {"command_time": 0.0, "write_time": 0.0, "reboot_time": 0.0}
+
+
+class Crash(Exception):
+    """Stands in for the worker process dying."""
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _crash(spec):
+    """Starts flashing spec's mouse and dies after the first Output Report."""
+    transport = get_transport(spec.transport, **spec.kwargs)
+    assert transport.open()
+    plan = compile_plan(CONFIG)
+    journal = FlashJournal(_journal_path(spec.key))
+    pacer = AdaptivePacer(transport, TimingModel(reload=0))
+
+    def die(step):
+        if step.name == "COLORS_MIRROR":
+            raise Crash()
+    with pytest.raises(Crash):
+        flash(plan.select(None, full=True), plan.runtime, pacer, transport, journal, on_step=die)
+    journal.close()
+
+
+def test_enumerate_gives_each_emulated_mouse_its_own_key():
+    devices = enumerate_devices("emulator", count=3)
+    assert len({d.key for d in devices}) == 3
+    for spec in devices:
+        assert get_transport(spec.transport, **spec.kwargs).device_id == spec.key
+    assert enumerate_devices("emulator", count=3) == devices  # Stable across runs
+
+
+def test_fleet_flashes_every_device(workdir):
+    devices = enumerate_devices("emulator", count=3, **FAST)
+    events = []
+    results = flash_fleet(CONFIG, devices, on_progress=lambda *e: events.append(e))
+
+    assert [r["device"] for r in results] == [d.key for d in devices]
+    assert all(r["ok"] for r in results), [r["error"] for r in results]
+    assert all(r["recovered"] is None for r in results)
+    for spec in devices:
+        steps = [(step, done) for key, step, done, _ in events if key == spec.key]
+        assert [s for s, _ in steps] == ["UNLOCK", "PREP", "COLORS", "COLORS_MIRROR", "DPI",
+                                         "BUTTONS_1", "BUTTONS_2", "COMMIT", "RUNTIME", "DONE"]
+        assert [d for _, d in steps] == sorted(d for _, d in steps)
+        assert FlashJournal(_journal_path(spec.key)).pending() is None
+
+
+def test_worker_recovers_its_own_journal(workdir):
+    spec = enumerate_devices("emulator", count=1, **FAST)[0]
+    _crash(spec)
+
+    result = flash_device(spec, compile_plan(CONFIG).to_json())
+    assert result["ok"], result["error"]
+    assert result["recovered"] == "resumed"
+    assert FlashJournal(_journal_path(spec.key)).pending() is None
+
+
+def test_worker_discards_another_devices_journal(workdir):
+    first, second = enumerate_devices("emulator", count=2, **FAST)
+    _crash(first)
+    # The bench was rewired: the second mouse now sits where the first one crashed
+    second = second._replace(key=first.key)
+
+    result = flash_device(second, compile_plan(CONFIG).to_json())
+    assert result["ok"], result["error"]
+    assert result["recovered"] == "discarded"
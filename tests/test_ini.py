@@ -0,0 +1,77 @@
+"""
+Armor Gaming Mouse Data.ini Tests
+
+Data.ini is parsed once per edit, and a subscriber only hears about the
+keys it asked for: "distance" is not "distance_min", and "buttons[0][1]"
+is not "buttons[0][10]".
+"""
+
+import itertools
+import os
+
+import pytest
+
+from armor.ini import IniCache, IniWatcher, button_blocks, parse_ini
+
+
+def _ini(distance=2, distance_min=1, button_11="01,00,F0,00,1"):
+    buttons = ["01,00,F0,00,1"] * 32
+    buttons[10] = button_11  # Profile 1, buttons[0][10]
+    lines = ["[Default]", "VID=04D9", "PID=A09F", "DPI=1600", "Sensor=3327", "Password=FC1522",
+             f"Distance={distance}", f"Distance_Min={distance_min}", "Distance_Max=3",
+             "Distance_Value=1,2,3", "Ver_H=1", "Ver_L=4", "", "[BUTTON]"]
+    lines += [f"{n + 1}={b}" for n, b in enumerate(buttons)]
+    return "\n".join(lines) + "\n"
+
+
+_mtimes = itertools.count(1)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "Data.ini"
+
+
+def _write(path, text):
+    path.write_text(text)
+    mtime = next(_mtimes) * 10**9
+    os.utime(path, ns=(mtime, mtime))  # A new mtime even within one clock tick
+
+
+def test_parse_and_button_blocks():
+    ini = parse_ini(_ini())
+    assert (ini.vid, ini.pid, ini.version) == (0x04D9, 0xA09F, "1.4")
+    assert ini.password == bytes.fromhex("FC1522")
+    buttons_1, buttons_2 = button_blocks(ini)
+    assert buttons_1 == ["0100F000"] * 8 and len(buttons_2) == 8
+
+
+def test_cache_parses_once_per_edit(path):
+    cache = IniCache()
+    _write(path, _ini())
+    assert cache.load(str(path))[1]
+    assert not cache.load(str(path))[1]
+    _write(path, _ini())  # Touched, same content
+    assert not cache.load(str(path))[1]
+    assert cache.parses == 1
+
+
+def test_subscribers_get_exact_keys(path):
+    _write(path, _ini())
+    watcher = IniWatcher(str(path), cache=IniCache())
+    heard = {"distance": [], "buttons[0][1]": [], "buttons[0]": []}
+    for key, calls in heard.items():
+        watcher.subscribe(calls.append, [key])
+
+    _write(path, _ini(distance_min=2))
+    assert set(watcher.poll()) == {"distance_min"}
+    _write(path, _ini(distance_min=2, button_11="03,00,E9,00,1"))
+    assert set(watcher.poll()) == {"buttons[0][10]"}
+
+    assert heard["distance"] == []
+    assert heard["buttons[0][1]"] == []
+    assert [set(c) for c in heard["buttons[0]"]] == [{"buttons[0][10]"}]
+
+    _write(path, _ini(distance=3, distance_min=2, button_11="03,00,E9,00,1"))
+    watcher.poll()
+    assert [set(c) for c in heard["distance"]] == [{"distance"}]
@@ -0,0 +1,142 @@
+"""
+Armor Gaming Mouse Flash Journal Tests
+
+A flash that dies halfway must be finished by resume() on the same mouse,
+leaving the same EEPROM and shadow as an uninterrupted flash, and must
+never be replayed onto a different mouse.
+"""
+
+import pytest
+
+import armor.journal as journal_module
+from armor.flash import ShadowImage
+from armor.journal import FlashJournal, flash, resume
+from armor.pacing import AdaptivePacer, TimingModel
+from armor.plan import compile_plan
+from armor.transport import EmulatorTransport
+
+CONFIG = {
+    "polling_rate": 1000,
+    "key_response_ms": 12,
+    "dpi_stages": [400, 800, 1600],
+    "dpi_colors": ["FF0000", "00FF00", "0000FF"],
+    "buttons_1": ["0100F000", "0100F100", "0100F200", "0100F400", "0100F300", "07000100", "04000100", "04000200"],
+    "buttons_2": ["00000000"] * 8,
+    "macros": {},
+}
+
+
+class Crash(Exception):
+    """Stands in for the process dying."""
+
+
+class CrashingPacer(AdaptivePacer):
+    """Dies before sending its Nth Output Report."""
+
+    def __init__(self, transport, outputs):
+        super().__init__(transport, TimingModel(reload=0))
+        self.outputs = outputs
+
+    def send_output(self, payload):
+        if self.outputs == 0:
+            raise Crash()
+        self.outputs -= 1
+        return super().send_output(payload)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _open():
+    transport = EmulatorTransport()
+    assert transport.open()
+    return transport
+
+def _pacer(transport):
+    return AdaptivePacer(transport, TimingModel(reload=0))
+
+def _crash(transport, journal, outputs):
+    plan = compile_plan(CONFIG)
+    with pytest.raises(Crash):
+        flash(plan.select(None, full=True), plan.runtime, CrashingPacer(transport, outputs), transport, journal)
+    journal.close()
+
+def _reference_eeprom():
+    transport = _open()
+    plan = compile_plan(CONFIG)
+    flash(plan.select(None, full=True), plan.runtime, _pacer(transport), transport, FlashJournal("ref.jsonl"))
+    return transport.device.eeprom
+
+
+def test_resume_after_a_crash_mid_flash(workdir):
+    transport = _open()
+    journal = FlashJournal("journal.jsonl")
+    _crash(transport, journal, outputs=2)  # Both colour writes done, DPI never acknowledged
+    assert transport.device.reboots == 0
+
+    shadow = ShadowImage("shadow.json", device=transport.device_id)
+    outcome, resent = resume(_pacer(transport), transport, journal, shadow)
+    assert outcome == "resumed"
+    # Unsealed writes may not have survived (replug, power loss): every sector goes out again
+    assert resent == ["PREP", "COLORS", "COLORS_MIRROR", "DPI", "BUTTONS_1", "BUTTONS_2"]
+    assert journal.pending() is None
+    assert transport.device.errors == []
+    assert transport.device.eeprom == _reference_eeprom()
+    assert list(shadow.sectors) == ["PREP", "COLORS", "COLORS_MIRROR", "DPI", "BUTTONS_1", "BUTTONS_2"]
+    assert transport.device.awake  # The runtime commands went out after the reboot
+
+
+def test_roll_forward_after_a_crash_past_the_commit(workdir, monkeypatch):
+    transport = _open()
+    journal = FlashJournal("journal.jsonl")
+    plan = compile_plan(CONFIG)
+
+    def die(*args, **kwargs):
+        raise Crash()
+    with monkeypatch.context() as patch, pytest.raises(Crash):
+        patch.setattr(journal_module, "wait_for_reconnect", die)
+        flash(plan.select(None, full=True), plan.runtime, _pacer(transport), transport, journal)
+    journal.close()
+    assert journal.pending()["committed"]
+
+    shadow = ShadowImage("shadow.json", device=transport.device_id)
+    assert resume(_pacer(transport), transport, journal, shadow) == ("rolled-forward", [])
+    assert transport.device.reboots == 1  # Nothing was flashed twice
+    assert len(shadow.sectors) == 6
+
+
+def test_journal_is_not_replayed_onto_another_device(workdir):
+    first, second = _open(), _open()
+    journal = FlashJournal("journal.jsonl")
+    _crash(first, journal, outputs=2)
+
+    shadow = ShadowImage("shadow.json", device=second.device_id)
+    assert resume(_pacer(second), second, journal, shadow) == ("discarded", [])
+    assert journal.pending() is None
+    assert second.device.log == []
+    assert shadow.sectors == {}
+
+
+def test_resume_after_a_crash_before_the_first_frame(workdir):
+    transport = _open()
+    journal = FlashJournal("journal.jsonl")
+    _crash(transport, journal, outputs=0)  # Journal begun, no sector written yet
+
+    shadow = ShadowImage("shadow.json", device=transport.device_id)
+    assert resume(_pacer(transport), transport, journal, shadow)[0] == "resumed"
+    assert transport.device.eeprom == _reference_eeprom()
+    assert len(shadow.sectors) == 6
+
+
+def test_resume_after_a_power_loss_rewrites_every_sector(workdir):
+    transport = _open()
+    journal = FlashJournal("journal.jsonl")
+    _crash(transport, journal, outputs=4)
+    transport.device.reboot()  # Replugged while the host was down: the staged sectors are gone
+
+    shadow = ShadowImage("shadow.json", device=transport.device_id)
+    assert resume(_pacer(transport), transport, journal, shadow)[0] == "resumed"
+    assert transport.device.eeprom == _reference_eeprom()
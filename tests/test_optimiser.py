@@ -0,0 +1,46 @@
+"""
+Armor Gaming Mouse Macro Optimiser Tests
+
+Optimising must not move anything in time: delays are floored like
+encode_action floors them, and a dropped lead-in stays in front.
+"""
+
+from armor.hid import encode_macro
+from armor.optimiser import optimise_macro
+
+
+def test_dropped_lead_in_stays_before_the_first_action():
+    # The RELEASE of a key that is not held goes; B must still wait its own 10ms, not 20
+    assert optimise_macro([("RELEASE", "A", 5), ("PRESS", "B", 10)]).actions == [("PRESS", "B", 10)]
+    result = optimise_macro([("RELEASE", "A", 25), ("PRESS", "B", 10)])
+    assert result.actions == [("RELEASE", "NONE", 20), ("PRESS", "B", 10)]
+    assert result.dropped == 0  # The dropped step survives as the lead-in
+
+
+def test_delays_are_floored_against_the_running_total():
+    assert optimise_macro([("PRESS", "A", 19), ("RELEASE", "A", 0)]).actions == [
+        ("PRESS", "A", 10), ("RELEASE", "A", 0)]  # Like encode_action: never rounded up
+    assert optimise_macro([("PRESS", "A", 15), ("RELEASE", "A", 15)]).actions == [
+        ("PRESS", "A", 10), ("RELEASE", "A", 20)]  # 30ms in total, not 20
+
+
+def test_redundant_actions_merge_their_delay():
+    result = optimise_macro([("PRESS", "A", 10), ("PRESS", "A", 20), ("RELEASE", "A", 10),
+                             ("RELEASE", "A", 30), ("PRESS", "NONE", 10)])
+    assert result.actions == [("PRESS", "A", 30), ("RELEASE", "A", 50)]
+    assert result.dropped == 3
+
+
+def test_long_delays_are_split_not_capped():
+    result = optimise_macro([("PRESS", "A", 3000), ("RELEASE", "A", 0)])
+    assert result.actions == [("PRESS", "A", 1270), ("RELEASE", "NONE", 1270),
+                              ("RELEASE", "NONE", 460), ("RELEASE", "A", 0)]
+    assert result.split == 2
+    encode_macro(result.actions)  # Every step encodes without clamping
+
+
+def test_already_optimal_macro_is_unchanged():
+    actions = [("PRESS", "A", 10), ("RELEASE", "A", 10), ("PRESS", "LCLICK", 20), ("RELEASE", "LCLICK", 0)]
+    result = optimise_macro(actions)
+    assert result.actions == actions
+    assert encode_macro(result.actions) == encode_macro(actions)
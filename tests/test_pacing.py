@@ -0,0 +1,64 @@
+"""
+Armor Gaming Mouse Pacing Tests
+
+With an echoing device every report is paced by its ack; once the acks stop
+coming, every report waits the timing model, which defaults to the scripts'
+USB_DELAY.
+"""
+
+import pytest
+
+from armor.pacing import USB_DELAY, AdaptivePacer, PacingError, TimingModel
+from armor.transport import EmulatorTransport
+
+STOP = bytes.fromhex("08AACCEE00000093")
+HANDSHAKE = bytes.fromhex("2727DDFFF4DD7676")
+
+
+class DeafTransport(EmulatorTransport):
+    """A backend with no GetFeature read-back (or a device that never echoes)."""
+
+    def get_feature(self, size=8):
+        return None
+
+
+def _pacer(transport, **kwargs):
+    assert transport.open()
+    pacer = AdaptivePacer(transport, **kwargs)
+    pacer.slept = []
+    pacer._sleep = pacer.slept.append  # Record the waits instead of sleeping them
+    return pacer
+
+
+def test_fallback_model_is_the_usb_delay():
+    model = TimingModel()
+    assert model.delay("F") == USB_DELAY
+    assert model.delay("O", 0x0C) == USB_DELAY
+
+
+def test_echoed_reports_are_paced_by_their_ack():
+    pacer = _pacer(EmulatorTransport())
+    for _ in range(5):
+        pacer.send_feature(STOP)
+    assert pacer.stats["acked"] == 5
+    assert pacer.slept == []  # The emulator echoes at once: no model wait at all
+    assert pacer.use_ack
+
+
+def test_missing_acks_fall_back_to_the_model():
+    pacer = _pacer(DeafTransport(), ack_timeout=0, ack_misses=3)
+    for _ in range(5):
+        pacer.send_feature(HANDSHAKE)
+    assert not pacer.use_ack
+    assert pacer.stats["acked"] == 0
+    assert pacer.slept[-2:] == [USB_DELAY, USB_DELAY]  # The two reports after the third miss
+
+
+def test_refused_reports_back_off_then_give_up():
+    transport = EmulatorTransport()
+    pacer = _pacer(transport, use_ack=False, retries=3, max_delay=0.05)
+    transport.device.feature = lambda data: False
+    with pytest.raises(PacingError):
+        pacer.send_feature(HANDSHAKE)
+    assert pacer.stats["retries"] == 4
+    assert pacer.slept == [USB_DELAY, 2 * USB_DELAY, 4 * USB_DELAY, 0.05]
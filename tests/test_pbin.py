@@ -0,0 +1,83 @@
+"""
+Armor Gaming Mouse .pbin Schema Tests
+
+The button records must stay inside one profile: Data/profile.bin holds two
+profiles back to back, so a record that runs past PROFILE_SIZE would read
+(and write) the next profile's name.
+"""
+
+import os
+
+import pytest
+
+from armor.pbin import (
+    BUTTON_SCHEMA, PROFILE_SCHEMA, PROFILE_SIZE, Field, ProfileError, ProfileFile, Record, Schema, diff,
+    diff_files,
+)
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data")
+
+
+def test_button_records_fill_the_profile():
+    start, length = PROFILE_SCHEMA.span("buttons")
+    field = PROFILE_SCHEMA.fields["buttons"]
+    assert start + length == PROFILE_SIZE
+    for i in range(field.count):
+        base = start + i * field.stride
+        assert base + BUTTON_SCHEMA.size <= PROFILE_SIZE
+        for name in BUTTON_SCHEMA.fields:
+            offset, size = BUTTON_SCHEMA.span(name)
+            assert offset + size <= BUTTON_SCHEMA.size
+
+
+def test_schema_rejects_fields_past_the_record():
+    with pytest.raises(ProfileError):
+        Schema(0x10, (Field("words", 0x0C, "u32", 2),))
+
+
+def test_default_profile_button_names():
+    with ProfileFile(os.path.join(DATA, "Default.pbin")) as pf:
+        button = pf[0].buttons[7]
+        assert button.macro_name == "The default macro"
+        assert button.index == 7
+
+
+def test_button_write_round_trip_stays_in_its_profile():
+    with open(os.path.join(DATA, "profile.bin"), "rb") as f:
+        original = f.read()
+    assert len(original) == 2 * PROFILE_SIZE
+    data = bytearray(original)
+    last = Record(data, 0, PROFILE_SCHEMA).buttons[31]
+    saved = {name: getattr(last, name) for name in BUTTON_SCHEMA.fields}
+
+    last.write("code", (saved["code"] + 1) & 0xFF)
+    last.write("macro_name", "Round trip")
+    last.write("macro", b"\xAA" * BUTTON_SCHEMA.span("macro")[1])
+    assert data[PROFILE_SIZE:] == original[PROFILE_SIZE:]  # The second profile is untouched
+    reread = Record(data, 0, PROFILE_SCHEMA).buttons[31]
+    assert reread.macro_name == "Round trip"
+    assert reread.code == (saved["code"] + 1) & 0xFF
+    assert all(r.fields[0].startswith("buttons[31]") for r in diff(original, data))
+
+    for name, value in saved.items():
+        reread.write(name, value)
+    assert bytes(data) == original
+
+
+def test_diff_files_falls_back_to_raw_bytes():
+    gun, data = os.path.join(DATA, "gun.bin"), os.path.join(DATA, "Data.bin")
+    ranges = diff_files(gun, data)
+    assert all(r.fields == [] for r in ranges)
+    assert ranges[-1].end == os.path.getsize(gun)  # The longer file's tail is one range
+    with open(gun, "rb") as f:
+        assert ranges[-1].old == f.read()[ranges[-1].start:].hex().upper()
+
+
+def test_diff_gap_boundary():
+    a = bytes(16)
+    b = bytearray(a)
+    b[2] = b[6] = 1  # Three equal bytes in between
+    assert [(r.start, r.end) for r in diff(a, b, None, gap=2)] == [(2, 3), (6, 7)]
+    assert [(r.start, r.end) for r in diff(a, b, None, gap=3)] == [(2, 7)]
+    b[3] = 1  # Adjacent bytes are one range even with gap=0
+    assert [(r.start, r.end) for r in diff(a, b, None)] == [(2, 4), (6, 7)]
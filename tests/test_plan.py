@@ -0,0 +1,72 @@
+"""
+Armor Gaming Mouse Plan Cache Tests
+
+A configuration compiles once; an edit, a new PLAN_VERSION, another macro
+slot count or a damaged cache file all compile it again.
+"""
+
+import os
+
+import pytest
+
+import armor.plan as plan_module
+from armor.pacing import TimingModel
+from armor.plan import PlanCache, compile_plan
+
+CONFIG = {
+    "polling_rate": 1000,
+    "key_response_ms": 12,
+    "dpi_stages": [400, 800, 1600],
+    "dpi_colors": ["FF0000", "00FF00", "0000FF"],
+    "buttons_1": ["MACRO:tap"] + ["0100F000"] * 7,
+    "buttons_2": ["00000000"] * 8,
+    "macros": {"tap": {"actions": [["PRESS", "A", 10], ["RELEASE", "A", 0]]}},
+}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PlanCache(str(tmp_path), slot_count=1)
+
+
+def test_hit_after_the_first_compile(cache):
+    first = cache.get(CONFIG)
+    second = cache.get(CONFIG)
+    assert (cache.misses, cache.hits) == (1, 1)
+    assert second.to_json() == first.to_json() == compile_plan(CONFIG, slot_count=1).to_json()
+
+    # A fresh cache (a new process) finds it on disk
+    other = PlanCache(os.path.dirname(cache.directory), slot_count=1)
+    other.get(CONFIG)
+    assert other.hits == 1
+
+
+def test_edited_config_misses(cache):
+    cache.get(CONFIG)
+    cache.get(dict(CONFIG, dpi_stages=[400, 800, 3200]))
+    assert (cache.misses, cache.hits) == (2, 0)
+
+
+def test_plan_version_bump_invalidates(cache, monkeypatch):
+    old = cache.get(CONFIG)
+    monkeypatch.setattr(plan_module, "PLAN_VERSION", plan_module.PLAN_VERSION + 1)
+    new = cache.get(CONFIG)
+    assert cache.misses == 2
+    assert new.key != old.key
+
+
+def test_slot_count_and_model_are_part_of_the_key(tmp_path):
+    hardware = PlanCache(str(tmp_path), slot_count=1)
+    emulator = PlanCache(str(tmp_path), slot_count=6)
+    slow = PlanCache(str(tmp_path), model=TimingModel(output=0.02), slot_count=1)
+    keys = {c.get(CONFIG).key for c in (hardware, emulator, slow)}
+    assert len(keys) == 3
+    assert hardware.misses == emulator.misses == slow.misses == 1
+
+
+def test_damaged_cache_file_is_recompiled(cache):
+    plan = cache.get(CONFIG)
+    with open(os.path.join(cache.directory, f"{plan.key}.json"), "w") as f:
+        f.write("{")
+    assert cache.get(CONFIG).to_json() == plan.to_json()
+    assert (cache.misses, cache.hits) == (2, 0)
@@ -0,0 +1,62 @@
+"""
+Armor Gaming Mouse Macro Slot Tests
+
+"MACRO:<name>" buttons must point at the slot their macro landed in, a
+library that needs more slots than the target allows is refused with the
+opt-in hint, and host-played macros get the spare F13-F24 keys.
+"""
+
+import pytest
+
+from armor.hid import MacroError, encode_macro
+from armor.slots import HOST_TRIGGERS, allocate_macros, assign_slots, assign_triggers
+
+TAP_A = {"actions": [["PRESS", "A", 10], ["RELEASE", "A", 0]]}
+TAP_B = {"actions": [["PRESS", "B", 10], ["RELEASE", "B", 0]]}
+
+
+def test_macro_references_resolve_to_their_slot():
+    library = {"a": TAP_A, "b": dict(TAP_B, slot=4)}
+    buttons_1 = ["MACRO:b", "0100F000", "MACRO:a"] + ["00000000"] * 5
+    allocation = allocate_macros(library, buttons_1, ["MACRO:a"] + ["00000000"] * 7, slot_count=6)
+
+    assert allocation.slots == {"a": 1, "b": 4}  # Pinned slot kept, the rest fill from 1
+    assert allocation.buttons_1[:3] == ["09000400", "0100F000", "09000100"]
+    assert allocation.buttons_2[0] == "09000100"
+    assert allocation.payloads[4] == encode_macro([("PRESS", "B", 10), ("RELEASE", "B", 0)]).hex().upper()
+
+
+def test_unknown_reference_is_refused():
+    with pytest.raises(MacroError, match="unknown macro 'c'"):
+        allocate_macros({"a": TAP_A}, ["MACRO:c"], slot_count=6)
+
+
+def test_library_overflow_is_refused():
+    with pytest.raises(MacroError, match="ARMOR_UNVERIFIED_SLOTS"):
+        assign_slots({"a": TAP_A, "b": TAP_B}, slot_count=1)  # Hardware: slot 1 only
+    seven = {str(n): TAP_A for n in range(7)}
+    with pytest.raises(MacroError, match="7 macros"):
+        assign_slots(seven, slot_count=6)
+    with pytest.raises(MacroError, match="outside 1-6"):
+        assign_slots({"a": dict(TAP_A, slot=7)}, slot_count=6)
+    with pytest.raises(MacroError, match="both pinned"):
+        assign_slots({"a": dict(TAP_A, slot=2), "b": dict(TAP_B, slot=2)}, slot_count=6)
+
+
+def test_host_macros_get_spare_trigger_keys():
+    library = {"long": {"host": True, "actions": [["PRESS", "A", 5000]]},
+               "pinned": {"host": True, "trigger": "f13", "actions": []},
+               "local": TAP_A}
+    assert assign_triggers(library) == {"long": "F14", "pinned": "F13"}
+
+    allocation = allocate_macros(library, slot_count=6)
+    slot = allocation.slots["long"]
+    assert allocation.payloads[slot] == encode_macro([("PRESS", "F14", 10), ("RELEASE", "F14", 0)]).hex().upper()
+
+
+def test_host_triggers_run_out():
+    library = {str(n): {"host": True, "actions": []} for n in range(len(HOST_TRIGGERS) + 1)}
+    with pytest.raises(MacroError, match="No spare trigger"):
+        assign_triggers(library)
+    with pytest.raises(MacroError, match="share the same trigger"):
+        assign_triggers({"a": {"host": True, "trigger": "F20"}, "b": {"host": True, "trigger": "F20"}})
@@ -0,0 +1,71 @@
+"""
+Armor Gaming Mouse Profile Store Tests
+
+A stored profile comes back byte for byte, the same bytes are stored once
+(and a renamed copy costs one small section), and a damaged blob is
+reported as a damaged profile instead of being handed out.
+"""
+
+import os
+
+import pytest
+
+from armor.pbin import PROFILE_SIZE, ProfileError
+from armor.store import ProfileStore
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data")
+
+
+def _raw(name):
+    with open(os.path.join(DATA, name), "rb") as f:
+        return f.read()
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ProfileStore(str(tmp_path / "store")) as store:
+        yield store
+
+
+def test_put_and_get(store):
+    data = _raw("Default.pbin")
+    digest = store.add(data, "Default.pbin", polling_rate=1000)
+    assert store.get(digest) == data
+    assert store.get(digest[:10]) == data  # A unique prefix will do
+    assert store.find(polling_rate=1000, dpi=6000) == [digest]
+    assert store.describe(digest)["dpi_stages"] == [400, 800, 1200, 1600, 3200, 6000]
+    with pytest.raises(ProfileError):
+        store.add(data[:-1])
+
+
+def test_identical_bytes_are_stored_once(store):
+    data = _raw("Default.pbin")
+    first = store.add(data, "a")
+    assert store.add(data, "b") == first
+    stats = store.stats()
+    assert (stats["profiles"], stats["entries"]) == (1, 2)
+    assert store.describe(first)["sources"] == ["a", "b"]
+
+    # profile.bin's records differ from Default.pbin in a name or the DPI stages: one new section each
+    digests = store.add_files([os.path.join(DATA, "profile.bin")])
+    grown = store.stats()
+    assert (grown["profiles"], grown["sections"]) == (3, stats["sections"] + 2)
+    assert grown["stored_bytes"] - stats["stored_bytes"] < PROFILE_SIZE // 100
+    assert store.remove(digests[1]) == 1  # Only its own section goes
+    assert store.get(first) == data  # Shared sections survive the removal
+
+
+def test_damaged_blob_is_reported(store):
+    data = _raw("Profile-yellow.pbin")
+    digest = store.add(data)
+    blobs = [os.path.join(root, name) for root, _, names in os.walk(os.path.join(store.directory, "blobs"))
+             for name in names]
+    victim = max(blobs, key=os.path.getsize)
+    with open(victim, "r+b") as f:
+        f.write(b"\xFF")
+    with pytest.raises(ProfileError, match="damaged"):
+        store.get(digest)
+
+    os.remove(victim)
+    with pytest.raises(ProfileError, match="missing"):
+        store.get(digest)
@@ -0,0 +1,82 @@
+"""
+Armor Gaming Mouse Validator Tests
+
+Malformed configurations come back as issues: normalise() must never raise,
+and one bad file must not take a sweep (or its process pool) down.
+"""
+
+import json
+
+import pytest
+
+from armor.validate import normalise, sweep, validate_file
+
+CONFIG = {
+    "polling_rate": 1000,
+    "key_response_ms": 12,
+    "dpi_stages": [400, 800, 1600],
+    "dpi_colors": ["FF0000", "00FF00", "0000FF"],
+    "buttons_1": ["0100F000", "0100F100", "0100F200", "0100F400", "0100F300", "07000100", "04000100", "04000200"],
+    "buttons_2": ["00000000"] * 8,
+    "macros": {},
+}
+
+
+def _errors(issues):
+    return {i.field for i in issues if i.severity == "error" and not i.fixed}
+
+
+def test_valid_config_has_no_issues():
+    fixed, issues = normalise(CONFIG)
+    assert issues == []
+    assert fixed == CONFIG
+
+
+def test_null_fields_are_issues():
+    for field in ("dpi_stages", "dpi_colors", "buttons_1", "macros"):
+        config = dict(CONFIG, **{field: None})
+        _, issues = normalise(config)
+        if field == "macros":
+            assert issues == []  # No macros at all is fine
+        else:
+            assert field in _errors(issues)
+
+
+def test_wrongly_shaped_fields_are_issues():
+    _, issues = normalise(dict(CONFIG, dpi_stages="400", polling_rate=[1000], macros={"m": 3}))
+    assert {"dpi_stages", "macros.m"} <= _errors(issues)
+    assert any(i.field == "polling_rate" and i.fixed for i in issues)
+
+
+def test_non_dict_config_is_an_issue():
+    for config in ([CONFIG], None, "profile", 3):
+        _, issues = normalise(config)
+        assert _errors(issues) == {"config"}
+
+
+def test_bad_files_do_not_stop_the_sweep(tmp_path):
+    (tmp_path / "good.json").write_text(json.dumps(CONFIG))
+    (tmp_path / "list.json").write_text(json.dumps([CONFIG]))
+    (tmp_path / "null.json").write_text(json.dumps(dict(CONFIG, dpi_stages=None)))
+    (tmp_path / "broken.json").write_text("{")
+
+    assert validate_file(str(tmp_path / "list.json"))["ok"] is False
+    report = sweep([str(tmp_path)], workers=2)
+    assert report["files"] == 4
+    assert sorted(p.rsplit("/", 1)[-1] for p in report["failed"]) == ["broken.json", "list.json", "null.json"]
+
+
+@pytest.fixture
+def hardware(monkeypatch):
+    monkeypatch.delenv("ARMOR_TRANSPORT", raising=False)
+    monkeypatch.delenv("ARMOR_UNVERIFIED_SLOTS", raising=False)
+
+
+def test_macro_slots_follow_the_slot_limit(hardware, monkeypatch):
+    two = {"a": {"actions": [["PRESS", "A", 10]]}, "b": {"actions": [["PRESS", "B", 10]]}}
+    config = dict(CONFIG, buttons_2=["09000200"] + ["00000000"] * 7, macros=two)
+    assert {"buttons_2[0]", "macros"} <= _errors(normalise(config)[1])  # Slot 1 only on hardware
+
+    assert _errors(normalise(config, slot_count=6)[1]) == set()
+    monkeypatch.setenv("ARMOR_UNVERIFIED_SLOTS", "1")
+    assert _errors(normalise(config)[1]) == set()